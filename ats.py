@@ -0,0 +1,50 @@
+"""Pontuação local de aderência de um CV à vaga, no estilo dos filtros ATS (por palavras-chave).
+
+Usada para ordenar as variantes geradas em uma única chamada ao Gemini e renderizar só
+as melhores, sem nenhuma requisição extra.
+"""
+import math
+from collections import Counter
+
+from prompt import limpar_vaga
+from secoes import termos_significativos
+
+# Constantes
+# Quantos termos ausentes (os de maior peso) são informados junto com a pontuação.
+MAX_MISSING_TERMS = 10
+
+
+def _textos(valor):
+    if isinstance(valor, str):
+        yield valor
+    elif isinstance(valor, dict):
+        for item in valor.values():
+            yield from _textos(item)
+    elif isinstance(valor, list):
+        for item in valor:
+            yield from _textos(item)
+
+
+class PontuadorATS:
+    """Mede quanto dos termos significativos da vaga aparece no CV.
+
+    Cada termo da vaga (sem boilerplate e stopwords, ver `secoes.termos_significativos`)
+    pesa 1 + log(ocorrências), para que termos repetidos na vaga contem mais sem dominar
+    a pontuação. A pontuação de um CV é a fração do peso total coberta pelos termos dele,
+    entre 0 e 1. Os pesos são calculados uma vez por vaga e reaproveitados para todas as
+    variantes; pontuar um CV é uma passada pelos textos dele e uma consulta a um conjunto.
+    """
+
+    def __init__(self, job_description):
+        ocorrencias = Counter(termos_significativos(limpar_vaga(job_description)))
+        self.pesos = {termo: 1 + math.log(total) for termo, total in ocorrencias.items()}
+        self.peso_total = sum(self.pesos.values())
+
+    def pontuar(self, cv_content):
+        """Retorna {"pontuacao": 0..1, "faltando": termos da vaga ausentes, do mais ao menos relevante}."""
+        termos_cv = set(termos_significativos(" ".join(_textos(cv_content))))
+        faltando = [termo for termo in self.pesos if termo not in termos_cv]
+        peso_faltando = sum(self.pesos[termo] for termo in faltando)
+        pontuacao = 1 - peso_faltando / self.peso_total if self.peso_total else 0.0
+        faltando.sort(key=lambda termo: -self.pesos[termo])
+        return {"pontuacao": pontuacao, "faltando": faltando[:MAX_MISSING_TERMS]}
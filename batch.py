@@ -0,0 +1,292 @@
+import argparse
+import hashlib
+import json
+import os
+import random
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from main import estatisticas_conexoes, generate_cv, obter_cliente
+from metrics import metricas, ativar_log_json
+from prompt import uso_tokens
+
+# Constantes
+DEFAULT_CONCURRENCY = 4
+DEFAULT_MAX_RETRIES = 5
+DEFAULT_BACKOFF_BASE = 2.0
+DEFAULT_BACKOFF_MAX = 60.0
+DEFAULT_OUTPUT_DIR = "cvs_gerados"
+JOB_FILE_EXTENSIONS = ('.txt', '.md')
+
+
+def carregar_vagas(origem):
+    """Lê as vagas de um diretório (um arquivo por vaga) ou de um arquivo JSONL.
+
+    Retorna uma lista de tuplas (id_da_vaga, descricao_da_vaga). Propaga `OSError` se a
+    origem não existir ou não puder ser lida e `ValueError` se o conteúdo for inválido.
+    """
+    vagas = []
+    if os.path.isdir(origem):
+        for nome in sorted(os.listdir(origem)):
+            caminho = os.path.join(origem, nome)
+            base, ext = os.path.splitext(nome)
+            if not os.path.isfile(caminho) or ext.lower() not in JOB_FILE_EXTENSIONS:
+                continue
+            with open(caminho, 'r', encoding='utf-8') as arquivo:
+                vagas.append((base, arquivo.read()))
+        return vagas
+
+    with open(origem, 'r', encoding='utf-8') as arquivo:
+        for numero, linha in enumerate(arquivo, start=1):
+            linha = linha.strip()
+            if not linha:
+                continue
+            registro = json.loads(linha)
+            if not isinstance(registro, dict):
+                raise ValueError(f"linha {numero} de '{origem}' não é um objeto JSON")
+            descricao = registro.get("job_description") or registro.get("description")
+            if not descricao:
+                print(f"Aviso: linha {numero} de '{origem}' sem job_description, ignorada.")
+                continue
+            vagas.append((str(registro.get("id", f"vaga_{numero}")), descricao))
+    return vagas
+
+
+def _nome_arquivo_seguro(id_vaga):
+    """Converte o id da vaga em um nome de arquivo válido e único por id.
+
+    Se o id precisar ser alterado, recebe um sufixo com o hash dele, para que ids
+    diferentes (ex.: "dev/1" e "dev_1") não gravem no mesmo arquivo.
+    """
+    nome = re.sub(r'[^A-Za-z0-9._-]+', '_', id_vaga).strip('._') or "vaga"
+    if nome != id_vaga:
+        nome += "_" + hashlib.sha256(id_vaga.encode('utf-8')).hexdigest()[:8]
+    return nome
+
+
+def _eh_rate_limit(erro):
+    """Indica se o erro retornado pela API é de limite de requisições (HTTP 429 / RESOURCE_EXHAUSTED)."""
+    return getattr(erro, 'code', None) == 429 or 'RESOURCE_EXHAUSTED' in str(erro)
+
+
+class _ModelsComBackoff:
+    """`client.models` que repete as chamadas quando a API sinaliza rate limit."""
+
+    def __init__(self, limitador, models):
+        self._limitador = limitador
+        self._models = models
+
+    def generate_content(self, **kwargs):
+        return self._limitador.executar(lambda: self._models.generate_content(**kwargs))
+
+    def generate_content_stream(self, **kwargs):
+        # O rate limit aparece ao abrir o stream; só a obtenção do primeiro pedaço é repetida.
+        def abrir():
+            pedacos = iter(self._models.generate_content_stream(**kwargs))
+            return next(pedacos, None), pedacos
+
+        primeiro, pedacos = self._limitador.executar(abrir)
+        if primeiro is not None:
+            yield primeiro
+        yield from pedacos
+
+
+class _ClienteComBackoff:
+    def __init__(self, limitador, client):
+        self.models = _ModelsComBackoff(limitador, client.models)
+
+
+class LimitadorDeTaxa:
+    """Controla o backoff exponencial compartilhado entre todas as threads do lote.
+
+    Quando uma requisição recebe 429, todas as demais aguardam o mesmo intervalo
+    antes de voltar a chamar a API, em vez de cada uma insistir isoladamente.
+    """
+
+    def __init__(self, max_retries=DEFAULT_MAX_RETRIES, backoff_base=DEFAULT_BACKOFF_BASE,
+                 backoff_max=DEFAULT_BACKOFF_MAX, sleep=time.sleep):
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        self._pausa_ate = 0.0
+        self.retries = 0
+
+    def _aguardar_pausa(self):
+        with self._lock:
+            espera = self._pausa_ate - time.monotonic()
+        if espera > 0:
+            self._sleep(espera)
+
+    def executar(self, chamada):
+        """Executa `chamada`, repetindo com backoff exponencial e jitter em caso de 429."""
+        tentativa = 0
+        while True:
+            self._aguardar_pausa()
+            try:
+                return chamada()
+            except Exception as e:
+                if not _eh_rate_limit(e) or tentativa >= self.max_retries:
+                    raise
+                espera = min(self.backoff_max, self.backoff_base * (2 ** tentativa))
+                espera += random.uniform(0, espera / 2)
+                with self._lock:
+                    self.retries += 1
+                    self._pausa_ate = max(self._pausa_ate, time.monotonic() + espera)
+                metricas.incrementar("llm_retries_total")
+                tentativa += 1
+
+    def envolver(self, client):
+        """Retorna um objeto com a interface `client.models` protegida por backoff."""
+        return _ClienteComBackoff(self, client)
+
+
+def generate_cv_batch(origem, output_dir=DEFAULT_OUTPUT_DIR, concurrency=DEFAULT_CONCURRENCY,
+                      client=None, limitador=None, cache=None, ignorar_cache=False, streaming=False,
+                      por_secao=False, indice=None, limiar_similaridade=None, max_paginas=None):
+    """Gera um CV por vaga, distribuindo as chamadas ao Gemini em um pool de threads.
+
+    Com um `indice` de vagas (ver `similaridade.IndiceDeVagas`), vagas quase idênticas a
+    outras já processadas reaproveitam o CV delas em vez de chamar o Gemini (sem
+    `limiar_similaridade`, vale `similaridade.DEFAULT_THRESHOLD`).
+
+    Retorna um dicionário com os caminhos gerados, as falhas, o throughput em vagas por minuto
+    e os tokens de entrada/saída consumidos pelo lote.
+    """
+    vagas = carregar_vagas(origem) if isinstance(origem, str) else list(origem)
+    os.makedirs(output_dir, exist_ok=True)
+
+    if client is None:
+        client = obter_cliente()
+    limitador = limitador or LimitadorDeTaxa()
+    client_protegido = limitador.envolver(client)
+
+    gerados = {}
+    falhas = []
+    tokens_antes = (uso_tokens.tokens_entrada, uso_tokens.tokens_saida)
+    inicio = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as executor:
+        futuros = {}
+        for id_vaga, descricao in vagas:
+            output_path = os.path.join(output_dir, f"{_nome_arquivo_seguro(id_vaga)}.pdf")
+            futuro = executor.submit(generate_cv, descricao, output_path, client_protegido,
+                                     cache, ignorar_cache, streaming, por_secao=por_secao,
+                                     indice=indice, limiar_similaridade=limiar_similaridade,
+                                     max_paginas=max_paginas)
+            futuros[futuro] = id_vaga
+        for futuro in as_completed(futuros):
+            id_vaga = futuros[futuro]
+            try:
+                resultado = futuro.result()
+            except Exception as e:
+                print(f"Erro ao gerar o CV da vaga '{id_vaga}': {e}")
+                resultado = None
+            if resultado is None:
+                falhas.append(id_vaga)
+            else:
+                gerados[id_vaga] = resultado
+    duracao = time.perf_counter() - inicio
+    tokens_entrada = uso_tokens.tokens_entrada - tokens_antes[0]
+    tokens_saida = uso_tokens.tokens_saida - tokens_antes[1]
+
+    vagas_por_minuto = (len(gerados) / duracao * 60) if duracao > 0 else 0.0
+    print(f"Lote concluído: {len(gerados)} CVs gerados, {len(falhas)} falhas, "
+          f"{limitador.retries} retries, {vagas_por_minuto:.1f} vagas/min, "
+          f"{tokens_entrada} tokens de entrada, {tokens_saida} de saída.")
+    conexoes = estatisticas_conexoes()
+    if conexoes["requisicoes"]:
+        print(f"Conexões HTTP: {conexoes['conexoes']} abertas para {conexoes['requisicoes']} requisições "
+              f"(reuso de {conexoes['taxa_reuso']:.0%}).")
+    return {
+        "gerados": gerados,
+        "falhas": falhas,
+        "retries": limitador.retries,
+        "duracao_segundos": duracao,
+        "vagas_por_minuto": vagas_por_minuto,
+        "tokens_entrada": tokens_entrada,
+        "tokens_saida": tokens_saida,
+        "conexoes": conexoes,
+    }
+
+
+def main(argv=None):
+    """Linha de comando do lote (também usada por `cli.py batch`); retorna o código de saída."""
+    parser = argparse.ArgumentParser(description="Gera CVs em lote a partir de várias vagas.")
+    parser.add_argument("origem", nargs="?",
+                        help="Diretório com um arquivo .txt por vaga ou arquivo JSONL (opcional com --fila).")
+    parser.add_argument("--saida", default=DEFAULT_OUTPUT_DIR, help="Diretório dos PDFs gerados.")
+    parser.add_argument("--concorrencia", type=int, default=DEFAULT_CONCURRENCY,
+                        help="Número máximo de chamadas simultâneas ao Gemini.")
+    parser.add_argument("--max-retries", type=int, default=DEFAULT_MAX_RETRIES,
+                        help="Tentativas extras quando a API retorna rate limit (429).")
+    parser.add_argument("--sem-cache", action="store_true",
+                        help="Ignora respostas em cache e chama o Gemini para todas as vagas.")
+    parser.add_argument("--streaming", action="store_true",
+                        help="Consome as respostas em streaming, abortando no primeiro JSON inválido.")
+    parser.add_argument("--por-secao", action="store_true",
+                        help="Gera cada seção em uma requisição própria, com cache por seção.")
+    parser.add_argument("--indice", metavar="DIRETORIO",
+                        help="Índice de vagas já processadas; vagas quase idênticas reaproveitam o CV.")
+    parser.add_argument("--limiar", type=float,
+                        help="Similaridade mínima (0 a 1) para reaproveitar o CV de outra vaga (padrão: 0.85).")
+    parser.add_argument("--max-paginas", type=int, metavar="N",
+                        help="Ajusta o layout de cada CV para caber em N páginas.")
+    parser.add_argument("--fila", metavar="ARQUIVO",
+                        help="Fila persistente (SQLite): registra o estado de cada vaga e retoma de onde parou.")
+    parser.add_argument("--max-tentativas", type=int,
+                        help="Com --fila, tentativas de cada etapa de uma vaga antes de marcá-la como failed "
+                             "(padrão: 3).")
+    parser.add_argument("--reabrir-falhas", action="store_true",
+                        help="Com --fila, devolve as vagas em failed para nova tentativa.")
+    parser.add_argument("--metricas-json", action="store_true",
+                        help="Emite uma linha JSON por etapa/contador no stderr.")
+    parser.add_argument("--metricas-prometheus", metavar="ARQUIVO",
+                        help="Ao final, grava as métricas neste arquivo no formato texto do Prometheus.")
+    args = parser.parse_args(argv)
+    if args.origem is None and not args.fila:
+        parser.error("informe a origem das vagas ou uma --fila para retomar.")
+    vagas = None
+    if args.origem is not None:
+        try:
+            vagas = carregar_vagas(args.origem)
+        except (OSError, ValueError) as e:
+            parser.error(f"não foi possível ler as vagas de '{args.origem}': {e}")
+    if args.metricas_json:
+        ativar_log_json()
+    indice = None
+    if args.indice:
+        from similaridade import IndiceDeVagas
+        indice = IndiceDeVagas(args.indice)
+    limitador = LimitadorDeTaxa(max_retries=args.max_retries)
+    if args.fila:
+        from fila import DEFAULT_MAX_ATTEMPTS, FilaDeTrabalhos, processar_fila
+        fila = FilaDeTrabalhos(args.fila)
+        if args.reabrir_falhas:
+            print(f"{fila.reabrir_falhas()} vagas em failed reabertas.")
+        if vagas is not None:
+            print(f"{fila.enfileirar(vagas)} vagas novas ou alteradas na fila.")
+        resultado = processar_fila(fila, args.saida, args.concorrencia, limitador=limitador,
+                                   ignorar_cache=args.sem_cache, streaming=args.streaming, por_secao=args.por_secao,
+                                   indice=indice, limiar_similaridade=args.limiar, max_paginas=args.max_paginas,
+                                   max_tentativas=args.max_tentativas or DEFAULT_MAX_ATTEMPTS)
+        fila.fechar()
+    else:
+        resultado = generate_cv_batch(vagas, args.saida, args.concorrencia, limitador=limitador,
+                                      ignorar_cache=args.sem_cache, streaming=args.streaming,
+                                      por_secao=args.por_secao, indice=indice, limiar_similaridade=args.limiar,
+                                      max_paginas=args.max_paginas)
+    for etapa in metricas.resumo():
+        rotulos = ", ".join(f"{k}={v}" for k, v in etapa.items()
+                            if k not in ("etapa", "contagem", "total_ms", "media_ms", "max_ms"))
+        print(f"{etapa['etapa']:>20} {rotulos:<32} n={etapa['contagem']:<5} "
+              f"média {etapa['media_ms']:9.2f} ms  máx {etapa['max_ms']:9.2f} ms")
+    if args.metricas_prometheus:
+        metricas.salvar_prometheus(args.metricas_prometheus)
+    return 1 if resultado["falhas"] else 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
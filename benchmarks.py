@@ -0,0 +1,710 @@
+"""Benchmarks de desempenho do gerador de CVs.
+
+Uso:
+    python benchmarks.py render --docs 1 1000
+    python benchmarks.py escalonamento --docs 400 --workers 1 2 4 8
+    python benchmarks.py etapas --experiencias 1 10 50 --json bench_atual.json
+    python benchmarks.py comparar bench_base.json bench_atual.json --tolerancia 0.15
+    python benchmarks.py carga --requisicoes 200 --concorrencia 16 --latencia-ms 800
+    python benchmarks.py indice --vagas 100000
+    python benchmarks.py sanitizar --experiencias 1 10 50
+    python benchmarks.py ajuste --experiencias 1 3 5 10 --paginas 1
+    python benchmarks.py importacao --repeticoes 5
+    python benchmarks.py fila --vagas 10000
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import fpdf
+
+import main
+import prompt
+import resources
+import render_pool
+
+CV_FIXTURE = {
+    "personal_information": {
+        "name": "Nome Sobrenome",
+        "title": "Software Developer",
+        "phone": "(000) 000-0000",
+        "email": "email@example.com",
+        "linkedin": "linkedin.com/in/exemplo",
+        "location": "Vancouver, BC",
+    },
+    "profile": "Software developer with over six years of experience building scalable applications.",
+    "skills": ["Python", "SQL", "Java", "MongoDB", "OutSystems", "Jira", "Agile & Scrum", "Pega"],
+    "languages": [{"language": "English", "proficiency": "Professional"},
+                  {"language": "Portuguese", "proficiency": "Native"}],
+    "certifications": [{"name": "Associate Reactive Developer OutSystems", "date": "Jul 2023"}],
+    "professional_experience": [
+        {
+            "company": "Empresa Exemplo",
+            "location": "Vancouver, BC",
+            "title": "Software Developer",
+            "duration": "Jun/2018 - Nov/2021",
+            "description": "Developed REST applications and microservices.\n"
+                           "Designed and deployed over 100 production packages.\n"
+                           "Monitored production environments and created reports.",
+        }
+    ],
+    "education": [{"degree": "Bachelor's Degree in Computer Eng.", "institution": "FIAP", "years": "2012-2017"}],
+}
+
+
+DESCRICAO_LONGA = (
+    "Designed, implemented and maintained REST microservices in Python and Java, "
+    "coordinating releases with cross-functional teams and monitoring production environments."
+)
+VAGA_FIXTURE = "\n".join(
+    f"Requirement {i}: experience with Python, SQL, REST APIs and cloud platforms." for i in range(30)
+)
+FORMATO_RESULTADOS = 1
+# Módulos cujo carregamento domina a inicialização; informados quando um cenário os importa.
+HEAVY_MODULES = ("google.genai", "numpy", "dotenv", "httpx", "fpdf", "fontTools")
+
+
+def gerar_cv_fixture(n_experiencias, linhas_por_descricao=8):
+    """CV adaptado com `n_experiencias` experiências de descrições longas."""
+    cv_content = dict(CV_FIXTURE)
+    cv_content["professional_experience"] = [
+        {
+            "company": f"Empresa {i}",
+            "location": "Vancouver, BC",
+            "title": "Senior Software Developer",
+            "duration": "Jan/2015 - Dec/2016",
+            "description": "\n".join(f"{DESCRICAO_LONGA} ({j})" for j in range(linhas_por_descricao)),
+        }
+        for i in range(n_experiencias)
+    ]
+    return cv_content
+
+
+class _RespostaStub:
+    def __init__(self, text):
+        self.text = text
+        self.usage_metadata = None
+
+
+class ClienteStub:
+    """Cliente local com a interface usada de `genai.Client`, respondendo sempre o mesmo CV.
+
+    `latencia_ms` simula o tempo de resposta do modelo (sem ocupar CPU).
+    """
+
+    def __init__(self, cv_content, latencia_ms=0):
+        self.texto = f"```json\n{json.dumps(cv_content, ensure_ascii=False)}\n```"
+        self.latencia = latencia_ms / 1000
+        self.models = self
+
+    def generate_content(self, model=None, contents=None, config=None):
+        if self.latencia:
+            time.sleep(self.latencia)
+        return _RespostaStub(self.texto)
+
+
+def _medir(funcao, repeticoes, preparar=None):
+    """Executa `funcao` `repeticoes` vezes e retorna os tempos em ms.
+
+    `preparar`, se informado, roda antes de cada execução (fora da medição) e seu
+    retorno é passado para `funcao`.
+    """
+    tempos = []
+    for _ in range(repeticoes):
+        argumento = preparar() if preparar else None
+        inicio = time.perf_counter()
+        funcao(argumento) if preparar else funcao()
+        tempos.append((time.perf_counter() - inicio) * 1000)
+    return tempos
+
+
+def _resumir(etapa, n_experiencias, tempos):
+    ordenados = sorted(tempos)
+    return {
+        "etapa": etapa,
+        "experiencias": n_experiencias,
+        "repeticoes": len(tempos),
+        "mediana_ms": statistics.median(ordenados),
+        "p95_ms": ordenados[min(len(ordenados) - 1, int(len(ordenados) * 0.95))],
+        "min_ms": ordenados[0],
+    }
+
+
+def _commit_atual():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def bench_etapas(lista_experiencias, repeticoes=20):
+    """Mede cada etapa do pipeline separadamente para CVs de vários tamanhos.
+
+    O Gemini é substituído por `ClienteStub`, então `generate_cv` mede só o custo local.
+    Retorna um dicionário serializável em JSON, comparável entre commits com `comparar`.
+    """
+    resultados = []
+    with tempfile.TemporaryDirectory() as diretorio:
+        saida = os.path.join(diretorio, "cv.pdf")
+
+        resources._pool = None
+        inicio = time.perf_counter()
+        resources.obter_pool()
+        resultados.append(_resumir("pool_de_recursos", 0, [(time.perf_counter() - inicio) * 1000]))
+
+        def ler_bases():
+            main.ler_arquivo(main.CV_BASE_FILENAME)
+            main.ler_arquivo(main.DICIONARIO_BASE_FILENAME)
+
+        cvbase = main.ler_arquivo(main.CV_BASE_FILENAME)
+        dicionario = main.ler_arquivo(main.DICIONARIO_BASE_FILENAME)
+        resultados.append(_resumir("ler_arquivo", 0, _medir(ler_bases, repeticoes)))
+        resultados.append(_resumir("prompt", 0, _medir(
+            lambda: prompt.construir_prompt(main.PROMPT_TEMPLATE, cvbase, dicionario, VAGA_FIXTURE), repeticoes)))
+
+        for n_experiencias in lista_experiencias:
+            cv_content = gerar_cv_fixture(n_experiencias)
+            cliente = ClienteStub(cv_content)
+            info = cv_content["personal_information"]
+
+            def novo_pdf():
+                pdf = main.PDF(format='A4', personal_info=info)
+                pdf.set_auto_page_break(auto=True, margin=10)
+                return pdf
+
+            def pdf_com_pagina():
+                pdf = novo_pdf()
+                pdf.add_page()
+                return pdf
+
+            def pdf_desenhado():
+                pdf = pdf_com_pagina()
+                pdf._adicionar_cv(cv_content)
+                return pdf
+
+            etapas = {
+                "extrair_json": _medir(lambda: main.extrair_json(cliente.texto), repeticoes),
+                "pdf_init": _medir(novo_pdf, repeticoes),
+                "header": _medir(lambda pdf: pdf.add_page(), repeticoes, novo_pdf),
+                "layout": _medir(lambda pdf: pdf._adicionar_cv(cv_content), repeticoes, pdf_com_pagina),
+                "output": _medir(lambda pdf: pdf.output(saida), repeticoes, pdf_desenhado),
+                "render_cv": _medir(lambda: main.render_cv(cv_content, saida), repeticoes),
+            }
+            cache = main.CacheDeRespostas(os.path.join(diretorio, "cache"))
+            with open(os.devnull, 'w') as nulo:
+                saida_padrao, sys.stdout = sys.stdout, nulo
+                try:
+                    etapas["generate_cv_stub"] = _medir(
+                        lambda: main.generate_cv(VAGA_FIXTURE, saida, cliente, cache, ignorar_cache=True),
+                        repeticoes)
+                finally:
+                    sys.stdout = saida_padrao
+            for etapa, tempos in etapas.items():
+                resultados.append(_resumir(etapa, n_experiencias, tempos))
+
+    for r in resultados:
+        print(f"{r['etapa']:>18} | {r['experiencias']:>3} exp | mediana {r['mediana_ms']:9.3f} ms | "
+              f"p95 {r['p95_ms']:9.3f} ms")
+    return {
+        "formato": FORMATO_RESULTADOS,
+        "commit": _commit_atual(),
+        "python": platform.python_version(),
+        "fpdf2": fpdf.__version__,
+        "repeticoes": repeticoes,
+        "resultados": resultados,
+    }
+
+
+def comparar(arquivo_base, arquivo_atual, tolerancia=0.10):
+    """Compara dois resultados de `bench_etapas` e retorna as etapas que ficaram mais lentas.
+
+    Uma regressão é uma mediana mais de `tolerancia` (fração) acima da base.
+    """
+    with open(arquivo_base, encoding='utf-8') as arquivo:
+        base = {(r["etapa"], r["experiencias"]): r for r in json.load(arquivo)["resultados"]}
+    with open(arquivo_atual, encoding='utf-8') as arquivo:
+        atual = json.load(arquivo)["resultados"]
+    regressoes = []
+    for r in atual:
+        anterior = base.get((r["etapa"], r["experiencias"]))
+        if not anterior or anterior["mediana_ms"] <= 0:
+            continue
+        razao = r["mediana_ms"] / anterior["mediana_ms"]
+        marcador = "REGRESSÃO" if razao > 1 + tolerancia else ""
+        print(f"{r['etapa']:>18} | {r['experiencias']:>3} exp | {anterior['mediana_ms']:9.3f} -> "
+              f"{r['mediana_ms']:9.3f} ms ({razao:5.2f}x) {marcador}")
+        if marcador:
+            regressoes.append(dict(r, base_mediana_ms=anterior["mediana_ms"], razao=razao))
+    return regressoes
+
+
+def _percentil(ordenados, fracao):
+    return ordenados[min(len(ordenados) - 1, int(len(ordenados) * fracao))] if ordenados else 0.0
+
+
+async def _carga(enviar, n_requisicoes, concorrencia):
+    semaforo = asyncio.Semaphore(concorrencia)
+    latencias = []
+    erros = 0
+
+    async def uma(indice):
+        nonlocal erros
+        async with semaforo:
+            inicio = time.perf_counter()
+            status = await enviar(f"{VAGA_FIXTURE}\nReference: {indice}")
+            latencias.append((time.perf_counter() - inicio) * 1000)
+            erros += status != 200
+
+    inicio = time.perf_counter()
+    await asyncio.gather(*(uma(i) for i in range(n_requisicoes)))
+    return time.perf_counter() - inicio, sorted(latencias), erros
+
+
+def bench_carga(n_requisicoes, concorrencia, latencia_ms=800, workers=None, url=None):
+    """Teste de carga do serviço HTTP (service.py) com o modelo simulado por `ClienteStub`.
+
+    Sem `url`, a aplicação ASGI roda no próprio processo, com fontes aquecidas e um único
+    cliente stub; com `url`, as requisições vão para um servidor já em execução. Cada
+    requisição usa uma vaga diferente para não ser atendida pelo cache de respostas.
+    """
+    import service
+
+    with tempfile.TemporaryDirectory() as diretorio:
+        if url:
+            import httpx
+
+            async def executar():
+                async with httpx.AsyncClient(timeout=None) as cliente_http:
+                    async def enviar(vaga):
+                        resposta = await cliente_http.post(url.rstrip("/") + "/cv", json={"job_description": vaga})
+                        return resposta.status_code
+                    return await _carga(enviar, n_requisicoes, concorrencia)
+        else:
+            app = service.ServicoCV(client=ClienteStub(CV_FIXTURE, latencia_ms),
+                                    cache=main.CacheDeRespostas(diretorio), workers=workers or concorrencia)
+            app.aquecer()
+
+            async def enviar(vaga):
+                corpo = json.dumps({"job_description": vaga}).encode()
+                mensagens = [{"type": "http.request", "body": corpo, "more_body": False}]
+                respostas = []
+
+                async def receive():
+                    return mensagens.pop(0)
+
+                async def send(mensagem):
+                    respostas.append(mensagem)
+
+                scope = {"type": "http", "method": "POST", "path": "/cv",
+                         "headers": [(b"content-type", b"application/json")]}
+                await app(scope, receive, send)
+                return respostas[0]["status"]
+
+            async def executar():
+                return await _carga(enviar, n_requisicoes, concorrencia)
+
+        with open(os.devnull, 'w') as nulo:
+            saida_padrao, sys.stdout = sys.stdout, nulo
+            try:
+                duracao, latencias, erros = asyncio.run(executar())
+            finally:
+                sys.stdout = saida_padrao
+            if not url:
+                app.executor.shutdown()
+
+    resultado = {
+        "requisicoes": n_requisicoes,
+        "concorrencia": concorrencia,
+        "latencia_modelo_ms": None if url else latencia_ms,
+        "erros": erros,
+        "requisicoes_por_segundo": n_requisicoes / duracao,
+        "p50_ms": _percentil(latencias, 0.50),
+        "p95_ms": _percentil(latencias, 0.95),
+        "p99_ms": _percentil(latencias, 0.99),
+    }
+    print(f"{n_requisicoes} requisições, concorrência {concorrencia}: "
+          f"{resultado['requisicoes_por_segundo']:.1f} req/s | p50 {resultado['p50_ms']:.0f} ms | "
+          f"p95 {resultado['p95_ms']:.0f} ms | p99 {resultado['p99_ms']:.0f} ms | {erros} erros")
+    return resultado
+
+
+def _vagas_sinteticas(quantidade, palavras_por_vaga=120, semente=7):
+    """Vagas aleatórias sobre um vocabulário fixo (não se parecem entre si)."""
+    gerador = random.Random(semente)
+    vocabulario = [f"termo{i}" for i in range(5000)]
+    for i in range(quantidade):
+        yield f"vaga-{i}", " ".join(gerador.choices(vocabulario, k=palavras_por_vaga))
+
+
+def bench_indice(n_vagas, n_buscas=1000, lote=5000):
+    """Mede inserção, carregamento e busca no índice de similaridade com `n_vagas` vagas."""
+    import similaridade
+
+    with tempfile.TemporaryDirectory() as diretorio:
+        indice = similaridade.IndiceDeVagas(diretorio)
+        vagas = list(_vagas_sinteticas(n_vagas))
+        inicio = time.perf_counter()
+        for i in range(0, n_vagas, lote):
+            indice.adicionar_varios((id_vaga, texto, {"chave": id_vaga}) for id_vaga, texto in vagas[i:i + lote])
+        insercao = time.perf_counter() - inicio
+
+        inicio = time.perf_counter()
+        indice = similaridade.IndiceDeVagas(diretorio)
+        carregamento = time.perf_counter() - inicio
+
+        gerador = random.Random(11)
+        consultas = []
+        for id_vaga, texto in gerador.sample(vagas, min(n_buscas, n_vagas)):
+            palavras = texto.split()
+            palavras[gerador.randrange(len(palavras))] = "alterado"  # Quase duplicata.
+            consultas.append((id_vaga, " ".join(palavras)))
+        tempos = []
+        acertos = 0
+        for id_vaga, texto in consultas:
+            inicio = time.perf_counter()
+            resultado = indice.buscar(texto)
+            tempos.append((time.perf_counter() - inicio) * 1000)
+            acertos += bool(resultado) and resultado[0]["id"] == id_vaga
+    tempos.sort()
+    resultado = {
+        "vagas": n_vagas,
+        "insercao_por_vaga_ms": insercao * 1000 / n_vagas,
+        "carregamento_ms": carregamento * 1000,
+        "busca_p50_ms": _percentil(tempos, 0.50),
+        "busca_p99_ms": _percentil(tempos, 0.99),
+        "recall": acertos / len(consultas),
+    }
+    print(f"{n_vagas} vagas | inserção {resultado['insercao_por_vaga_ms']:.3f} ms/vaga | "
+          f"carregamento {resultado['carregamento_ms']:.0f} ms | busca p50 {resultado['busca_p50_ms']:.3f} ms, "
+          f"p99 {resultado['busca_p99_ms']:.3f} ms | recall {resultado['recall']:.2f}")
+    return resultado
+
+
+def _sanitizar_legado(texto):
+    """Sanitização anterior: um `str.replace` por caractere conhecido, chamada a cada célula."""
+    for unicode_char, ascii_char in {'\u2019': "'", '\u2013': "-", '\u2026': "..."}.items():
+        texto = texto.replace(unicode_char, ascii_char)
+    return texto
+
+
+def _todos_os_textos(valor):
+    """Todos os textos do CV (o que `Sanitizador.sanitizar_cv` percorre), para comparar o mesmo trabalho."""
+    if isinstance(valor, str):
+        yield valor
+    elif isinstance(valor, dict):
+        for item in valor.values():
+            yield from _todos_os_textos(item)
+    elif isinstance(valor, list):
+        for item in valor:
+            yield from _todos_os_textos(item)
+
+
+def _textos_das_celulas(cv_content):
+    """Os textos que o layout escreve, um por célula, como eram sanitizados antes."""
+    textos = [cv_content.get("profile", "")]
+    textos += [e.get("degree", "") for e in cv_content.get("education", [])]
+    textos += [f"{e.get('institution', '')} {e.get('years', '')}" for e in cv_content.get("education", [])]
+    textos += cv_content.get("skills", [])
+    for exp in cv_content.get("professional_experience", []):
+        textos += [f"{exp['company']} - {exp['location']}", f"{exp['title']}, {exp['duration']}"]
+        textos += [f"- {linha.strip()}" for linha in exp["description"].split("\n")]
+    return textos
+
+
+def bench_sanitizar(lista_experiencias, repeticoes=200):
+    """Compara a sanitização por célula (legado e tabela) com a sanitização única do documento.
+
+    O CV tem aspas e travessões tipográficos e acentos, que a cadeia legada também trata;
+    `tabela_documento_exotico` acrescenta ligaduras, letras romenas e emoji (só a tabela os trata).
+    """
+    sanitizador = resources.obter_pool().sanitizador
+    resultados = []
+    for n_experiencias in lista_experiencias:
+        cv_content = gerar_cv_fixture(n_experiencias)
+        cv_content["profile"] += " It\u2019s fine \u2013 caf\u00e9 \u2026"
+        exotico = dict(cv_content, profile=cv_content["profile"] + " \ufb01 \u0219tiin\u021b\u0103 \u200b\U0001F680")
+        textos = _textos_das_celulas(cv_content)
+        todos = list(_todos_os_textos(cv_content))
+        etapas = {
+            "legado_por_celula": _medir(lambda: [_sanitizar_legado(t) for t in textos], repeticoes),
+            "legado_documento": _medir(lambda: [_sanitizar_legado(t) for t in todos], repeticoes),
+            "tabela_por_celula": _medir(lambda: [sanitizador(t) for t in textos], repeticoes),
+            "tabela_documento": _medir(lambda: sanitizador.sanitizar_cv(cv_content), repeticoes),
+            "tabela_documento_exotico": _medir(lambda: sanitizador.sanitizar_cv(exotico), repeticoes),
+        }
+        for etapa, tempos in etapas.items():
+            r = _resumir(etapa, n_experiencias, tempos)
+            r["celulas"] = len(todos) if "documento" in etapa else len(textos)
+            resultados.append(r)
+            print(f"{etapa:>24} | {n_experiencias:>3} exp | {r['celulas']:>4} textos | "
+                  f"mediana {r['mediana_ms'] * 1000:9.1f} µs")
+    return resultados
+
+
+def regressoes_sanitizacao(resultados):
+    """Tamanhos de CV em que a sanitização do documento foi mais lenta que a cadeia legada sobre os mesmos textos.
+
+    Compara os tempos mínimos, menos sensíveis a ruído que a mediana.
+    """
+    minimos = {(r["etapa"], r["experiencias"]): r["min_ms"] for r in resultados}
+    return [n for etapa, n in minimos if etapa == "tabela_documento"
+            and minimos[etapa, n] > minimos["legado_documento", n]]
+
+
+def bench_ajuste(lista_experiencias, max_paginas=1):
+    """Tentativas de layout e tempo da busca do ajuste para caber em `max_paginas`, por tamanho de CV."""
+    resultados = []
+    for n_experiencias in lista_experiencias:
+        cv_content = resources.obter_pool().sanitizador.sanitizar_cv(gerar_cv_fixture(n_experiencias))
+        pdf = main.PDF(format='A4', personal_info=cv_content["personal_information"])
+        pdf.set_auto_page_break(auto=True, margin=10)
+        with open(os.devnull, 'w') as nulo:
+            saida_padrao, sys.stdout = sys.stdout, nulo
+            try:
+                relatorio = pdf._ajustar_paginas(cv_content, max_paginas)
+            finally:
+                sys.stdout = saida_padrao
+        ajuste = relatorio.pop("ajuste")
+        resultados.append({"experiencias": n_experiencias, **relatorio, "escala_fonte": ajuste.escala_fonte,
+                           "escala_linha": ajuste.escala_linha, "max_itens": ajuste.max_itens})
+        print(f"{n_experiencias:>3} exp | {relatorio['tentativas']:>3} tentativas | "
+              f"{relatorio['duracao_ms']:8.1f} ms | {relatorio['paginas']} página(s) | {ajuste}")
+    return resultados
+
+
+def _cenarios_importacao(diretorio):
+    cv_json = os.path.join(diretorio, "cv.json")
+    with open(cv_json, 'w', encoding='utf-8') as arquivo:
+        json.dump(CV_FIXTURE, arquivo)
+    pdf = os.path.join(diretorio, "cv.pdf")
+    return {
+        "cli --help": "import cli; cli.construir_parser()",
+        "cli render": f"import cli; cli.main(['render', {cv_json!r}, '--saida', {pdf!r}])",
+        "import main": "import main",
+        "generate (cliente)": "import main; main.carregar_ambiente(); import gemini",
+        "import batch": "import batch",
+    }
+
+
+def _ler_importtime(stderr):
+    """Soma dos tempos próprios (ms) e módulos importados, a partir da saída de `-X importtime`."""
+    total_us, modulos = 0, set()
+    for linha in stderr.splitlines():
+        if not linha.startswith("import time:") or "self [us]" in linha:
+            continue
+        proprio, _, nome = linha[len("import time:"):].split("|")
+        total_us += int(proprio)
+        modulos.add(nome.strip())
+    return total_us / 1000, modulos
+
+
+def bench_importacao(repeticoes=5):
+    """Tempo de importação (`python -X importtime`) e do processo inteiro em cada caminho do CLI.
+
+    Cada medição roda em um processo novo, como uma chamada do CLI por vaga em um worker de
+    fila; também informa quais módulos pesados (`HEAVY_MODULES`) cada caminho carrega.
+    """
+    resultados = []
+    with tempfile.TemporaryDirectory() as diretorio:
+        for cenario, codigo in _cenarios_importacao(diretorio).items():
+            importacao, processo, modulos = [], [], set()
+            for _ in range(repeticoes):
+                inicio = time.perf_counter()
+                execucao = subprocess.run([sys.executable, "-X", "importtime", "-c", codigo], capture_output=True,
+                                          text=True, cwd=os.path.dirname(os.path.abspath(__file__)))
+                processo.append((time.perf_counter() - inicio) * 1000)
+                if execucao.returncode:
+                    raise RuntimeError(f"Cenário '{cenario}' falhou: {execucao.stderr.strip().splitlines()[-1]}")
+                total_ms, modulos = _ler_importtime(execucao.stderr)
+                importacao.append(total_ms)
+            pesados = [modulo for modulo in HEAVY_MODULES if modulo in modulos]
+            resultados.append({"cenario": cenario, "repeticoes": repeticoes,
+                               "importacao_ms": statistics.median(importacao),
+                               "processo_ms": statistics.median(processo), "modulos_pesados": pesados})
+            print(f"{cenario:>20} | importação {resultados[-1]['importacao_ms']:8.1f} ms | "
+                  f"processo {resultados[-1]['processo_ms']:8.1f} ms | {', '.join(pesados) or '-'}")
+    return resultados
+
+
+def bench_fila(n_vagas):
+    """Custo da fila persistente: enfileirar, reenfileirar (idempotente) e retomar um lote já concluído."""
+    import fila as modulo_fila
+
+    vagas = list(_vagas_sinteticas(n_vagas))
+    with tempfile.TemporaryDirectory() as diretorio:
+        fila = modulo_fila.FilaDeTrabalhos(os.path.join(diretorio, "fila.db"))
+        inicio = time.perf_counter()
+        fila.enfileirar(vagas)
+        enfileirar_ms = (time.perf_counter() - inicio) * 1000
+        fila.fechar()
+
+        # Simula um lote concluído antes de uma interrupção, direto no banco para não medir o render.
+        with sqlite3.connect(os.path.join(diretorio, "fila.db")) as conexao:
+            conexao.execute("UPDATE trabalhos SET estado = ?", (modulo_fila.STATE_RENDERED,))
+        inicio = time.perf_counter()
+        fila = modulo_fila.FilaDeTrabalhos(os.path.join(diretorio, "fila.db"))
+        alteradas = fila.enfileirar(vagas)
+        with open(os.devnull, 'w') as nulo:
+            saida_padrao, sys.stdout = sys.stdout, nulo
+            try:
+                modulo_fila.processar_fila(fila, os.path.join(diretorio, "cvs"), client=object())
+            finally:
+                sys.stdout = saida_padrao
+        retomar_ms = (time.perf_counter() - inicio) * 1000
+        fila.fechar()
+    resultado = {"vagas": n_vagas, "enfileirar_ms": enfileirar_ms, "retomar_ms": retomar_ms,
+                 "reenfileiradas": alteradas}
+    print(f"{n_vagas} vagas | enfileirar {enfileirar_ms:8.1f} ms | retomar lote concluído {retomar_ms:8.1f} ms "
+          f"({alteradas} vagas refeitas)")
+    return [resultado]
+
+
+def bench_render(n_docs, usar_pool, cv_content=CV_FIXTURE):
+    """Renderiza `n_docs` CVs e retorna o tempo total e por documento (em ms).
+
+    Com o pool, o primeiro documento paga o carregamento inicial das fontes e ícones.
+    """
+    main.PDF.usar_pool = usar_pool
+    resources._pool = None
+    try:
+        with tempfile.TemporaryDirectory() as diretorio:
+            saida = os.path.join(diretorio, "cv.pdf")
+            inicio = time.perf_counter()
+            for _ in range(n_docs):
+                main.render_cv(cv_content, saida)
+            total = time.perf_counter() - inicio
+    finally:
+        main.PDF.usar_pool = True
+    return {
+        "docs": n_docs,
+        "pool": usar_pool,
+        "total_ms": total * 1000,
+        "por_documento_ms": total * 1000 / n_docs,
+    }
+
+
+def comparar_render(lista_docs):
+    """Compara a renderização antes (fontes lidas a cada PDF) e depois do pool de recursos."""
+    resultados = []
+    for n_docs in lista_docs:
+        antes = bench_render(n_docs, usar_pool=False)
+        depois = bench_render(n_docs, usar_pool=True)
+        resultados.extend([antes, depois])
+        print(f"{n_docs:>6} docs | sem pool: {antes['por_documento_ms']:8.2f} ms/doc | "
+              f"com pool: {depois['por_documento_ms']:8.2f} ms/doc | "
+              f"ganho: {antes['total_ms'] / depois['total_ms']:.1f}x")
+    return resultados
+
+
+def bench_escalonamento(n_docs, lista_workers, chunksize=render_pool.DEFAULT_CHUNKSIZE):
+    """Mede o throughput do pool de processos para cada número de workers.
+
+    A eficiência é o ganho sobre 1 worker dividido pelo número de workers (1.0 = linear).
+    """
+    resultados = []
+    base = None
+    with tempfile.TemporaryDirectory() as diretorio:
+        jobs = [(CV_FIXTURE, os.path.join(diretorio, f"cv_{i}.pdf")) for i in range(n_docs)]
+        for workers in lista_workers:
+            inicio = time.perf_counter()
+            falhas = sum(1 for r in render_pool.renderizar_em_lote(jobs, workers, chunksize, ordenado=False)
+                         if r["erro"])
+            total = time.perf_counter() - inicio
+            docs_por_segundo = n_docs / total
+            base = base or docs_por_segundo / workers
+            eficiencia = docs_por_segundo / (base * workers)
+            resultados.append({"docs": n_docs, "workers": workers, "falhas": falhas, "total_ms": total * 1000,
+                               "docs_por_segundo": docs_por_segundo, "eficiencia": eficiencia})
+            print(f"{workers:>3} workers | {docs_por_segundo:8.1f} docs/s | eficiência: {eficiencia:.2f}")
+    return resultados
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Benchmarks do gerador de CVs.")
+    subparsers = parser.add_subparsers(dest="comando", required=True)
+    parser_render = subparsers.add_parser("render", help="Tempo de renderização por documento, com e sem pool.")
+    parser_render.add_argument("--docs", type=int, nargs="+", default=[1, 1000])
+    parser_render.add_argument("--json", help="Salva os resultados neste arquivo JSON.")
+    parser_escala = subparsers.add_parser("escalonamento", help="Escalonamento do pool de renderização por processos.")
+    parser_escala.add_argument("--docs", type=int, default=400)
+    parser_escala.add_argument("--workers", type=int, nargs="+",
+                               default=sorted({1, 2, 4, os.cpu_count() or 1}))
+    parser_escala.add_argument("--chunksize", type=int, default=render_pool.DEFAULT_CHUNKSIZE)
+    parser_escala.add_argument("--json", help="Salva os resultados neste arquivo JSON.")
+    parser_etapas = subparsers.add_parser("etapas", help="Tempo de cada etapa do pipeline, com o Gemini simulado.")
+    parser_etapas.add_argument("--experiencias", type=int, nargs="+", default=[1, 10, 50])
+    parser_etapas.add_argument("--repeticoes", type=int, default=20)
+    parser_etapas.add_argument("--json", help="Salva os resultados neste arquivo JSON.")
+    parser_carga = subparsers.add_parser("carga", help="Teste de carga do serviço HTTP com o modelo simulado.")
+    parser_carga.add_argument("--requisicoes", type=int, default=200)
+    parser_carga.add_argument("--concorrencia", type=int, default=16)
+    parser_carga.add_argument("--latencia-ms", type=float, default=800,
+                              help="Latência simulada do modelo por chamada (padrão: 800 ms).")
+    parser_carga.add_argument("--workers", type=int, help="Threads de geração do serviço (padrão: a concorrência).")
+    parser_carga.add_argument("--url", help="Envia para um servidor em execução (ex.: http://127.0.0.1:8000).")
+    parser_carga.add_argument("--json", help="Salva os resultados neste arquivo JSON.")
+    parser_indice = subparsers.add_parser("indice", help="Inserção e busca no índice de similaridade de vagas.")
+    parser_indice.add_argument("--vagas", type=int, default=100000)
+    parser_indice.add_argument("--buscas", type=int, default=1000)
+    parser_indice.add_argument("--json", help="Salva os resultados neste arquivo JSON.")
+    parser_sanitizar = subparsers.add_parser("sanitizar", help="Sanitização de texto por célula e por documento.")
+    parser_sanitizar.add_argument("--experiencias", type=int, nargs="+", default=[1, 10, 50])
+    parser_sanitizar.add_argument("--repeticoes", type=int, default=200)
+    parser_sanitizar.add_argument("--json", help="Salva os resultados neste arquivo JSON.")
+    parser_ajuste = subparsers.add_parser("ajuste", help="Busca do ajuste de layout para caber em N páginas.")
+    parser_ajuste.add_argument("--experiencias", type=int, nargs="+", default=[1, 3, 5, 10])
+    parser_ajuste.add_argument("--paginas", type=int, default=1)
+    parser_ajuste.add_argument("--json", help="Salva os resultados neste arquivo JSON.")
+    parser_importacao = subparsers.add_parser("importacao", help="Tempo de importação de cada caminho do CLI.")
+    parser_importacao.add_argument("--repeticoes", type=int, default=5)
+    parser_importacao.add_argument("--json", help="Salva os resultados neste arquivo JSON.")
+    parser_fila = subparsers.add_parser("fila", help="Enfileirar e retomar um lote na fila persistente.")
+    parser_fila.add_argument("--vagas", type=int, default=10000)
+    parser_fila.add_argument("--json", help="Salva os resultados neste arquivo JSON.")
+    parser_comparar = subparsers.add_parser("comparar", help="Compara dois resultados de 'etapas' (base e atual).")
+    parser_comparar.add_argument("base")
+    parser_comparar.add_argument("atual")
+    parser_comparar.add_argument("--tolerancia", type=float, default=0.10,
+                                 help="Aumento relativo da mediana considerado regressão (padrão: 0.10).")
+    args = parser.parse_args()
+
+    if args.comando == "comparar":
+        regressoes = comparar(args.base, args.atual, args.tolerancia)
+        print(f"{len(regressoes)} regressões encontradas.")
+        raise SystemExit(1 if regressoes else 0)
+    if args.comando == "render":
+        resultados = comparar_render(args.docs)
+    elif args.comando == "escalonamento":
+        resultados = bench_escalonamento(args.docs, args.workers, args.chunksize)
+    elif args.comando == "etapas":
+        resultados = bench_etapas(args.experiencias, args.repeticoes)
+    elif args.comando == "indice":
+        resultados = bench_indice(args.vagas, args.buscas)
+    elif args.comando == "sanitizar":
+        resultados = bench_sanitizar(args.experiencias, args.repeticoes)
+    elif args.comando == "ajuste":
+        resultados = bench_ajuste(args.experiencias, args.paginas)
+    elif args.comando == "fila":
+        resultados = bench_fila(args.vagas)
+    elif args.comando == "importacao":
+        resultados = bench_importacao(args.repeticoes)
+    elif args.comando == "carga":
+        resultados = bench_carga(args.requisicoes, args.concorrencia, args.latencia_ms, args.workers, args.url)
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as arquivo:
+            json.dump(resultados, arquivo, indent=2)
+    if args.comando == "sanitizar":
+        lentos = regressoes_sanitizacao(resultados)
+        if lentos:
+            print(f"REGRESSÃO: sanitização do documento mais lenta que a legada com {lentos} experiências.")
+            raise SystemExit(1)
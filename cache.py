@@ -0,0 +1,174 @@
+import hashlib
+import os
+import threading
+import time
+
+# Constantes
+DEFAULT_CACHE_DIR = ".cv_cache"
+DEFAULT_MAX_ENTRIES = 5000
+DEFAULT_MAX_BYTES = 200 * 1024 * 1024
+DEFAULT_MAX_AGE_SECONDS = 30 * 24 * 3600
+CACHE_FILE_EXTENSION = ".json"
+# Fração dos limites liberada a cada evicção, para que um cache cheio não refaça a
+# varredura do diretório a cada `put`.
+EVICTION_FREE_FRACTION = 0.1
+
+
+def chave_cache(*partes):
+    """Calcula a chave (SHA-256) do cache a partir das partes que determinam a resposta."""
+    hash_ = hashlib.sha256()
+    for parte in partes:
+        dados = parte.encode('utf-8')
+        hash_.update(str(len(dados)).encode('ascii'))
+        hash_.update(b'\0')
+        hash_.update(dados)
+    return hash_.hexdigest()
+
+
+class CacheDeRespostas:
+    """Cache em disco, endereçado por conteúdo, das respostas JSON já validadas do Gemini.
+
+    Cada entrada fica em `<diretorio>/<2 primeiros hex>/<chave>.json`. Entradas mais antigas
+    que `max_age_seconds` são descartadas na leitura; quando o cache ultrapassa
+    `max_entries` ou `max_bytes`, as entradas menos usadas recentemente são removidas.
+
+    O número de entradas e o total de bytes são contados uma vez na criação e mantidos a
+    cada `put`; o diretório só é varrido quando algum limite é ultrapassado. Entradas
+    gravadas por outros processos entram na conta na próxima varredura.
+    """
+
+    def __init__(self, diretorio=DEFAULT_CACHE_DIR, max_entries=DEFAULT_MAX_ENTRIES,
+                 max_bytes=DEFAULT_MAX_BYTES, max_age_seconds=DEFAULT_MAX_AGE_SECONDS):
+        self.diretorio = diretorio
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.max_age_seconds = max_age_seconds
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._contar()
+
+    def _contar(self):
+        entradas = self._entradas()
+        self._total_entradas = len(entradas)
+        self._total_bytes = sum(tamanho for _, tamanho, _ in entradas)
+
+    def _caminho(self, chave):
+        return os.path.join(self.diretorio, chave[:2], chave + CACHE_FILE_EXTENSION)
+
+    def get(self, chave):
+        """Retorna o JSON armazenado para `chave` ou None se ausente/expirado."""
+        caminho = self._caminho(chave)
+        try:
+            stat = os.stat(caminho)
+            if self.max_age_seconds is not None and time.time() - stat.st_mtime > self.max_age_seconds:
+                os.remove(caminho)
+                self._descontar(stat.st_size)
+                self._registrar_consulta(False)
+                return None
+            with open(caminho, 'r', encoding='utf-8') as arquivo:
+                conteudo = arquivo.read()
+            # Atualiza o mtime para que a evicção trate a entrada como usada recentemente.
+            os.utime(caminho)
+        except OSError:
+            self._registrar_consulta(False)
+            return None
+        self._registrar_consulta(True)
+        return conteudo
+
+    def _registrar_consulta(self, acerto):
+        with self._lock:
+            if acerto:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def put(self, chave, conteudo):
+        """Armazena `conteudo` de forma atômica e aplica a política de evicção."""
+        caminho = self._caminho(chave)
+        os.makedirs(os.path.dirname(caminho), exist_ok=True)
+        temporario = f"{caminho}.{os.getpid()}.{time.monotonic_ns()}.tmp"
+        with open(temporario, 'w', encoding='utf-8') as arquivo:
+            arquivo.write(conteudo)
+        tamanho = os.path.getsize(temporario)
+        # O tamanho anterior e a troca ficam sob o lock: dois `put` simultâneos da mesma
+        # chave nova não podem ambos contar a entrada como nova.
+        with self._lock:
+            try:
+                anterior = os.path.getsize(caminho)
+            except OSError:
+                anterior = None
+            os.replace(temporario, caminho)
+            if anterior is None:
+                self._total_entradas += 1
+            self._total_bytes += tamanho - (anterior or 0)
+            excedido = self._total_entradas > self.max_entries or self._total_bytes > self.max_bytes
+        if excedido:
+            self.evict()
+
+    def _descontar(self, tamanho):
+        with self._lock:
+            self._total_entradas = max(self._total_entradas - 1, 0)
+            self._total_bytes = max(self._total_bytes - tamanho, 0)
+
+    def _entradas(self):
+        entradas = []
+        if not os.path.isdir(self.diretorio):
+            return entradas
+        for subdiretorio in os.scandir(self.diretorio):
+            if not subdiretorio.is_dir():
+                continue
+            for entrada in os.scandir(subdiretorio.path):
+                if entrada.name.endswith(CACHE_FILE_EXTENSION):
+                    try:
+                        stat = entrada.stat()
+                    except OSError:
+                        continue
+                    entradas.append((stat.st_mtime, stat.st_size, entrada.path))
+        return entradas
+
+    def evict(self):
+        """Remove entradas expiradas e, se necessário, as menos usadas até caber nos limites.
+
+        Ao ultrapassar um limite, libera também `EVICTION_FREE_FRACTION` dele, de modo que
+        as próximas gravações não disparem outra varredura.
+        """
+        entradas = self._entradas()
+        agora = time.time()
+        if self.max_age_seconds is not None:
+            validas = []
+            for mtime, tamanho, caminho in entradas:
+                if agora - mtime > self.max_age_seconds:
+                    self._remover(caminho)
+                else:
+                    validas.append((mtime, tamanho, caminho))
+            entradas = validas
+
+        entradas.sort(reverse=True)
+        total_bytes = sum(tamanho for _, tamanho, _ in entradas)
+        max_entries, max_bytes = self.max_entries, self.max_bytes
+        if len(entradas) > max_entries or total_bytes > max_bytes:
+            max_entries -= int(max_entries * EVICTION_FREE_FRACTION)
+            max_bytes -= int(max_bytes * EVICTION_FREE_FRACTION)
+        while entradas and (len(entradas) > max_entries or total_bytes > max_bytes):
+            _, tamanho, caminho = entradas.pop()
+            self._remover(caminho)
+            total_bytes -= tamanho
+        with self._lock:
+            self._total_entradas = len(entradas)
+            self._total_bytes = total_bytes
+
+    def clear(self):
+        """Remove todas as entradas do cache."""
+        for _, _, caminho in self._entradas():
+            self._remover(caminho)
+        with self._lock:
+            self._total_entradas = 0
+            self._total_bytes = 0
+
+    @staticmethod
+    def _remover(caminho):
+        try:
+            os.remove(caminho)
+        except OSError:
+            pass
@@ -0,0 +1,132 @@
+"""Linha de comando do gerador de CVs.
+
+Uso:
+    python cli.py generate vaga.txt --saida CV_Alterado.pdf
+    python cli.py generate - --variantes 3 --top 1 < vaga.txt
+    python cli.py render CV_Alterado.json --max-paginas 1
+    python cli.py batch vagas/ --saida cvs_gerados --concorrencia 8
+
+Na inicialização só o argparse é importado; cada subcomando importa o que usa. Assim,
+`render` não carrega o SDK do Gemini, o numpy nem o .env, e `--help` não carrega nada
+do gerador. Importante quando o CLI é chamado uma vez por vaga (ex.: por um worker de fila).
+Para medir: `python benchmarks.py importacao`.
+"""
+import argparse
+import sys
+
+
+def _opcoes_comuns():
+    parser = argparse.ArgumentParser(add_help=False)
+    parser.add_argument("--max-paginas", type=int, metavar="N",
+                        help="Reduz fontes, entrelinha e itens das experiências para o PDF caber em N páginas.")
+    parser.add_argument("--metricas-json", action="store_true",
+                        help="Emite uma linha JSON por etapa/contador no stderr.")
+    parser.add_argument("--metricas-prometheus", metavar="ARQUIVO",
+                        help="Ao final, grava as métricas neste arquivo no formato texto do Prometheus.")
+    return parser
+
+
+def construir_parser():
+    parser = argparse.ArgumentParser(description="Gerador de CVs adaptados para vagas.")
+    subparsers = parser.add_subparsers(dest="comando", required=True)
+    comuns = [_opcoes_comuns()]
+
+    parser_generate = subparsers.add_parser("generate", parents=comuns, help="Gera o CV adaptado para uma vaga.")
+    parser_generate.add_argument("vaga", nargs="?",
+                                 help="Arquivo com a descrição da vaga ('-' lê da entrada padrão; "
+                                      "sem argumento, usa a vaga de exemplo do main.py).")
+    parser_generate.add_argument("--saida", help="Caminho do PDF gerado (padrão: CV_Alterado.pdf).")
+    parser_generate.add_argument("--streaming", action="store_true",
+                                 help="Consome a resposta do Gemini em streaming, validando cada seção ao chegar.")
+    parser_generate.add_argument("--por-secao", action="store_true",
+                                 help="Gera cada seção em uma requisição própria, com cache por seção.")
+    parser_generate.add_argument("--max-tokens", type=int,
+                                 help="Orçamento de tokens do prompt; a vaga é truncada para caber "
+                                      "(padrão: CV_MAX_PROMPT_TOKENS ou 8000).")
+    parser_generate.add_argument("--indice", metavar="DIRETORIO",
+                                 help="Índice de vagas já processadas; vagas quase idênticas reaproveitam o CV.")
+    parser_generate.add_argument("--limiar", type=float,
+                                 help="Similaridade mínima (0 a 1) para reaproveitar o CV de outra vaga (padrão: 0.85).")
+    parser_generate.add_argument("--variantes", type=int, metavar="N",
+                                 help="Pede N variantes do CV em uma única chamada e renderiza só as melhores.")
+    parser_generate.add_argument("--top", type=int, default=1, metavar="K",
+                                 help="Com --variantes, quantas das variantes mais aderentes à vaga renderizar.")
+    parser_generate.add_argument("--verbose", action="store_true",
+                                 help="Exibe os tokens de entrada e saída de cada chamada ao Gemini.")
+
+    parser_render = subparsers.add_parser("render", parents=comuns,
+                                          help="Renderiza o PDF de um CV adaptado salvo em JSON, sem chamar o Gemini.")
+    parser_render.add_argument("cv_json", help="CV adaptado salvo em JSON.")
+    parser_render.add_argument("--saida", help="Caminho do PDF gerado (padrão: o do JSON com extensão .pdf).")
+
+    # As opções do lote são as do batch.py, repassadas sem alteração (ver `cli.py batch --help`).
+    subparsers.add_parser("batch", add_help=False, help="Gera CVs em lote a partir de várias vagas.")
+    return parser
+
+
+def _ativar_metricas(args):
+    from metrics import ativar_log_json, metricas
+
+    if args.metricas_json:
+        ativar_log_json()
+    if args.metricas_prometheus:
+        import atexit
+        atexit.register(metricas.salvar_prometheus, args.metricas_prometheus)
+
+
+def _ler_vaga(origem):
+    if origem == "-":
+        return sys.stdin.read()
+    import main
+
+    return main.VAGA_EXEMPLO if origem is None else main.ler_arquivo(origem)
+
+
+def comando_generate(args):
+    import main
+
+    job_description = _ler_vaga(args.vaga)
+    if not job_description:
+        return 1
+    if args.verbose:
+        from prompt import uso_tokens
+        uso_tokens.exibir = True
+    saida = args.saida or main.OUTPUT_CV_FILENAME
+    max_tokens = args.max_tokens or main.orcamento_de_tokens()
+    if args.variantes:
+        resultado = main.generate_cv_variantes(job_description, args.variantes, args.top, saida,
+                                               max_tokens=max_tokens, max_paginas=args.max_paginas)
+    else:
+        indice = None
+        if args.indice:
+            from similaridade import IndiceDeVagas
+            indice = IndiceDeVagas(args.indice)
+        resultado = main.generate_cv(job_description, saida, streaming=args.streaming, max_tokens=max_tokens,
+                                     por_secao=args.por_secao, indice=indice, limiar_similaridade=args.limiar,
+                                     max_paginas=args.max_paginas)
+    return 0 if resultado else 1
+
+
+def comando_render(args):
+    from main import render_cv_de_json
+
+    return 0 if render_cv_de_json(args.cv_json, args.saida, args.max_paginas) else 1
+
+
+def main(argv=None):
+    """Executa o subcomando e retorna o código de saída (0 em caso de sucesso)."""
+    parser = construir_parser()
+    args, restantes = parser.parse_known_args(argv)
+    if args.comando == "batch":
+        import batch
+        return batch.main(restantes)
+    if restantes:
+        parser.error(f"argumentos não reconhecidos: {' '.join(restantes)}")
+    _ativar_metricas(args)
+    if args.comando == "render":
+        return comando_render(args)
+    return comando_generate(args)
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,270 @@
+"""Fila persistente (SQLite) de vagas para gerar CVs em lote, com retomada após falhas.
+
+Uso:
+    python batch.py vagas/ --fila fila_vagas.db    # enfileira as vagas novas e processa a fila
+    python batch.py --fila fila_vagas.db           # só retoma o que ficou pendente
+
+Cada vaga passa pelos estados pending -> llm_done -> rendered (ou failed). O CV adaptado
+pelo Gemini fica gravado na fila ao fim da primeira etapa, então uma execução interrompida
+retoma cada vaga da etapa em que parou: vagas já renderizadas são puladas e as que já têm o
+JSON só são renderizadas. Cada arquivo de fila deve ser consumido por um processo por vez.
+"""
+import json
+import os
+import random
+import sqlite3
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from contextlib import contextmanager
+
+from batch import DEFAULT_CONCURRENCY, DEFAULT_OUTPUT_DIR, LimitadorDeTaxa, _nome_arquivo_seguro
+from main import adaptar_cv, obter_cliente, render_cv, salvar_cv_json
+from metrics import metricas
+
+# Constantes
+DEFAULT_QUEUE_FILE = "fila_vagas.db"
+DEFAULT_MAX_ATTEMPTS = 3
+DEFAULT_RETRY_BASE = 5.0
+DEFAULT_RETRY_MAX = 300.0
+STATE_PENDING = "pending"
+STATE_LLM_DONE = "llm_done"
+STATE_RENDERED = "rendered"
+STATE_FAILED = "failed"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS trabalhos (
+    id TEXT PRIMARY KEY,
+    job_description TEXT NOT NULL,
+    estado TEXT NOT NULL DEFAULT 'pending',
+    tentativas INTEGER NOT NULL DEFAULT 0,
+    proxima_tentativa REAL NOT NULL DEFAULT 0,
+    cv_json TEXT,
+    saida TEXT,
+    erro TEXT,
+    atualizado_em REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS trabalhos_por_estado ON trabalhos (estado, proxima_tentativa);
+"""
+
+
+class FilaDeTrabalhos:
+    """Fila de vagas em um arquivo SQLite, segura para uso entre as threads de um processo.
+
+    Cada operação é uma transação própria (modo WAL), então o estado gravado sobrevive a
+    uma interrupção a qualquer momento. Uma falha devolve a vaga à etapa em que estava,
+    com a próxima tentativa adiada por backoff exponencial, até `max_tentativas` por etapa.
+    """
+
+    def __init__(self, caminho=DEFAULT_QUEUE_FILE):
+        self.caminho = caminho
+        self._lock = threading.Lock()
+        self._conexao = sqlite3.connect(caminho, isolation_level=None, check_same_thread=False)
+        self._conexao.execute("PRAGMA journal_mode=WAL")
+        self._conexao.execute("PRAGMA synchronous=NORMAL")
+        self._conexao.executescript(_SCHEMA)
+
+    def fechar(self):
+        with self._lock:
+            self._conexao.close()
+
+    @contextmanager
+    def _transacao(self):
+        with self._lock:
+            self._conexao.execute("BEGIN IMMEDIATE")
+            try:
+                yield self._conexao
+            except BaseException:
+                self._conexao.execute("ROLLBACK")
+                raise
+            self._conexao.execute("COMMIT")
+
+    def enfileirar(self, vagas):
+        """Adiciona vagas (id, descrição); retorna quantas entraram ou voltaram para o início.
+
+        Enfileirar de novo uma vaga com o mesmo id e a mesma descrição não muda nada, então
+        a mesma origem pode ser reenviada a cada execução. Se a descrição mudou, a vaga
+        recomeça do estado pending.
+        """
+        agora = time.time()
+        with self._transacao() as conexao:
+            antes = conexao.total_changes
+            conexao.executemany(
+                "INSERT INTO trabalhos (id, job_description, atualizado_em) VALUES (?, ?, ?) "
+                "ON CONFLICT (id) DO UPDATE SET job_description = excluded.job_description, estado = 'pending', "
+                "tentativas = 0, proxima_tentativa = 0, cv_json = NULL, saida = NULL, erro = NULL, "
+                "atualizado_em = excluded.atualizado_em "
+                "WHERE trabalhos.job_description != excluded.job_description",
+                ((str(id_vaga), descricao, agora) for id_vaga, descricao in vagas))
+            return conexao.total_changes - antes
+
+    def proximos(self, limite, excluir=()):
+        """Até `limite` vagas prontas para a próxima etapa (as já com JSON primeiro), fora de `excluir`."""
+        excluir = list(excluir)
+        marcadores = ", ".join("?" * len(excluir))
+        with self._lock:
+            linhas = self._conexao.execute(
+                "SELECT id, job_description, estado, tentativas, cv_json FROM trabalhos "
+                f"WHERE estado IN (?, ?) AND proxima_tentativa <= ? AND id NOT IN ({marcadores}) "
+                "ORDER BY estado = ? DESC, rowid LIMIT ?",
+                (STATE_PENDING, STATE_LLM_DONE, time.time(), *excluir, STATE_LLM_DONE, limite)).fetchall()
+        chaves = ("id", "job_description", "estado", "tentativas", "cv_json")
+        return [dict(zip(chaves, linha)) for linha in linhas]
+
+    def proxima_espera(self, excluir=()):
+        """Segundos até a próxima vaga fora de `excluir` ficar pronta (0 se já há uma) ou None."""
+        excluir = list(excluir)
+        marcadores = ", ".join("?" * len(excluir))
+        with self._lock:
+            proxima, = self._conexao.execute(
+                f"SELECT MIN(proxima_tentativa) FROM trabalhos WHERE estado IN (?, ?) AND id NOT IN ({marcadores})",
+                (STATE_PENDING, STATE_LLM_DONE, *excluir)).fetchone()
+        return None if proxima is None else max(0.0, proxima - time.time())
+
+    def concluir_llm(self, id_vaga, cv_content):
+        """Grava o CV adaptado e passa a vaga para llm_done (a etapa do Gemini não se repete mais)."""
+        self._atualizar(id_vaga, estado=STATE_LLM_DONE, cv_json=json.dumps(cv_content, ensure_ascii=False),
+                        tentativas=0, proxima_tentativa=0, erro=None)
+
+    def concluir_render(self, id_vaga, saida):
+        self._atualizar(id_vaga, estado=STATE_RENDERED, saida=saida, tentativas=0, erro=None)
+
+    def registrar_falha(self, id_vaga, erro, max_tentativas=DEFAULT_MAX_ATTEMPTS, backoff_base=DEFAULT_RETRY_BASE,
+                        backoff_max=DEFAULT_RETRY_MAX):
+        """Conta uma tentativa falha da etapa atual; retorna o novo estado (o mesmo ou failed).
+
+        Enquanto houver tentativas, a vaga continua na etapa em que estava e só volta a ser
+        entregue após min(`backoff_max`, `backoff_base` * 2^(tentativas - 1)) segundos, com jitter.
+        """
+        with self._transacao() as conexao:
+            estado, tentativas = conexao.execute("SELECT estado, tentativas FROM trabalhos WHERE id = ?",
+                                                 (id_vaga,)).fetchone()
+            tentativas += 1
+            espera = min(backoff_max, backoff_base * 2 ** (tentativas - 1))
+            espera += random.uniform(0, espera / 2)
+            if tentativas >= max_tentativas:
+                estado = STATE_FAILED
+            conexao.execute("UPDATE trabalhos SET estado = ?, tentativas = ?, proxima_tentativa = ?, erro = ?, "
+                            "atualizado_em = ? WHERE id = ?",
+                            (estado, tentativas, time.time() + espera, erro, time.time(), id_vaga))
+        return estado
+
+    def reabrir_falhas(self):
+        """Devolve as vagas em failed à etapa em que falharam, com as tentativas zeradas; retorna quantas."""
+        with self._transacao() as conexao:
+            return conexao.execute(
+                "UPDATE trabalhos SET estado = CASE WHEN cv_json IS NULL THEN ? ELSE ? END, tentativas = 0, "
+                "proxima_tentativa = 0, atualizado_em = ? WHERE estado = ?",
+                (STATE_PENDING, STATE_LLM_DONE, time.time(), STATE_FAILED)).rowcount
+
+    def contagem(self):
+        """Número de vagas em cada estado."""
+        with self._lock:
+            linhas = self._conexao.execute("SELECT estado, COUNT(*) FROM trabalhos GROUP BY estado").fetchall()
+        return {STATE_PENDING: 0, STATE_LLM_DONE: 0, STATE_RENDERED: 0, STATE_FAILED: 0, **dict(linhas)}
+
+    def trabalho(self, id_vaga):
+        """Estado, tentativas, saída e último erro de uma vaga (ou None se ela não está na fila)."""
+        with self._lock:
+            linha = self._conexao.execute("SELECT estado, tentativas, saida, erro FROM trabalhos WHERE id = ?",
+                                          (id_vaga,)).fetchone()
+        return None if linha is None else dict(zip(("estado", "tentativas", "saida", "erro"), linha))
+
+    def _atualizar(self, id_vaga, **campos):
+        atribuicoes = ", ".join(f"{campo} = ?" for campo in campos)
+        with self._transacao() as conexao:
+            conexao.execute(f"UPDATE trabalhos SET {atribuicoes}, atualizado_em = ? WHERE id = ?",
+                            (*campos.values(), time.time(), id_vaga))
+
+
+def _renderizar(cv_content, saida, max_paginas):
+    """Renderiza em um arquivo temporário e o move para `saida`: um PDF pela metade nunca fica no lugar."""
+    salvar_cv_json(cv_content, os.path.splitext(saida)[0] + ".json")
+    temporario = saida + ".tmp"
+    render_cv(cv_content, temporario, max_paginas)
+    os.replace(temporario, saida)
+
+
+def processar_fila(fila, output_dir=DEFAULT_OUTPUT_DIR, concurrency=DEFAULT_CONCURRENCY, client=None,
+                   limitador=None, cache=None, ignorar_cache=False, streaming=False, por_secao=False, indice=None,
+                   limiar_similaridade=None, max_paginas=None, max_tentativas=DEFAULT_MAX_ATTEMPTS,
+                   backoff_base=DEFAULT_RETRY_BASE, sleep=time.sleep):
+    """Consome a fila até não restar vaga em pending ou llm_done, com `concurrency` threads.
+
+    Vagas em pending passam pelo Gemini (`main.adaptar_cv`, com cache, índice e modos de
+    `generate_cv`) e têm o JSON gravado na fila; vagas em llm_done só são renderizadas em
+    "<output_dir>/<id>.pdf". Erros de uma etapa (exceções da API, resposta inválida, falha no
+    render) ficam registrados na vaga e são repetidos com backoff (ver `FilaDeTrabalhos.registrar_falha`).
+    Retorna um dicionário com as vagas renderizadas e as que falharam nesta execução, a duração
+    e a contagem final por estado.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    concurrency = max(1, concurrency)
+    limitador = limitador or LimitadorDeTaxa()
+    lock_cliente = threading.Lock()
+    cliente_protegido = None
+
+    def cliente():
+        # Só cria o cliente (e importa o SDK) se alguma vaga ainda precisar do Gemini.
+        nonlocal cliente_protegido
+        with lock_cliente:
+            if cliente_protegido is None:
+                cliente_protegido = limitador.envolver(client or obter_cliente())
+            return cliente_protegido
+
+    gerados, falhas = {}, []
+
+    def executar(trabalho):
+        with metricas.contexto(trabalho=trabalho["id"]):
+            _executar(trabalho)
+
+    def _executar(trabalho):
+        id_vaga = trabalho["id"]
+        etapa = "llm" if trabalho["estado"] == STATE_PENDING else "render"
+        try:
+            if etapa == "llm":
+                cv_content = adaptar_cv(trabalho["job_description"], cliente(), cache, ignorar_cache, streaming,
+                                        por_secao=por_secao, indice=indice, limiar_similaridade=limiar_similaridade)
+                if cv_content is None:
+                    raise ValueError("o Gemini não retornou um CV válido")
+                fila.concluir_llm(id_vaga, cv_content)
+                etapa = "render"
+            else:
+                cv_content = json.loads(trabalho["cv_json"])
+            saida = os.path.join(output_dir, f"{_nome_arquivo_seguro(id_vaga)}.pdf")
+            _renderizar(cv_content, saida, max_paginas)
+            fila.concluir_render(id_vaga, saida)
+            metricas.incrementar("fila_trabalhos_total", resultado=STATE_RENDERED)
+            gerados[id_vaga] = saida
+        except Exception as e:
+            estado = fila.registrar_falha(id_vaga, f"{type(e).__name__}: {e}", max_tentativas, backoff_base)
+            metricas.incrementar("fila_trabalhos_total", resultado=STATE_FAILED if estado == STATE_FAILED else "retry")
+            if estado == STATE_FAILED:
+                falhas.append(id_vaga)
+            print(f"Erro na etapa '{etapa}' da vaga '{id_vaga}' ({type(e).__name__}): {e}"
+                  + (" Sem novas tentativas." if estado == STATE_FAILED else " Será repetida."))
+
+    inicio = time.perf_counter()
+    em_andamento = {}
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        while True:
+            livres = concurrency - len(em_andamento)
+            if livres:
+                for trabalho in fila.proximos(livres, excluir=em_andamento.values()):
+                    em_andamento[executor.submit(executar, trabalho)] = trabalho["id"]
+            # Quanto falta para a próxima vaga em backoff; com todas as threads ocupadas, só a conclusão importa.
+            espera = fila.proxima_espera(em_andamento.values()) if len(em_andamento) < concurrency else None
+            if not em_andamento:
+                if espera is None:
+                    break
+                sleep(espera)
+                continue
+            concluidos, _ = wait(em_andamento, timeout=espera, return_when=FIRST_COMPLETED)
+            for futuro in concluidos:
+                del em_andamento[futuro]
+    duracao = time.perf_counter() - inicio
+
+    contagem = fila.contagem()
+    print(f"Fila processada: {len(gerados)} CVs gerados e {len(falhas)} falhas nesta execução, "
+          f"em {duracao:.1f} s. Na fila: " + ", ".join(f"{estado}={total}" for estado, total in contagem.items()))
+    return {"gerados": gerados, "falhas": falhas, "duracao_segundos": duracao, "contagem": contagem}
@@ -0,0 +1,101 @@
+import os
+import threading
+
+import httpx
+from google import genai
+from google.genai import types
+
+from metrics import metricas
+
+# Constantes
+DEFAULT_TIMEOUT_MS = int(os.environ.get("CV_GEMINI_TIMEOUT_MS", 120_000))
+DEFAULT_MAX_CONNECTIONS = int(os.environ.get("CV_GEMINI_MAX_CONNECTIONS", 32))
+DEFAULT_KEEPALIVE_SECONDS = 120.0
+BASE_URL = os.environ.get("CV_GEMINI_BASE_URL")  # Ex.: um endpoint local falso em testes.
+
+_cliente = None
+_transporte = None
+_lock = threading.Lock()
+
+
+class TransporteContador(httpx.HTTPTransport):
+    """Transporte httpx com pool de conexões keep-alive que conta requisições e conexões abertas.
+
+    As conexões novas são detectadas pelos eventos de trace do httpcore, então a taxa de
+    reuso reflete o que realmente aconteceu no pool (1.0 = nenhuma conexão nova).
+    """
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self._lock = threading.Lock()
+        self.requisicoes = 0
+        self.conexoes = 0
+
+    def handle_request(self, request):
+        trace_original = request.extensions.get("trace")
+
+        def trace(evento, info):
+            if evento == "connection.connect_tcp.complete":
+                with self._lock:
+                    self.conexoes += 1
+                metricas.incrementar("llm_conexoes_total")
+            if trace_original is not None:
+                trace_original(evento, info)
+
+        request.extensions["trace"] = trace
+        with self._lock:
+            self.requisicoes += 1
+        metricas.incrementar("llm_requisicoes_http_total")
+        return super().handle_request(request)
+
+    def estatisticas(self):
+        """Requisições, conexões abertas e taxa de reuso de conexões."""
+        with self._lock:
+            requisicoes, conexoes = self.requisicoes, self.conexoes
+        reuso = 1 - conexoes / requisicoes if requisicoes else 0.0
+        return {"requisicoes": requisicoes, "conexoes": conexoes, "taxa_reuso": max(0.0, reuso)}
+
+
+def criar_cliente(api_key=None, base_url=BASE_URL, timeout_ms=DEFAULT_TIMEOUT_MS,
+                  max_conexoes=DEFAULT_MAX_CONNECTIONS, keepalive_segundos=DEFAULT_KEEPALIVE_SECONDS):
+    """Cria um `genai.Client` com timeout e pool de conexões configurados.
+
+    Retorna (client, transporte); o transporte expõe as estatísticas de reuso.
+    """
+    transporte = TransporteContador(
+        limits=httpx.Limits(max_connections=max_conexoes, max_keepalive_connections=max_conexoes,
+                            keepalive_expiry=keepalive_segundos),
+    )
+    opcoes = types.HttpOptions(timeout=timeout_ms, base_url=base_url, client_args={"transport": transporte})
+    client = genai.Client(api_key=api_key or os.environ.get("GOOGLE_API_KEY"), http_options=opcoes)
+    return client, transporte
+
+
+def obter_cliente():
+    """Cliente do Gemini compartilhado pelo processo, criado na primeira chamada.
+
+    O SDK é seguro para uso entre threads; todas compartilham o mesmo pool de conexões.
+    """
+    global _cliente, _transporte
+    with _lock:
+        if _cliente is None:
+            _cliente, _transporte = criar_cliente()
+        return _cliente
+
+
+def estatisticas_conexoes():
+    """Estatísticas de reuso de conexões do cliente compartilhado (vazias se ainda não criado)."""
+    with _lock:
+        transporte = _transporte
+    if transporte is None:
+        return {"requisicoes": 0, "conexoes": 0, "taxa_reuso": 0.0}
+    return transporte.estatisticas()
+
+
+def fechar_cliente():
+    """Fecha as conexões do cliente compartilhado; o próximo `obter_cliente` cria outro."""
+    global _cliente, _transporte
+    with _lock:
+        transporte, _cliente, _transporte = _transporte, None, None
+    if transporte is not None:
+        transporte.close()
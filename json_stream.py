@@ -0,0 +1,163 @@
+import json
+
+from schema import carregar_schema, validadores_do_schema
+
+_ESPACOS = " \t\r\n"
+
+
+class ErroJSONIncremental(ValueError):
+    """JSON malformado ou seção inválida detectada durante o streaming da resposta."""
+
+    def __init__(self, mensagem, secao=None):
+        super().__init__(mensagem)
+        self.secao = secao
+
+
+class ParserJSONIncremental:
+    """Consome a resposta do modelo em pedaços e monta o objeto JSON raiz incrementalmente.
+
+    Cada seção de primeiro nível (personal_information, skills, ...) é decodificada e
+    validada (por padrão, contra o schema do Dicionario) assim que termina de chegar,
+    levantando `ErroJSONIncremental` na hora em que algo inválido aparece, sem esperar
+    o restante da resposta. Texto antes do
+    primeiro '{' (ex.: ```json) e depois do '}' final é ignorado.
+
+    Só o token em leitura (a chave ou o valor da seção atual) é guardado, em uma lista de
+    trechos; o texto já consumido é descartado, mantendo o custo linear em respostas longas.
+    """
+
+    # Estados no primeiro nível do objeto raiz.
+    _CHAVE, _DOIS_PONTOS, _VALOR, _LENDO_VALOR, _APOS_VALOR = range(5)
+
+    def __init__(self, validadores=None):
+        if validadores is None:
+            validadores = validadores_do_schema(carregar_schema())
+        self.validadores = validadores
+        self.resultado = {}
+        self.secoes_concluidas = []
+        self.concluido = False
+        self._consumidos = 0
+        self._trechos = []
+        self._iniciado = False
+        self._estado = self._CHAVE
+        self._profundidade = 0
+        self._em_string = False
+        self._escape = False
+        self._inicio_token = None
+        self._tipo_valor = None
+        self._chave = None
+
+    def feed(self, pedaco):
+        """Processa mais um pedaço do texto; retorna as seções concluídas neste pedaço."""
+        if self.concluido or not pedaco:
+            return []
+        novas = []
+        for pos, char in enumerate(pedaco):
+            if not self._iniciado:
+                if char == '{':
+                    self._iniciado = True
+                    self._profundidade = 1
+                continue
+
+            if self._em_string:
+                if self._escape:
+                    self._escape = False
+                elif char == '\\':
+                    self._escape = True
+                elif char == '"':
+                    self._em_string = False
+                    if self._estado == self._CHAVE:
+                        self._chave = json.loads(self._token(pedaco, pos + 1))
+                        self._trechos = []
+                        self._estado = self._DOIS_PONTOS
+                    elif self._profundidade == 1 and self._tipo_valor == '"':
+                        novas.append(self._concluir_secao(self._token(pedaco, pos + 1)))
+                continue
+
+            if self._estado == self._LENDO_VALOR:
+                if char == '"':
+                    self._em_string = True
+                elif char in '{[':
+                    self._profundidade += 1
+                elif char in '}]':
+                    self._profundidade -= 1
+                    if self._profundidade == 1:
+                        novas.append(self._concluir_secao(self._token(pedaco, pos + 1)))
+                    elif self._profundidade == 0:
+                        # Fim do objeto raiz logo após um valor escalar.
+                        novas.append(self._concluir_secao(self._token(pedaco, pos)))
+                        self.concluido = True
+                        break
+                elif char == ',' and self._profundidade == 1:
+                    novas.append(self._concluir_secao(self._token(pedaco, pos)))
+                    self._estado = self._CHAVE
+                continue
+
+            if char in _ESPACOS:
+                continue
+            if self._estado == self._CHAVE and char == '"':
+                self._em_string = True
+                self._inicio_token = pos
+            elif self._estado in (self._CHAVE, self._APOS_VALOR) and char == '}':
+                self.concluido = True
+                break
+            elif self._estado == self._DOIS_PONTOS and char == ':':
+                self._estado = self._VALOR
+            elif self._estado == self._APOS_VALOR and char == ',':
+                self._estado = self._CHAVE
+            elif self._estado == self._VALOR:
+                self._estado = self._LENDO_VALOR
+                self._inicio_token = pos
+                self._tipo_valor = char
+                if char == '"':
+                    self._em_string = True
+                elif char in '{[':
+                    self._profundidade += 1
+            else:
+                raise ErroJSONIncremental(f"Caractere inesperado {char!r} na posição {self._consumidos + pos}.",
+                                          self._chave)
+        if self._estado == self._LENDO_VALOR or (self._estado == self._CHAVE and self._em_string):
+            # O token continua no próximo pedaço: guarda só o trecho dele.
+            self._trechos.append(pedaco[self._inicio_token:])
+            self._inicio_token = 0
+        self._consumidos += len(pedaco)
+        return novas
+
+    def _token(self, pedaco, fim):
+        """Texto do token em leitura, dos trechos já guardados até `fim` no pedaço atual."""
+        return "".join(self._trechos) + pedaco[self._inicio_token:fim]
+
+    def _concluir_secao(self, texto):
+        secao = self._chave
+        texto = texto.strip()
+        self._trechos = []
+        self._estado = self._APOS_VALOR
+        try:
+            valor = json.loads(texto)
+        except json.JSONDecodeError as e:
+            raise ErroJSONIncremental(f"Seção '{secao}' com JSON inválido: {e}", secao) from e
+        validador = self.validadores.get(secao)
+        problema = validador(valor) if validador else None
+        if problema:
+            raise ErroJSONIncremental(f"Seção '{secao}' inválida: {problema}.", secao)
+        self.resultado[secao] = valor
+        self.secoes_concluidas.append(secao)
+        return secao
+
+    def close(self):
+        """Finaliza o parse e retorna o dicionário completo."""
+        if not self._iniciado:
+            raise ErroJSONIncremental("A resposta não contém um objeto JSON.")
+        if not self.concluido:
+            raise ErroJSONIncremental("A resposta terminou antes do fim do objeto JSON.", self._chave)
+        return self.resultado
+
+
+def parse_stream(pedacos, validadores=None):
+    """Consome um iterável de pedaços de texto e retorna o dicionário validado."""
+    parser = ParserJSONIncremental(validadores)
+    for pedaco in pedacos:
+        parser.feed(pedaco)
+        if parser.concluido:
+            break
+    return parser.close()
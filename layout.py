@@ -0,0 +1,282 @@
+"""Motor de layout do CV: mede todo o texto, planeja as páginas e só então desenha.
+
+O plano é calculado antes de qualquer chamada de desenho: `MedidorDeTexto` quebra os
+textos em linhas com as tabelas de larguras das fontes (já carregadas pelo pool de
+recursos), cada `Coluna` distribui seus blocos pelas páginas e o `PlanoDeLayout`
+resultante é emitido de uma vez, uma célula de uma linha por vez, sem `multi_cell`.
+Como planejar não desenha nada, `buscar_ajuste` pode testar vários `AjusteDeLayout`
+(fonte, entrelinha, itens por experiência) até o CV caber no número de páginas desejado.
+"""
+import time
+
+# Constantes
+# Limite de palavras com largura em cache por fonte (o cache é zerado ao atingi-lo).
+MAX_CACHED_WORDS = 50_000
+# Limites da busca do ajuste de páginas: menores escalas aceitas e precisão da busca.
+MIN_LINE_SCALE = 0.7
+MIN_FONT_SCALE = 0.8
+SCALE_TOLERANCE = 0.01
+
+
+class MedidorDeTexto:
+    """Mede e quebra textos em linhas usando as larguras dos glifos de cada fonte.
+
+    `tabelas` mapeia a chave da fonte no fpdf2 (ex.: "opensansB") para a tabela de
+    larguras dos glifos (em milésimos de em, como `TTFFont.cw`). A largura de cada palavra
+    é calculada uma vez por fonte e reaproveitada em qualquer tamanho e documento.
+    """
+
+    def __init__(self, tabelas):
+        self.tabelas = tabelas
+        self._palavras = {fontkey: {} for fontkey in tabelas}
+
+    @staticmethod
+    def chave(fonte):
+        family, style, _ = fonte
+        return family.lower() + "".join(sorted(style.upper()))
+
+    def _unidades(self, fontkey, palavra):
+        cache = self._palavras[fontkey]
+        unidades = cache.get(palavra)
+        if unidades is None:
+            if len(cache) >= MAX_CACHED_WORDS:
+                cache.clear()
+            larguras = self.tabelas[fontkey]
+            unidades = cache[palavra] = sum(larguras[ord(c)] for c in palavra)
+        return unidades
+
+    def largura(self, texto, fonte, k):
+        """Largura de `texto` na unidade do documento (`k` pontos por unidade)."""
+        fontkey = self.chave(fonte)
+        unidades = sum(self._unidades(fontkey, palavra) for palavra in texto.split(" "))
+        unidades += texto.count(" ") * self._unidades(fontkey, " ")
+        return unidades * fonte[2] * 0.001 / k
+
+    def quebrar(self, texto, fonte, largura_maxima, k):
+        """Quebra `texto` em linhas de até `largura_maxima`, nos espaços (ou no meio de palavras longas).
+
+        As quebras de linha do próprio texto são respeitadas; uma linha vazia gera uma linha vazia.
+        """
+        fontkey = self.chave(fonte)
+        # Largura máxima convertida para milésimos de em nesta fonte e tamanho.
+        limite = largura_maxima * k * 1000 / fonte[2]
+        espaco = self._unidades(fontkey, " ")
+        linhas = []
+        for paragrafo in texto.split("\n"):
+            atual, largura_atual = [], 0
+            for palavra in paragrafo.split(" "):
+                largura_palavra = self._unidades(fontkey, palavra)
+                if atual and largura_atual + espaco + largura_palavra <= limite:
+                    atual.append(palavra)
+                    largura_atual += espaco + largura_palavra
+                    continue
+                if atual:
+                    linhas.append(" ".join(atual))
+                if largura_palavra > limite:
+                    pedacos = self._partir_palavra(fontkey, palavra, limite)
+                    linhas.extend(pedacos[:-1])
+                    palavra = pedacos[-1]
+                    largura_palavra = self._unidades(fontkey, palavra)
+                atual, largura_atual = [palavra], largura_palavra
+            linhas.append(" ".join(atual))
+        return linhas
+
+    def _partir_palavra(self, fontkey, palavra, limite):
+        larguras = self.tabelas[fontkey]
+        pedacos, inicio, acumulado = [], 0, 0
+        for indice, caractere in enumerate(palavra):
+            largura = larguras[ord(caractere)]
+            if acumulado + largura > limite and indice > inicio:
+                pedacos.append(palavra[inicio:indice])
+                inicio, acumulado = indice, 0
+            acumulado += largura
+        pedacos.append(palavra[inicio:])
+        return pedacos
+
+
+class PlanoDeLayout:
+    """Células posicionadas, agrupadas por página, prontas para serem desenhadas de uma vez.
+
+    Cada célula é uma tupla (x, y, largura, altura, fonte, texto, borda).
+    """
+
+    def __init__(self):
+        self.paginas = [[]]
+
+    def celula(self, pagina, x, y, largura, altura, fonte, texto, borda=0):
+        while len(self.paginas) <= pagina:
+            self.paginas.append([])
+        self.paginas[pagina].append((x, y, largura, altura, fonte, texto, borda))
+
+    def emitir(self, pdf):
+        """Desenha o plano: a primeira página é a página atual do `pdf`; as demais são criadas aqui.
+
+        A quebra automática de página fica desligada durante a emissão, pois as posições
+        já respeitam a margem inferior.
+        """
+        quebra_automatica, margem = pdf.auto_page_break, pdf.b_margin
+        pdf.set_auto_page_break(False, margem)
+        try:
+            fonte_atual = None
+            for numero, celulas in enumerate(self.paginas):
+                if numero:
+                    pdf.add_page()
+                    fonte_atual = None
+                for x, y, largura, altura, fonte, texto, borda in celulas:
+                    if fonte != fonte_atual:
+                        pdf.set_font(*fonte)
+                        fonte_atual = fonte
+                    pdf.set_xy(x, y)
+                    pdf.cell(largura, altura, texto, border=borda)
+        finally:
+            pdf.set_auto_page_break(quebra_automatica, margem)
+
+
+class Coluna:
+    """Fluxo vertical de uma coluna do plano, que continua no topo da página seguinte quando enche.
+
+    `topo` é onde a coluna começa na primeira página (`pagina`) e `topo_continuacao`
+    onde ela recomeça nas seguintes (abaixo do cabeçalho). `base` é o limite inferior.
+    """
+
+    def __init__(self, plano, medidor, k, x, largura, topo, base, topo_continuacao=None, pagina=0,
+                 margem_celula=0):
+        self.plano = plano
+        self.medidor = medidor
+        self.k = k
+        self.x = x
+        self.largura = largura
+        self.y = topo
+        self.base = base
+        self.topo_continuacao = topo if topo_continuacao is None else topo_continuacao
+        self.pagina = pagina
+        self.margem_celula = margem_celula
+
+    def garantir(self, altura):
+        """Passa para a próxima página se `altura` não couber no restante desta."""
+        if self.y + altura > self.base and self.y > self.topo_continuacao:
+            self.pagina += 1
+            self.y = self.topo_continuacao
+
+    def espaco(self, altura):
+        self.y += altura
+
+    def linhas(self, texto, fonte, largura=None):
+        """Linhas em que `texto` será quebrado nesta coluna (ou em `largura`)."""
+        largura = self.largura if largura is None else largura
+        return self.medidor.quebrar(texto, fonte, largura - 2 * self.margem_celula, self.k)
+
+    def celula(self, texto, fonte, altura, largura=None, dx=0, borda=0):
+        """Uma célula de uma linha na posição atual, sem avançar a coluna."""
+        largura = self.largura if largura is None else largura
+        self.plano.celula(self.pagina, self.x + dx, self.y, largura, altura, fonte, texto, borda)
+
+    def linha(self, texto, fonte, altura, borda=0):
+        """Uma célula de uma linha ocupando a largura da coluna; avança `altura`."""
+        self.garantir(altura)
+        self.celula(texto, fonte, altura, borda=borda)
+        self.y += altura
+
+    def paragrafo(self, texto, fonte, altura_linha, linhas=None):
+        """Texto quebrado em linhas, que pode continuar na página seguinte linha a linha."""
+        for linha in self.linhas(texto, fonte) if linhas is None else linhas:
+            self.linha(linha, fonte, altura_linha)
+
+
+class AjusteDeLayout:
+    """Escalas aplicadas ao planejamento: tamanho das fontes, alturas/espaços e itens por experiência.
+
+    `max_itens=None` mantém todos os itens da descrição de cada experiência.
+    """
+
+    def __init__(self, escala_fonte=1.0, escala_linha=1.0, max_itens=None):
+        self.escala_fonte = escala_fonte
+        self.escala_linha = escala_linha
+        self.max_itens = max_itens
+
+    def fonte(self, fonte):
+        family, style, size = fonte
+        return (family, style, round(size * self.escala_fonte, 2)) if self.escala_fonte != 1.0 else fonte
+
+    def altura(self, altura):
+        return altura * self.escala_linha
+
+    def itens(self, itens):
+        return itens if self.max_itens is None else itens[:self.max_itens]
+
+    def __repr__(self):
+        return (f"AjusteDeLayout(escala_fonte={self.escala_fonte:.2f}, escala_linha={self.escala_linha:.2f}, "
+                f"max_itens={self.max_itens})")
+
+
+def _maior_que_cabe(minimo, maximo, cabe, tolerancia=SCALE_TOLERANCE):
+    """Maior escala em [minimo, maximo] com a qual `cabe`, sabendo que `cabe(minimo)` (busca binária)."""
+    while maximo - minimo > tolerancia:
+        meio = (minimo + maximo) / 2
+        if cabe(meio):
+            minimo = meio
+        else:
+            maximo = meio
+    return minimo
+
+
+def _maior_inteiro_que_cabe(minimo, maximo, cabe):
+    """Maior inteiro em [minimo, maximo] com o qual `cabe`, sabendo que `cabe(minimo)` (busca binária)."""
+    while minimo < maximo:
+        meio = (minimo + maximo + 1) // 2
+        if cabe(meio):
+            minimo = meio
+        else:
+            maximo = meio - 1
+    return minimo
+
+
+def buscar_ajuste(planejar, max_paginas=1, max_itens=0):
+    """Procura o ajuste mais próximo do original com o qual o plano cabe em `max_paginas`.
+
+    `planejar(ajuste)` deve retornar um `PlanoDeLayout` sem desenhar nada (dry-run), e
+    `max_itens` é o maior número de itens de descrição de uma experiência. Reduz, nesta
+    ordem e só o necessário: a entrelinha, o tamanho das fontes e, por último, os itens de
+    cada experiência (mantendo os primeiros); depois devolve fonte e entrelinha ao maior
+    tamanho que ainda cabe. Retorna (ajuste, relatorio), com o número de tentativas, o
+    tempo gasto e se o CV coube.
+    """
+    inicio = time.perf_counter()
+    tentativas = 0
+
+    def paginas(ajuste):
+        nonlocal tentativas
+        tentativas += 1
+        return len(planejar(ajuste).paginas)
+
+    def relatorio(ajuste, total_paginas):
+        return ajuste, {"tentativas": tentativas, "duracao_ms": (time.perf_counter() - inicio) * 1000,
+                        "paginas": total_paginas, "cabe": total_paginas <= max_paginas, "ajuste": ajuste}
+
+    total = paginas(AjusteDeLayout())
+    if total <= max_paginas:
+        return relatorio(AjusteDeLayout(), total)
+
+    def cabe_linha(escala, itens=None):
+        return paginas(AjusteDeLayout(1.0, escala, itens)) <= max_paginas
+
+    def cabe_fonte(escala, itens=None):
+        return paginas(AjusteDeLayout(escala, MIN_LINE_SCALE, itens)) <= max_paginas
+
+    itens = None
+    if not cabe_fonte(MIN_FONT_SCALE):
+        # Nem com fonte e entrelinha mínimas: corta itens das experiências mais longas.
+        def cabe_itens(quantidade):
+            return paginas(AjusteDeLayout(MIN_FONT_SCALE, MIN_LINE_SCALE, quantidade)) <= max_paginas
+
+        if max_itens < 1 or not cabe_itens(1):
+            ajuste = AjusteDeLayout(MIN_FONT_SCALE, MIN_LINE_SCALE, 1 if max_itens >= 1 else None)
+            return relatorio(ajuste, paginas(ajuste))
+        itens = _maior_inteiro_que_cabe(1, max_itens - 1, cabe_itens)
+
+    if cabe_linha(MIN_LINE_SCALE, itens):
+        ajuste = AjusteDeLayout(1.0, _maior_que_cabe(MIN_LINE_SCALE, 1.0, lambda e: cabe_linha(e, itens)), itens)
+    else:
+        ajuste = AjusteDeLayout(_maior_que_cabe(MIN_FONT_SCALE, 1.0, lambda e: cabe_fonte(e, itens)),
+                                MIN_LINE_SCALE, itens)
+    return relatorio(ajuste, paginas(ajuste))
@@ -1,23 +1,42 @@
 from fpdf import FPDF
 from fpdf.enums import XPos, YPos
-from google import genai
 import os
-from dotenv import load_dotenv, find_dotenv
+import sys
 import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from cache import CacheDeRespostas, chave_cache, DEFAULT_CACHE_DIR
+from resources import obter_pool, FONT_FILES
+from layout import AjusteDeLayout, Coluna, MedidorDeTexto, PlanoDeLayout, buscar_ajuste
+from json_stream import parse_stream, ErroJSONIncremental
+from schema import (carregar_schema, config_structured_output, schema_da_secao, validadores_do_schema,
+                    validar_e_reparar)
+from metrics import metricas
+from ats import PontuadorATS
+from secoes import SECOES_ADAPTADAS, caracteristicas_vaga, dividir_cv_base, entrada_da_secao
+from prompt import construir_prompt, uso_tokens, OrcamentoDeTokensExcedido, MAX_PROMPT_TOKENS
 
 # Constantes
 CV_BASE_FILENAME = "CV_Base"
 DICIONARIO_BASE_FILENAME = "Dicionario"
 OUTPUT_CV_FILENAME = "CV_Alterado.pdf"
 MODEL_NAME = 'gemini-2.0-flash'
+SECTION_WORKERS = 8
+LEFT_COLUMN_X = 10
 LEFT_COLUMN_WIDTH = 60
+RIGHT_COLUMN_X = 80
 RIGHT_COLUMN_WIDTH = 120  # Aumentei a largura da coluna da direita
+CONTENT_TOP = 40  # Início das colunas, abaixo do cabeçalho, em todas as páginas
 ICON_SIZE = 3
 TEXT_OFFSET = 1
 CONTACT_ITEM_WIDTH = 40
 SKILL_COLUMN_WIDTH = LEFT_COLUMN_WIDTH / 2
 SKILL_ROW_HEIGHT = 5
 LANGUAGE_ROW_HEIGHT = 6
+LINE_HEIGHT = 6
+SECTION_TITLE_HEIGHT = 10
+SECTION_GAP = 5
+EXPERIENCE_GAP = 5
 SECTION_TITLE_FONT = ('Montserrat', 'B', 12)
 NORMAL_TEXT_FONT = ('OpenSans', '', 8)
 BOLD_TEXT_FONT = ('OpenSans', 'B', 7)
@@ -25,9 +44,95 @@ COMPANY_INFO_FONT = ('Montserrat', '', 9)
 JOB_TITLE_FONT = ('Montserrat', 'B', 9)
 JOB_DETAIL_FONT = ('Montserrat', '', 8)
 
-# Carregar variáveis de ambiente
-load_dotenv(find_dotenv())
-GOOGLE_API_KEY = os.environ.get("GOOGLE_API_KEY")
+PROMPT_TEMPLATE = """Utilizando como base o meu curriculo, {cvbase_content}.
+e na vaga:
+{job_description}
+
+adapte as informacoes do curriculo para a vaga altere o conteudo do Sumario e da descricao de funcoes dos empregos mas nao invente informacao. Atencao, na parte de skills, as habilidades nao podem conter mais do que 21 letras por frase. De a resposta apenas em um formato JSON. Reescreva como achar melhor para que tenha mais chancer de passar na AI que analisa curriculos. Faca o CV em INGLES mas lembre-se que ingles nao eh a minha lingua materna :
+
+{dicionario_base_content}"""
+
+SECTION_PROMPT_TEMPLATE = """Utilizando como base o meu curriculo, {cvbase_content}.
+e na vaga:
+{job_description}
+
+gere apenas a secao "{secao}" do curriculo adaptado para a vaga, sem inventar informacao. Faca em INGLES mas lembre-se que ingles nao eh a minha lingua materna. De a resposta apenas em um formato JSON com a chave "{secao}"."""
+
+SECTION_EXTRACT_PROMPT_TEMPLATE = """Utilizando como base esta parte do meu curriculo:
+{cvbase_content}
+
+extraia a secao "{secao}" sem alterar nem inventar informacao, em INGLES. De a resposta apenas em um formato JSON com a chave "{secao}"."""
+
+#adicione aqui a job descripton ou o link da pagina da vaga
+VAGA_EXEMPLO = """
+    Job Description
+
+Are you passionate about designing effective prompts that drive accurate and culturally relevant data labeling and translation? Join our team as a Prompt Engineer, where you’ll play a key role in developing and optimizing prompts to enhance data annotation and localization across various languages and regions.
+Key Responsibilities:
+
+Design, develop, and refine prompts for data labeling and localization within software applications.
+Analyze software components, use cases, and challenges to iterate on prompt solutions using a strong understanding of data structures, formats, and modeling.
+Collaborate with data scientists, linguists, and localization experts to ensure prompt effectiveness and cultural adaptability.
+Conduct user testing and analyze feedback to enhance prompt accuracy and linguistic consistency.
+Develop guidelines and training materials for prompt implementation in data labeling and localization projects.
+Stay updated on industry trends and tools to continuously improve prompt engineering techniques.
+Requirements:
+
+Bachelor’s degree in Computer Science, Linguistics, Localization, or a related field.
+Proven experience in prompt engineering for data labeling and localization.
+Proficiency in programming languages such as JSON, Python, JavaScript, or XML.
+Strong understanding of localization best practices and cultural nuances across languages and regions.
+Excellent communication and cross-functional collaboration skills.
+Detail-oriented with a problem-solving mindset.
+Knowledge of additional languages (e.g., German, French, Portuguese-Brazilian) is a plus.
+Please note it is a Part-time role and required to work 10 hours/ week!
+    """
+
+_cache_padrao = None
+_ambiente_carregado = False
+
+def carregar_ambiente():
+    """Carrega as variáveis do .env (ex.: GOOGLE_API_KEY) uma única vez, só quando forem necessárias.
+
+    Variáveis já definidas no ambiente têm precedência sobre as do arquivo.
+    """
+    global _ambiente_carregado
+    if not _ambiente_carregado:
+        from dotenv import load_dotenv, find_dotenv
+        load_dotenv(find_dotenv())
+        _ambiente_carregado = True
+
+def obter_cliente():
+    """Cliente do Gemini compartilhado pelo processo (ver `gemini.obter_cliente`).
+
+    O SDK do Gemini e o .env só são carregados aqui, na primeira chamada ao modelo: importar
+    este módulo ou apenas renderizar um CV salvo em JSON não paga esse custo.
+    """
+    carregar_ambiente()
+    from gemini import obter_cliente as obter_cliente_gemini
+    return obter_cliente_gemini()
+
+def estatisticas_conexoes():
+    """Reuso de conexões do cliente compartilhado (ver `gemini.estatisticas_conexoes`), sem importar o SDK."""
+    if "gemini" not in sys.modules:
+        return {"requisicoes": 0, "conexoes": 0, "taxa_reuso": 0.0}
+    return sys.modules["gemini"].estatisticas_conexoes()
+
+def _obter_cache_padrao():
+    """Retorna o cache de respostas compartilhado pelo processo, criando-o na primeira chamada.
+
+    O diretório vem de `CV_CACHE_DIR` (também lida do .env) ou de `cache.DEFAULT_CACHE_DIR`.
+    """
+    global _cache_padrao
+    if _cache_padrao is None:
+        carregar_ambiente()
+        _cache_padrao = CacheDeRespostas(os.environ.get("CV_CACHE_DIR", DEFAULT_CACHE_DIR))
+    return _cache_padrao
+
+def orcamento_de_tokens():
+    """Orçamento de tokens do prompt: `CV_MAX_PROMPT_TOKENS` (também lida do .env) ou `prompt.MAX_PROMPT_TOKENS`."""
+    carregar_ambiente()
+    return int(os.environ.get("CV_MAX_PROMPT_TOKENS", MAX_PROMPT_TOKENS))
 
 def ler_arquivo(nome):
     """Lê o conteúdo de um arquivo de texto."""
@@ -42,47 +147,198 @@ def ler_arquivo(nome):
         return None
 
 def sanitize_text(text):
-    """Substitui caracteres Unicode específicos por seus equivalentes ASCII."""
-    replacements = {
-        '\u2019': "'",
-        '\u2013': "-",
-        '\u2026': "..."
-    }
-    for unicode_char, ascii_char in replacements.items():
-        text = text.replace(unicode_char, ascii_char)
-    return text
+    """Substitui os caracteres sem glifo nas fontes (e a pontuação tipográfica) por equivalentes.
 
-def limpar_string_json(texto, indentacao=2):
-    """Tenta extrair e formatar uma string JSON de um texto."""
+    Usa a tabela de `str.translate` construída a partir da cobertura das fontes do pool
+    (ver `sanitizacao.Sanitizador`), em uma única passada pelo texto.
+    """
+    return obter_pool().sanitizador(text)
+
+def normalizar_vaga(job_description):
+    """Normaliza a descrição da vaga (espaços e quebras de linha) para uso como chave de cache."""
+    return " ".join(job_description.split())
+
+def extrair_json(texto):
+    """Extrai o objeto JSON contido em um texto e o retorna já decodificado (ou None)."""
+    inicio = texto.find('{')
+    if inicio == -1:
+        return None
+    fim = texto.rfind('}')
+    if fim == -1 or fim < inicio:
+        return None
     try:
-        inicio = texto.find('{')
-        if inicio == -1:
-            return None
-        fim = texto.rfind('}')
-        if fim == -1 or fim < inicio:
-            return None
-        json_string = texto[inicio:fim + 1]
-        data = json.loads(json_string)
-        return json.dumps(data, indent=indentacao, ensure_ascii=False)
+        return json.loads(texto[inicio:fim + 1])
     except json.JSONDecodeError:
         return None
 
+def limpar_string_json(texto, indentacao=2):
+    """Tenta extrair e formatar uma string JSON de um texto."""
+    data = extrair_json(texto)
+    if data is None:
+        return None
+    return json.dumps(data, indent=indentacao, ensure_ascii=False)
+
+def _itens_da_descricao(exp):
+    """Itens (um por linha) da descrição de uma experiência profissional."""
+    description = exp.get("description", "")
+    return description.split('\n') if isinstance(description, str) else [description]
+
 class PDF(FPDF):
     """Classe PDF personalizada com cabeçalho e rodapé."""
 
+    # Reaproveita fontes e ícones já carregados no processo (ver resources.PoolDeRecursos).
+    usar_pool = True
+
     def __init__(self, personal_info=None, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.personal_info = personal_info if personal_info else {}
+        self.ajuste = AjusteDeLayout()
         self._carregar_fontes()
 
     def _carregar_fontes(self):
         """Carrega todas as fontes necessárias para o PDF."""
-        self.add_font('Montserrat', '', 'Montserrat-Regular.ttf')
-        self.add_font('Montserrat', 'B', 'Montserrat-Bold.ttf')
-        self.add_font('Montserrat', 'I', 'Montserrat-Italic.ttf')
-        self.add_font('Montserrat-Thin', '', 'Montserrat-Thin.ttf')
-        self.add_font('OpenSans', '', 'OpenSans-Regular.ttf')
-        self.add_font('OpenSans', 'B', 'OpenSans-Bold.ttf')
+        with metricas.span("carregar_fontes"):
+            if self.usar_pool:
+                # Fontes do pool são registradas sob demanda em set_font(); aqui só os ícones.
+                obter_pool().aplicar(self)
+                return
+            for family, style, arquivo in FONT_FILES:
+                self.add_font(family, style, arquivo)
+
+    def set_font(self, family=None, style="", size=0):
+        """Seleciona a fonte, registrando-a a partir do pool na primeira vez em que é usada."""
+        if self.usar_pool and family and isinstance(style, str):
+            fontkey = family.lower() + "".join(sorted(style.upper().replace("U", "")))
+            if fontkey not in self.fonts:
+                with metricas.span("carregar_fontes"):
+                    obter_pool().registrar_fonte(self, fontkey)
+        super().set_font(family, style, size)
+
+    def _medidor(self):
+        """Medidor de texto com as larguras dos glifos das fontes (do pool ou já registradas)."""
+        if self.usar_pool:
+            return obter_pool().medidor
+        return MedidorDeTexto({fontkey: font.cw for fontkey, font in self.fonts.items()})
+
+    def _nova_coluna(self, plano, x, largura, topo, medidor=None):
+        return Coluna(plano, medidor or self._medidor(), self.k, x, largura, topo, self.h - self.b_margin,
+                      topo_continuacao=CONTENT_TOP, margem_celula=self.c_margin)
+
+    def _planejar_cv(self, cv_content, ajuste=None, etapa="layout"):
+        """Mede todos os textos e distribui as seções nas duas colunas, em quantas páginas precisar.
+
+        Não desenha nada; `ajuste` (padrão: `self.ajuste`) escala fontes e alturas e limita os
+        itens de cada experiência (ver `layout.buscar_ajuste`). `etapa` nomeia os spans de cada
+        seção, para separar as tentativas do ajuste do layout efetivamente desenhado.
+        """
+        a = ajuste or self.ajuste
+        normal, negrito = a.fonte(NORMAL_TEXT_FONT), a.fonte(BOLD_TEXT_FONT)
+        altura_linha, espaco_secao = a.altura(LINE_HEIGHT), a.altura(SECTION_GAP)
+        altura_skill, altura_idioma = a.altura(SKILL_ROW_HEIGHT), a.altura(LANGUAGE_ROW_HEIGHT)
+        plano = PlanoDeLayout()
+        medidor = self._medidor()
+        esquerda = self._nova_coluna(plano, LEFT_COLUMN_X, LEFT_COLUMN_WIDTH, CONTENT_TOP, medidor)
+        direita = self._nova_coluna(plano, RIGHT_COLUMN_X, RIGHT_COLUMN_WIDTH, CONTENT_TOP, medidor)
+
+        # Profile Section
+        with metricas.span(etapa, secao="profile"):
+            linhas = esquerda.linhas(cv_content.get("profile", ""), normal)
+            self._planejar_secao(esquerda, a, 'PROFILE', altura_linha)
+            esquerda.paragrafo(None, normal, altura_linha, linhas)
+            esquerda.espaco(espaco_secao)
+
+        # Education Section
+        with metricas.span(etapa, secao="education"):
+            self._planejar_secao(esquerda, a, 'EDUCATION', 2 * altura_linha)
+            for edu_item in cv_content.get("education", []):
+                degree = esquerda.linhas(edu_item.get("degree", ""), negrito)
+                institution = esquerda.linhas(f"{edu_item.get('institution', '')} {edu_item.get('years', '')}",
+                                              normal)
+                esquerda.garantir((len(degree) + len(institution)) * altura_linha)
+                esquerda.paragrafo(None, negrito, altura_linha, degree)
+                esquerda.paragrafo(None, normal, altura_linha, institution)
+            esquerda.espaco(espaco_secao)
+
+        # Skills Section
+        with metricas.span(etapa, secao="skills"):
+            self._planejar_secao(esquerda, a, 'SKILLS', altura_skill)
+            skills_list = list(cv_content.get("skills", {}))
+            for i in range(0, len(skills_list), 2):
+                esquerda.garantir(altura_skill)
+                for j, skill in enumerate(skills_list[i:i + 2]):
+                    esquerda.celula(skill, normal, altura_skill, SKILL_COLUMN_WIDTH, dx=j * SKILL_COLUMN_WIDTH)
+                esquerda.espaco(altura_skill)
+            esquerda.espaco(espaco_secao)
+
+        # Languages Section
+        with metricas.span(etapa, secao="languages"):
+            self._planejar_secao(esquerda, a, 'LANGUAGES', altura_idioma)
+            for lang_item in cv_content.get("languages", []):
+                esquerda.garantir(altura_idioma)
+                esquerda.celula(lang_item.get("language", ""), normal, altura_idioma, LEFT_COLUMN_WIDTH / 2)
+                esquerda.celula(f"({lang_item.get('proficiency', '')})", normal, altura_idioma,
+                                LEFT_COLUMN_WIDTH / 2, dx=LEFT_COLUMN_WIDTH / 2)
+                esquerda.espaco(altura_idioma)
+            esquerda.espaco(espaco_secao)
+
+        # Certifications Section
+        with metricas.span(etapa, secao="certifications"):
+            self._planejar_secao(esquerda, a, 'CERTIFICATIONS', altura_linha)
+            for cert in cv_content.get("certifications", []):
+                esquerda.paragrafo(f"{cert.get('name', '')} - {cert.get('date', '')}", normal, altura_linha)
+
+        # Professional Experience Section
+        with metricas.span(etapa, secao="professional_experience"):
+            self._planejar_secao(direita, a, 'PROFESSIONAL EXPERIENCE', 3 * altura_linha)
+            direita.espaco(a.altura(2))
+            for exp in cv_content.get("professional_experience", []):
+                self._planejar_experiencia(direita, exp, a)
+        return plano
+
+    def _adicionar_cv(self, cv_content):
+        """Desenha todas as seções do CV (coluna da esquerda e experiências) a partir da página atual.
+
+        O layout inteiro é planejado antes (ver `_planejar_cv`) e emitido de uma vez; as colunas
+        continuam nas páginas seguintes quando não cabem. Os textos já devem estar sanitizados
+        (ver `render_cv`).
+        """
+        plano = self._planejar_cv(cv_content)
+        with metricas.span("emitir_layout"):
+            plano.emitir(self)
+        return plano
+
+    def _ajustar_paginas(self, cv_content, max_paginas=1):
+        """Escolhe o ajuste de layout com o qual o CV cabe em `max_paginas`, só planejando (sem desenhar).
+
+        O ajuste escolhido passa a ser usado por `_adicionar_cv`. Retorna o relatório da
+        busca: tentativas, tempo gasto (ms), páginas resultantes, se o CV coube e quantos itens
+        de descrição das experiências foram cortados ("itens_cortados"). As tentativas são
+        medidas como "layout_tentativa", fora dos spans "layout".
+        """
+        quantidades = [len(_itens_da_descricao(exp)) for exp in cv_content.get("professional_experience", [])]
+        with metricas.span("ajustar_paginas"):
+            self.ajuste, relatorio = buscar_ajuste(
+                lambda ajuste: self._planejar_cv(cv_content, ajuste, etapa="layout_tentativa"),
+                max_paginas, max(quantidades, default=0))
+        relatorio["itens_cortados"] = sum(n - len(self.ajuste.itens(range(n))) for n in quantidades)
+        metricas.incrementar("ajuste_paginas_total", resultado="cabe" if relatorio["cabe"] else "nao_cabe")
+        if relatorio["itens_cortados"]:
+            metricas.incrementar("itens_cortados_total", relatorio["itens_cortados"])
+        print(f"Ajuste para {max_paginas} página(s): {relatorio['tentativas']} tentativas em "
+              f"{relatorio['duracao_ms']:.1f} ms ({self.ajuste}); {relatorio['itens_cortados']} itens cortados.")
+        if not relatorio["cabe"]:
+            print(f"Aviso: o CV não coube em {max_paginas} página(s) mesmo com o ajuste máximo; "
+                  f"ficou com {relatorio['paginas']}.")
+        return relatorio
+
+    def _desenhar_coluna(self, x, largura, y, planejar):
+        """Planeja e desenha um trecho de uma coluna a partir de (x, y); retorna o Y final."""
+        plano = PlanoDeLayout()
+        coluna = self._nova_coluna(plano, x, largura, y)
+        planejar(coluna)
+        plano.emitir(self)
+        self.set_xy(x, coluna.y)
+        return coluna.y
 
     def header(self):
         """Adiciona o cabeçalho com nome, título e informações de contato."""
@@ -118,189 +374,462 @@ class PDF(FPDF):
             self.cell(CONTACT_ITEM_WIDTH - ICON_SIZE - TEXT_OFFSET, 3, item["text"], align='L')
             start_x += CONTACT_ITEM_WIDTH if i < 2 else CONTACT_ITEM_WIDTH + 5
 
+    def _planejar_secao(self, coluna, ajuste, title, altura_inicio=0):
+        """Planeja o título de uma seção com linha divisória, na mesma página que `altura_inicio` do conteúdo."""
+        altura = ajuste.altura(SECTION_TITLE_HEIGHT)
+        coluna.garantir(altura + altura_inicio)
+        coluna.linha(title, ajuste.fonte(SECTION_TITLE_FONT), altura, borda='B')
+
     def _adicionar_secao(self, title, y_position):
         """Adiciona uma seção com título e linha divisória."""
-        self.set_xy(10, y_position)
-        self.set_font(*SECTION_TITLE_FONT)
-        self.cell(LEFT_COLUMN_WIDTH, 10, title, border='B', new_x=XPos.LMARGIN, new_y=YPos.NEXT)
+        y = self._desenhar_coluna(LEFT_COLUMN_X, LEFT_COLUMN_WIDTH, y_position,
+                                  lambda coluna: self._planejar_secao(coluna, self.ajuste, title))
         self.set_font(*NORMAL_TEXT_FONT)
-        return self.get_y() + 2
+        return y + 2
 
     def _adicionar_item_lista(self, text):
-        """Adiciona um item simples a uma lista."""
-        self.set_x(10)
-        self.multi_cell(LEFT_COLUMN_WIDTH, 6, sanitize_text(text))
-        return self.get_y() + 2
-
-    def _adicionar_experiencia(self, exp, start_x, start_y, right_column_width):
-        """Adiciona a seção de experiência profissional formatada."""
+        """Adiciona um item simples a uma lista (o texto é sanitizado aqui, fora do `render_cv`)."""
+        text = sanitize_text(text)
+        y = self._desenhar_coluna(LEFT_COLUMN_X, LEFT_COLUMN_WIDTH, self.get_y(),
+                                  lambda coluna: coluna.paragrafo(text, NORMAL_TEXT_FONT, LINE_HEIGHT))
+        return y + 2
+
+    def _planejar_experiencia(self, coluna, exp, ajuste=None):
+        """Planeja uma experiência profissional: empresa, cargo e um item por linha da descrição."""
+        a = ajuste or self.ajuste
         company = exp.get("company", "")
         location = exp.get("location", "")
         title = exp.get("title", "")
         duration = exp.get("duration", "")
-        description = exp.get("description", "")
-        details = description.split('\n') if isinstance(description, str) else [description]
-
-        self.set_xy(start_x, start_y)
-        self.set_font(*COMPANY_INFO_FONT)
-        self.multi_cell(right_column_width, 6, sanitize_text(f"{company} - {location}"))
-        current_y = self.get_y()
-        self.set_xy(start_x, current_y)
-        self.set_font(*JOB_TITLE_FONT)
-        self.multi_cell(right_column_width, 6, sanitize_text(f"{title}, {duration}"))
-        self.set_font(*JOB_DETAIL_FONT)
-        current_y = self.get_y()
-        for detail in details:
-            self.set_xy(start_x, current_y)
-            self.multi_cell(right_column_width, 6, sanitize_text(f"- {detail.strip()}"))
-            current_y = self.get_y()
-        return self.get_y() + 5
-
-def generate_cv(job_description, output_path=OUTPUT_CV_FILENAME):
-    """Gera o CV em PDF com base na descrição da vaga."""
-    cvbase_content = ler_arquivo(CV_BASE_FILENAME)
-    dicionario_base_content = ler_arquivo(DICIONARIO_BASE_FILENAME)
-
-    if cvbase_content is None or dicionario_base_content is None:
-        return None
-
-    prompt = f"""
-    Utilizando como base o meu curriculo, {cvbase_content}.
-    e na vaga:
-    {job_description}
+        details = a.itens(_itens_da_descricao(exp))
+        empresa, cargo, detalhe = a.fonte(COMPANY_INFO_FONT), a.fonte(JOB_TITLE_FONT), a.fonte(JOB_DETAIL_FONT)
+        altura_linha = a.altura(LINE_HEIGHT)
+
+        cabecalho = [(linha, empresa) for linha in coluna.linhas(f"{company} - {location}", empresa)]
+        cabecalho += [(linha, cargo) for linha in coluna.linhas(f"{title}, {duration}", cargo)]
+        itens = [coluna.linhas(f"- {str(detail).strip()}", detalhe) for detail in details]
+        # Empresa e cargo ficam na mesma página que a primeira linha da descrição.
+        coluna.garantir((len(cabecalho) + (1 if itens else 0)) * altura_linha)
+        for linha, fonte in cabecalho:
+            coluna.linha(linha, fonte, altura_linha)
+        for linhas in itens:
+            coluna.paragrafo(None, detalhe, altura_linha, linhas)
+        coluna.espaco(a.altura(EXPERIENCE_GAP))
 
-    adapte as informacoes do curriculo para a vaga altere o conteudo do Sumario e da descricao de funcoes dos empregos mas nao invente informacao. Atencao, na parte de skills, as habilidades nao podem conter mais do que 21 letras por frase. De a resposta apenas em um formato JSON. Reescreva como achar melhor para que tenha mais chancer de passar na AI que analisa curriculos. Faca o CV em INGLES mas lembre-se que ingles nao eh a minha lingua materna :
-
-    {dicionario_base_content}
+    def _adicionar_experiencia(self, exp, start_x, start_y, right_column_width):
+        """Adiciona a seção de experiência profissional formatada (os textos são sanitizados aqui)."""
+        exp = obter_pool().sanitizador.sanitizar_cv(exp)
+        return self._desenhar_coluna(start_x, right_column_width, start_y,
+                                     lambda coluna: self._planejar_experiencia(coluna, exp))
+
+def render_cv(cv_content, output_path=OUTPUT_CV_FILENAME, max_paginas=None):
+    """Renderiza em PDF um CV já adaptado (dicionário no formato do Dicionario).
+
+    Não faz nenhuma chamada ao Gemini, permitindo re-renderizar CVs salvos em JSON.
+    Com `max_paginas`, fontes, entrelinha e itens das experiências são reduzidos só o
+    necessário para o CV caber nesse número de páginas (ver `PDF._ajustar_paginas`).
+    Retorna o caminho do PDF gerado ou, com `output_path=None`, os bytes do PDF gerados
+    em memória, sem tocar no disco.
     """
+    # Skills no formato legado (dicionário) viram a lista dos nomes, que é o que o layout
+    # desenha; assim passam pela sanitização, que não altera chaves de dicionários.
+    if isinstance(cv_content.get("skills"), dict):
+        cv_content = dict(cv_content, skills=list(cv_content["skills"]))
+    # Sanitiza o documento inteiro de uma vez, em vez de cada célula durante o layout.
+    with metricas.span("sanitizar"):
+        cv_content = obter_pool().sanitizador.sanitizar_cv(cv_content)
+    personal_information = cv_content.get("personal_information", {})
+    pdf = PDF(format='A4', personal_info=personal_information)
+    pdf.set_auto_page_break(auto=True, margin=10)
+    if max_paginas:
+        pdf._ajustar_paginas(cv_content, max_paginas)
+    with metricas.span("header"):
+        pdf.add_page()
 
-    cv_content_str = None
+    pdf._adicionar_cv(cv_content)
+
+    # Save PDF
+    with metricas.span("escrever_pdf"):
+        if output_path is None:
+            return bytes(pdf.output())
+        pdf.output(output_path)
+    return output_path
+
+def salvar_cv_json(cv_content, json_path):
+    """Salva o CV adaptado em JSON para ser re-renderizado depois sem chamar o Gemini."""
+    with open(json_path, 'w', encoding='utf-8') as arquivo:
+        json.dump(cv_content, arquivo, indent=2, ensure_ascii=False)
+    return json_path
+
+def render_cv_de_json(json_path, output_path=None, max_paginas=None):
+    """Lê um CV adaptado salvo em JSON e o renderiza em PDF (ver `render_cv`)."""
+    conteudo = ler_arquivo(json_path)
+    if conteudo is None:
+        return None
     try:
-        client = genai.Client(api_key=GOOGLE_API_KEY)
-        chat = client.chats.create(model=MODEL_NAME)
-        response = chat.send_message(prompt)
-        cv_content_str = limpar_string_json(response.text)
+        cv_content = json.loads(conteudo)
+    except json.JSONDecodeError as e:
+        print(f"Erro ao decodificar JSON de '{json_path}': {e}")
+        return None
+    if output_path is None:
+        output_path = os.path.splitext(json_path)[0] + ".pdf"
+    render_cv(cv_content, output_path, max_paginas)
+    print(f"CV renderizado com sucesso e salvo em: {output_path}")
+    return output_path
 
-        if cv_content_str is None:
-            print("Erro: Resposta do Gemini não continha um JSON válido.")
-            return None
+def completar_secoes(client, cv_content, schema, cvbase_content, job_description,
+                     max_tokens=None):
+    """Repara localmente o CV e pede ao Gemini de novo apenas as seções que continuam inválidas.
 
-        try:
-            cv_content = json.loads(cv_content_str)
-        except json.JSONDecodeError as e:
-            print(f"Erro ao decodificar JSON: {e}")
-            print("Conteúdo da resposta do Gemini (para depuração):")
-            print(cv_content_str)
+    Retorna o CV completo e válido ou None se alguma seção continuar inválida.
+    """
+    if max_tokens is None:
+        max_tokens = orcamento_de_tokens()
+    cv_content, falhas = validar_e_reparar(cv_content, schema)
+    for secao, problema in falhas.items():
+        print(f"Aviso: seção '{secao}' inválida ({problema}); solicitando novamente apenas essa seção.")
+        prompt, tokens = construir_prompt(SECTION_PROMPT_TEMPLATE, cvbase_content, "", job_description,
+                                          max_tokens, secao=secao)
+        schema_secao = schema_da_secao(schema, secao)
+        with metricas.span("llm", modo="secao"):
+            response = client.models.generate_content(model=MODEL_NAME, contents=prompt,
+                                                      config=config_structured_output(schema_secao))
+        metricas.incrementar("secoes_resolicitadas_total", secao=secao)
+        uso_tokens.registrar(getattr(response, "usage_metadata", None), tokens, response.text)
+        resposta = extrair_json(response.text) or {}
+        reparada, falhas_secao = validar_e_reparar(resposta, schema_secao)
+        if falhas_secao:
+            print(f"Erro: seção '{secao}' continuou inválida após nova solicitação: {falhas_secao[secao]}")
             return None
+        cv_content[secao] = reparada[secao]
+    return cv_content
+
+def gerar_secoes(client, cvbase_content, job_description, cache, schema, ignorar_cache=False,
+                 max_tokens=None):
+    """Gera o CV seção por seção, em paralelo, com uma requisição menor por seção.
+
+    Cada seção recebe só a parte relevante do CV_Base (ver `secoes.ENTRADAS_DAS_SECOES`).
+    As seções adaptadas à vaga ficam em cache pela entrada e pelas características da vaga;
+    as demais, só pela entrada. Assim, uma mudança pontual no CV_Base ou uma vaga quase
+    igual a outra já processada só regenera as seções afetadas.
+    Retorna o CV completo ou None se alguma seção vier inválida.
+    """
+    if max_tokens is None:
+        max_tokens = orcamento_de_tokens()
+    blocos = dividir_cv_base(cvbase_content)
+    caracteristicas = caracteristicas_vaga(job_description)
+
+    def gerar(secao):
+        adaptada = secao in SECOES_ADAPTADAS
+        template = SECTION_PROMPT_TEMPLATE if adaptada else SECTION_EXTRACT_PROMPT_TEMPLATE
+        entrada = entrada_da_secao(blocos, secao, cvbase_content)
+        chave = chave_cache(MODEL_NAME, template, secao, entrada, caracteristicas if adaptada else "")
+        if not ignorar_cache:
+            em_cache = cache.get(chave)
+            metricas.incrementar("secoes_cache_total", secao=secao, resultado="hit" if em_cache else "miss")
+            if em_cache is not None:
+                return json.loads(em_cache)
+
+        prompt, tokens = construir_prompt(template, entrada, "", job_description if adaptada else "",
+                                          max_tokens, secao=secao)
+        schema_secao = schema_da_secao(schema, secao)
+        with metricas.span("llm", modo="por_secao", secao=secao):
+            response = client.models.generate_content(model=MODEL_NAME, contents=prompt,
+                                                      config=config_structured_output(schema_secao))
+        uso_tokens.registrar(getattr(response, "usage_metadata", None), tokens, response.text)
+        reparada, falhas = validar_e_reparar(extrair_json(response.text) or {}, schema_secao)
+        if falhas:
+            print(f"Erro: seção '{secao}' inválida: {falhas[secao]}")
+            return None
+        cache.put(chave, json.dumps(reparada[secao], ensure_ascii=False))
+        return reparada[secao]
 
-        personal_information = cv_content.get("personal_information", {})
-        pdf = PDF(format='A4', personal_info=personal_information)
-        pdf.set_auto_page_break(auto=True, margin=10)
-        pdf.add_page()
-
-        current_y = 40
+    secoes = list(schema["properties"])
+    with ThreadPoolExecutor(max_workers=min(SECTION_WORKERS, len(secoes))) as executor:
+        valores = list(executor.map(gerar, secoes))
+    if any(valor is None for valor in valores):
+        return None
+    return dict(zip(secoes, valores))
 
-        # Profile Section
-        current_y = pdf._adicionar_secao('PROFILE', current_y)
-        profile_text = sanitize_text(cv_content.get("profile", ""))
-        pdf.multi_cell(LEFT_COLUMN_WIDTH, 6, profile_text)
-        current_y = pdf.get_y() + 5
+def generate_cv(job_description, output_path=OUTPUT_CV_FILENAME, client=None, cache=None,
+                ignorar_cache=False, streaming=False, max_tokens=None, por_secao=False,
+                indice=None, limiar_similaridade=None, max_paginas=None):
+    """Gera o CV em PDF com base na descrição da vaga.
 
-        # Education Section
-        current_y = pdf._adicionar_secao('EDUCATION', current_y)
-        pdf.set_font(*BOLD_TEXT_FONT)
-        education_data = cv_content.get("education", [])
-        for edu_item in education_data:
-            degree = edu_item.get("degree", "")
-            institution = edu_item.get("institution", "")
-            years = edu_item.get("years", "")
-            pdf.set_x(10)
-            pdf.cell(LEFT_COLUMN_WIDTH, 6, sanitize_text(degree), new_x=XPos.LMARGIN, new_y=YPos.NEXT)
-            pdf.set_font(*NORMAL_TEXT_FONT)
-            pdf.set_x(10)
-            pdf.multi_cell(LEFT_COLUMN_WIDTH, 6, sanitize_text(f"{institution} {years}"))
-            current_y = pdf.get_y() + 2
-        current_y += 3
+    Adapta o CV com o Gemini (ver `adaptar_cv`: cliente, cache, streaming, por seção e índice de
+    vagas) e o renderiza (ver `render_cv`), salvando o JSON ao lado do PDF.
+    Retorna o caminho do PDF gerado ou None em caso de erro. Com `output_path=None` nada é
+    gravado e o retorno são os bytes do PDF (uso em serviço).
+    """
+    inicio = time.perf_counter()
+    resultado = _gerar_cv(job_description, output_path, client, cache, ignorar_cache, streaming, max_tokens,
+                          por_secao, indice, limiar_similaridade, max_paginas)
+    metricas.observar("generate_cv", time.perf_counter() - inicio)
+    metricas.incrementar("generate_cv_total", resultado="sucesso" if resultado else "erro")
+    return resultado
+
+def _reaproveitar_similar(indice, cache, job_description, base, limiar):
+    """CV (JSON em texto) de uma vaga semelhante já processada com a mesma base, ou None."""
+    # Importado aqui: o numpy só é carregado quando há um índice em uso.
+    from similaridade import DEFAULT_THRESHOLD
+    with metricas.span("indice_busca"):
+        encontrado = indice.buscar(job_description, DEFAULT_THRESHOLD if limiar is None else limiar)
+    if encontrado is None or encontrado[0]["dados"].get("base") != base:
+        metricas.incrementar("indice_vagas_total", resultado="sem_similar")
+        return None
+    entrada, similaridade = encontrado
+    cv_content_str = cache.get(entrada["dados"]["chave"])
+    if cv_content_str is None:
+        metricas.incrementar("indice_vagas_total", resultado="fora_do_cache")
+        return None
+    metricas.incrementar("indice_vagas_total", resultado="reuso")
+    print(f"Reaproveitando o CV de uma vaga semelhante (similaridade {similaridade:.2f}).")
+    return cv_content_str
+
+def adaptar_cv(job_description, client=None, cache=None, ignorar_cache=False, streaming=False,
+               max_tokens=None, por_secao=False, indice=None, limiar_similaridade=None):
+    """Etapa do Gemini de `generate_cv`: retorna o CV adaptado à vaga (dicionário), sem renderizar.
+
+    Sem `client`, usa o cliente compartilhado do processo (`obter_cliente`).
+    `cache` guarda as respostas (padrão: o cache em disco do processo) e `ignorar_cache` força a
+    chamada e atualiza o cache; `max_tokens` limita o prompt (padrão: `orcamento_de_tokens`);
+    `streaming` e `por_secao` escolhem o modo de geração (ver `gerar_secoes`); com um `indice`
+    (`similaridade.IndiceDeVagas`), vagas com similaridade >= `limiar_similaridade` (padrão:
+    `similaridade.DEFAULT_THRESHOLD`) reaproveitam o CV já gerado.
+    Entradas ausentes, orçamento de tokens estourado e respostas inválidas são exibidos e
+    retornam None; erros da API e demais exceções são propagados, para quem chama decidir se
+    tenta de novo (ver `fila.processar_fila`).
+    """
+    with metricas.span("ler_entradas"):
+        cvbase_content = ler_arquivo(CV_BASE_FILENAME)
+        dicionario_base_content = ler_arquivo(DICIONARIO_BASE_FILENAME)
 
-        # Skills Section
-        current_y = pdf._adicionar_secao('SKILLS', current_y)
-        pdf.set_font(*NORMAL_TEXT_FONT)
-        skills_dict = cv_content.get("skills", {})
-        skills_list = list(skills_dict)
-        for i in range(0, len(skills_list), 2):
-            pdf.set_x(10)
-            pdf.cell(SKILL_COLUMN_WIDTH, SKILL_ROW_HEIGHT, sanitize_text(skills_list[i]), border=0, align='L')
-            if i + 1 < len(skills_list):
-                pdf.cell(SKILL_COLUMN_WIDTH, SKILL_ROW_HEIGHT, sanitize_text(skills_list[i + 1]), border=0, align='L')
-            pdf.ln(SKILL_ROW_HEIGHT)
-        current_y = pdf.get_y() + 5
+    if cvbase_content is None or dicionario_base_content is None:
+        return None
+    if max_tokens is None:
+        max_tokens = orcamento_de_tokens()
 
-        # Languages Section
-        current_y = pdf._adicionar_secao('LANGUAGES', current_y)
-        languages_list = cv_content.get("languages", [])
-        pdf.set_font(*NORMAL_TEXT_FONT)
-        for lang_item in languages_list:
-            language = lang_item.get("language", "")
-            proficiency = lang_item.get("proficiency", "")
-            pdf.set_x(10)
-            pdf.cell(LEFT_COLUMN_WIDTH / 2, LANGUAGE_ROW_HEIGHT, language, border=0, align='L')
-            pdf.cell(LEFT_COLUMN_WIDTH / 2, LANGUAGE_ROW_HEIGHT, f"({proficiency})", border=0, align='L')
-            pdf.ln(LANGUAGE_ROW_HEIGHT)
-        languages_end_y = pdf.get_y()  # Salva a posição Y do final da seção de idiomas
-        current_y += 2
+    try:
+        with metricas.span("montar_prompt"):
+            prompt, tokens_estimados = construir_prompt(PROMPT_TEMPLATE, cvbase_content, dicionario_base_content,
+                                                        job_description, max_tokens)
+    except OrcamentoDeTokensExcedido as e:
+        print(f"Erro: {e}")
+        return None
+    partes_chave = [MODEL_NAME, PROMPT_TEMPLATE, cvbase_content, dicionario_base_content,
+                    normalizar_vaga(job_description), str(max_tokens)]
+    if por_secao:
+        partes_chave.append("por_secao")
+    chave = chave_cache(*partes_chave)
+    if cache is None:
+        cache = _obter_cache_padrao()
 
-        # Certifications Section
-        current_y = pdf._adicionar_secao('CERTIFICATIONS', languages_end_y + 5)  # Usa a posição Y correta
-        certifications_list = cv_content.get("certifications", [])
-        for cert in certifications_list:
-            name = cert.get("name", "")
-            date = cert.get("date", "")
-            pdf._adicionar_item_lista(f"{name} - {date}")
+    # Identifica as entradas fixas: só se reaproveita CV de vaga semelhante gerado a partir delas.
+    base = chave_cache(MODEL_NAME, PROMPT_TEMPLATE, cvbase_content, dicionario_base_content, str(por_secao))
 
-        # Professional Experience Section
-        pdf.set_xy(80, 40)
-        pdf.set_font(*SECTION_TITLE_FONT)
-        pdf.cell(RIGHT_COLUMN_WIDTH, 10, 'PROFESSIONAL EXPERIENCE', border='B', new_x=XPos.LMARGIN, new_y=YPos.NEXT)
-        pdf.ln(2)
-
-        start_x = 80
-        start_y = pdf.get_y()
-        experiences = cv_content.get("professional_experience", [])
-        for exp in experiences:
-            start_y = pdf._adicionar_experiencia(exp, start_x, start_y, RIGHT_COLUMN_WIDTH)
-
-        # Save PDF
-        pdf.output(output_path)
+    cv_content_str = None
+    novo = False
+    with metricas.contexto(vaga=chave[:12]):
+        try:
+            if not ignorar_cache:
+                cv_content_str = cache.get(chave)
+                metricas.incrementar("cache_consultas_total", resultado="hit" if cv_content_str else "miss")
+                if cv_content_str is None and indice is not None:
+                    cv_content_str = _reaproveitar_similar(indice, cache, job_description, base,
+                                                           limiar_similaridade)
+                    if cv_content_str is not None:
+                        cache.put(chave, cv_content_str)
+            if cv_content_str is not None:
+                with metricas.span("parse_json"):
+                    cv_content = json.loads(cv_content_str)
+            elif por_secao:
+                cv_content = gerar_secoes(client or obter_cliente(), cvbase_content, job_description, cache,
+                                          carregar_schema(DICIONARIO_BASE_FILENAME), ignorar_cache, max_tokens)
+                if cv_content is None:
+                    return None
+                cv_content_str = json.dumps(cv_content, ensure_ascii=False)
+                cache.put(chave, cv_content_str)
+                novo = True
+            else:
+                if client is None:
+                    client = obter_cliente()
+                schema = carregar_schema(DICIONARIO_BASE_FILENAME)
+                config = config_structured_output(schema)
+                if streaming:
+                    recebidos = []
+                    uso = None
+                    inicio_llm = time.perf_counter()
+
+                    def pedacos():
+                        nonlocal uso
+                        for pedaco in client.models.generate_content_stream(model=MODEL_NAME, contents=prompt,
+                                                                            config=config):
+                            if not recebidos:
+                                metricas.observar("llm_primeiro_pedaco", time.perf_counter() - inicio_llm)
+                            # O uso de tokens chega preenchido no último pedaço.
+                            uso = getattr(pedaco, "usage_metadata", None) or uso
+                            recebidos.append(pedaco.text or "")
+                            yield recebidos[-1]
+
+                    try:
+                        # O parse acontece à medida que os pedaços chegam, dentro do próprio span do LLM.
+                        with metricas.span("llm", modo="streaming"):
+                            cv_content = parse_stream(pedacos(), validadores_do_schema(schema))
+                    except ErroJSONIncremental as e:
+                        print(f"Erro: Resposta do Gemini interrompida por JSON inválido: {e}")
+                        return None
+                    finally:
+                        uso_tokens.registrar(uso, tokens_estimados, "".join(recebidos))
+                else:
+                    with metricas.span("llm", modo="completo"):
+                        response = client.models.generate_content(model=MODEL_NAME, contents=prompt, config=config)
+                    uso_tokens.registrar(getattr(response, "usage_metadata", None), tokens_estimados, response.text)
+                    cv_content_str = response.text
+                    with metricas.span("parse_json"):
+                        cv_content = extrair_json(cv_content_str)
+
+                    if cv_content is None:
+                        metricas.incrementar("erros_total", etapa="parse_json", tipo="JSONInvalido")
+                        print("Erro: Resposta do Gemini não continha um JSON válido.")
+                        return None
+                cv_content = completar_secoes(client, cv_content, schema, cvbase_content, job_description,
+                                              max_tokens)
+                if cv_content is None:
+                    return None
+                cv_content_str = json.dumps(cv_content, ensure_ascii=False)
+                cache.put(chave, cv_content_str)
+                novo = True
+
+            if novo and indice is not None:
+                indice.adicionar(chave, job_description, {"chave": chave, "base": base})
+            return cv_content
+
+        except Exception:
+            print(cv_content_str if cv_content_str else "Nenhuma resposta do Gemini recebida.")
+            raise
+
+def _gerar_cv(job_description, output_path, client, cache, ignorar_cache, streaming, max_tokens, por_secao,
+              indice, limiar_similaridade, max_paginas):
+    try:
+        cv_content = adaptar_cv(job_description, client, cache, ignorar_cache, streaming, max_tokens, por_secao,
+                                indice, limiar_similaridade)
+        if cv_content is None:
+            return None
+        if output_path is None:
+            return render_cv(cv_content, None, max_paginas)
+        salvar_cv_json(cv_content, os.path.splitext(output_path)[0] + ".json")
+        render_cv(cv_content, output_path, max_paginas)
         print(f"CV gerado com sucesso e salvo em: {output_path}")
+        return output_path
 
     except Exception as e:
-        print(f"Erro ao gerar o CV: {e}")
-        print(cv_content_str if cv_content_str else "Nenhuma resposta do Gemini recebida.")
+        print(f"Erro ao gerar o CV ({type(e).__name__}): {e}")
         return None
 
-if __name__ == '__main__':
-    #adicione aqui a job descripton ou o link da pagina da vaga
-    job_description = """
-    Job Description
+def _textos_dos_candidatos(response):
+    """Texto de cada candidato de uma resposta com `candidate_count` (ou o texto único da resposta)."""
+    textos = []
+    for candidato in getattr(response, "candidates", None) or []:
+        partes = getattr(getattr(candidato, "content", None), "parts", None) or []
+        texto = "".join(parte.text for parte in partes if getattr(parte, "text", None))
+        if texto:
+            textos.append(texto)
+    return textos or [response.text]
+
+def generate_cv_variantes(job_description, n=3, top_k=1, output_path=OUTPUT_CV_FILENAME, client=None, cache=None,
+                          ignorar_cache=False, max_tokens=None, max_paginas=None):
+    """Gera `n` variantes do CV em uma única chamada ao Gemini e renderiza só as `top_k` melhores.
+
+    O prompt (CV_Base, Dicionario e vaga) é enviado uma vez com `candidate_count=n`, então
+    o custo do prompt e a latência da chamada se dividem entre as variantes. Cada variante é
+    reparada localmente (ver `schema.validar_e_reparar`); as que continuam inválidas são
+    descartadas, sem novas requisições. As válidas ficam em cache juntas e são ordenadas pela
+    aderência à vaga (ver `ats.PontuadorATS`). A variante de posição i é salva em
+    "<output_path sem extensão>_i.pdf", com o JSON ao lado.
+    Retorna a lista ordenada de {"caminho", "pontuacao", "faltando"} (com `output_path=None`,
+    "pdf" com os bytes no lugar de "caminho") ou None em caso de erro.
+    """
+    with metricas.span("ler_entradas"):
+        cvbase_content = ler_arquivo(CV_BASE_FILENAME)
+        dicionario_base_content = ler_arquivo(DICIONARIO_BASE_FILENAME)
+    if cvbase_content is None or dicionario_base_content is None:
+        return None
+    if max_tokens is None:
+        max_tokens = orcamento_de_tokens()
 
-Are you passionate about designing effective prompts that drive accurate and culturally relevant data labeling and translation? Join our team as a Prompt Engineer, where you’ll play a key role in developing and optimizing prompts to enhance data annotation and localization across various languages and regions.
-Key Responsibilities:
+    try:
+        prompt, tokens_estimados = construir_prompt(PROMPT_TEMPLATE, cvbase_content, dicionario_base_content,
+                                                    job_description, max_tokens)
+    except OrcamentoDeTokensExcedido as e:
+        print(f"Erro: {e}")
+        return None
+    chave = chave_cache(MODEL_NAME, PROMPT_TEMPLATE, cvbase_content, dicionario_base_content,
+                        normalizar_vaga(job_description), str(max_tokens), f"variantes:{n}")
+    if cache is None:
+        cache = _obter_cache_padrao()
 
-Design, develop, and refine prompts for data labeling and localization within software applications.
-Analyze software components, use cases, and challenges to iterate on prompt solutions using a strong understanding of data structures, formats, and modeling.
-Collaborate with data scientists, linguists, and localization experts to ensure prompt effectiveness and cultural adaptability.
-Conduct user testing and analyze feedback to enhance prompt accuracy and linguistic consistency.
-Develop guidelines and training materials for prompt implementation in data labeling and localization projects.
-Stay updated on industry trends and tools to continuously improve prompt engineering techniques.
-Requirements:
+    try:
+        variantes = None
+        if not ignorar_cache:
+            em_cache = cache.get(chave)
+            metricas.incrementar("cache_consultas_total", resultado="hit" if em_cache else "miss")
+            if em_cache is not None:
+                variantes = json.loads(em_cache)
+        if variantes is None:
+            if client is None:
+                client = obter_cliente()
+            schema = carregar_schema(DICIONARIO_BASE_FILENAME)
+            config = {**config_structured_output(schema), "candidate_count": n}
+            with metricas.span("llm", modo="variantes"):
+                response = client.models.generate_content(model=MODEL_NAME, contents=prompt, config=config)
+            textos = _textos_dos_candidatos(response)
+            uso_tokens.registrar(getattr(response, "usage_metadata", None), tokens_estimados, "".join(textos))
+            variantes = []
+            for texto in textos:
+                cv_content = extrair_json(texto)
+                falhas = None
+                if cv_content is not None:
+                    cv_content, falhas = validar_e_reparar(cv_content, schema)
+                if cv_content is None or falhas:
+                    metricas.incrementar("variantes_total", resultado="invalida")
+                    continue
+                metricas.incrementar("variantes_total", resultado="valida")
+                variantes.append(cv_content)
+            if not variantes:
+                print("Erro: Nenhuma variante do Gemini continha um CV válido.")
+                return None
+            cache.put(chave, json.dumps(variantes, ensure_ascii=False))
+
+        pontuador = PontuadorATS(job_description)
+        with metricas.span("pontuar_variantes"):
+            ranking = sorted(((pontuador.pontuar(cv_content), cv_content) for cv_content in variantes),
+                             key=lambda item: -item[0]["pontuacao"])
+        resultado = []
+        for posicao, (pontuacao, cv_content) in enumerate(ranking[:max(1, top_k)], start=1):
+            if output_path is None:
+                resultado.append({"pdf": render_cv(cv_content, None, max_paginas), **pontuacao})
+                continue
+            raiz, extensao = os.path.splitext(output_path)
+            caminho = f"{raiz}_{posicao}{extensao or '.pdf'}"
+            salvar_cv_json(cv_content, os.path.splitext(caminho)[0] + ".json")
+            render_cv(cv_content, caminho, max_paginas)
+            print(f"Variante {posicao} (aderência {pontuacao['pontuacao']:.0%}) salva em: {caminho}")
+            resultado.append({"caminho": caminho, **pontuacao})
+        return resultado
 
-Bachelor’s degree in Computer Science, Linguistics, Localization, or a related field.
-Proven experience in prompt engineering for data labeling and localization.
-Proficiency in programming languages such as JSON, Python, JavaScript, or XML.
-Strong understanding of localization best practices and cultural nuances across languages and regions.
-Excellent communication and cross-functional collaboration skills.
-Detail-oriented with a problem-solving mindset.
-Knowledge of additional languages (e.g., German, French, Portuguese-Brazilian) is a plus.
-Please note it is a Part-time role and required to work 10 hours/ week!
-    """
-    generate_cv(job_description)
\ No newline at end of file
+    except Exception as e:
+        print(f"Erro ao gerar as variantes do CV ({type(e).__name__}): {e}")
+        return None
+
+if __name__ == '__main__':
+    from cli import main as cli_main
+
+    # `python main.py [opções]` gera o CV da VAGA_EXEMPLO e `python main.py --render CV_JSON`
+    # só renderiza, como `python cli.py generate` e `python cli.py render`.
+    argumentos = sys.argv[1:]
+    if "--render" in argumentos:
+        posicao = argumentos.index("--render")
+        argumentos = ["render", *argumentos[posicao + 1:posicao + 2], *argumentos[:posicao], *argumentos[posicao + 2:]]
+    else:
+        argumentos = ["generate", *argumentos]
+    raise SystemExit(cli_main(argumentos))
@@ -0,0 +1,197 @@
+import json
+import logging
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+# Constantes
+LOGGER_NAME = "cv.metricas"
+PREFIXO_METRICAS = "cv"
+# Limites (em segundos) dos buckets do histograma de duração das etapas.
+DURATION_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+logger = logging.getLogger(LOGGER_NAME)
+
+
+def _chave_rotulos(rotulos):
+    return tuple(sorted((nome, str(valor)) for nome, valor in rotulos.items()))
+
+
+def _escapar(valor):
+    return str(valor).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _formatar_rotulos(rotulos, extra=()):
+    pares = list(rotulos) + list(extra)
+    if not pares:
+        return ""
+    escapados = (f'{nome}="{_escapar(valor)}"' for nome, valor in pares)
+    return "{" + ",".join(escapados) + "}"
+
+
+class _Histograma:
+    __slots__ = ("buckets", "soma", "contagem", "maximo")
+
+    def __init__(self):
+        self.buckets = [0] * len(DURATION_BUCKETS)
+        self.soma = 0.0
+        self.contagem = 0
+        self.maximo = 0.0
+
+    def observar(self, segundos):
+        self.soma += segundos
+        self.contagem += 1
+        self.maximo = max(self.maximo, segundos)
+        for indice, limite in enumerate(DURATION_BUCKETS):
+            if segundos <= limite:
+                self.buckets[indice] += 1
+                break
+
+
+class Metricas:
+    """Spans de duração por etapa e contadores do pipeline, seguros entre threads.
+
+    Cada span e cada incremento de contador também vira uma linha JSON no logger
+    `cv.metricas` quando ele está habilitado (ver `ativar_log_json`). Os agregados podem
+    ser exportados no formato texto do Prometheus com `exportar_prometheus`.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._contadores = {}
+        self._histogramas = {}
+        self._contexto = threading.local()
+
+    @contextmanager
+    def contexto(self, **atributos):
+        """Anexa `atributos` (ex.: id da vaga) às linhas de log emitidas nesta thread."""
+        anterior = getattr(self._contexto, "atributos", {})
+        self._contexto.atributos = dict(anterior, **atributos)
+        try:
+            yield
+        finally:
+            self._contexto.atributos = anterior
+
+    @contextmanager
+    def span(self, etapa, **rotulos):
+        """Mede a duração de uma etapa; exceções são contadas por etapa e tipo e relançadas."""
+        inicio = time.perf_counter()
+        erro = None
+        try:
+            yield
+        except BaseException as e:
+            erro = type(e).__name__
+            raise
+        finally:
+            self.observar(etapa, time.perf_counter() - inicio, erro, **rotulos)
+
+    def observar(self, etapa, segundos, erro=None, **rotulos):
+        """Registra a duração de uma etapa medida externamente."""
+        chave = (etapa, _chave_rotulos(rotulos))
+        with self._lock:
+            histograma = self._histogramas.get(chave)
+            if histograma is None:
+                histograma = self._histogramas[chave] = _Histograma()
+            histograma.observar(segundos)
+        if erro:
+            self.incrementar("erros_total", etapa=etapa, tipo=erro)
+        self._log("span", etapa=etapa, ms=round(segundos * 1000, 3), erro=erro, **rotulos)
+
+    def incrementar(self, nome, valor=1, **rotulos):
+        """Soma `valor` ao contador `nome` com os rótulos informados."""
+        chave = (nome, _chave_rotulos(rotulos))
+        with self._lock:
+            self._contadores[chave] = self._contadores.get(chave, 0) + valor
+        self._log("contador", nome=nome, valor=valor, **rotulos)
+
+    def contador(self, nome, **rotulos):
+        """Valor atual de um contador (0 se nunca incrementado)."""
+        with self._lock:
+            return self._contadores.get((nome, _chave_rotulos(rotulos)), 0)
+
+    def resumo(self):
+        """Contagem, total, média e máximo (em ms) de cada etapa medida."""
+        with self._lock:
+            itens = [(etapa, dict(rotulos), h.contagem, h.soma, h.maximo)
+                     for (etapa, rotulos), h in self._histogramas.items()]
+        return [
+            {"etapa": etapa, **rotulos, "contagem": contagem, "total_ms": soma * 1000,
+             "media_ms": soma * 1000 / contagem, "max_ms": maximo * 1000}
+            for etapa, rotulos, contagem, soma, maximo in sorted(itens, key=lambda item: -item[3])
+        ]
+
+    def exportar_prometheus(self):
+        """Exporta contadores e histogramas no formato texto de exposição do Prometheus."""
+        with self._lock:
+            contadores = sorted(self._contadores.items())
+            histogramas = sorted((chave, (list(h.buckets), h.soma, h.contagem))
+                                 for chave, h in self._histogramas.items())
+        linhas = []
+        declarados = set()
+        for (nome, rotulos), valor in contadores:
+            metrica = f"{PREFIXO_METRICAS}_{nome}"
+            if metrica not in declarados:
+                declarados.add(metrica)
+                linhas.append(f"# TYPE {metrica} counter")
+            linhas.append(f"{metrica}{_formatar_rotulos(rotulos)} {valor}")
+
+        metrica = f"{PREFIXO_METRICAS}_etapa_duracao_segundos"
+        if histogramas:
+            linhas.append(f"# TYPE {metrica} histogram")
+        for (etapa, rotulos), (buckets, soma, contagem) in histogramas:
+            rotulos = (("etapa", etapa),) + rotulos
+            acumulado = 0
+            for limite, quantidade in zip(DURATION_BUCKETS, buckets):
+                acumulado += quantidade
+                linhas.append(f"{metrica}_bucket{_formatar_rotulos(rotulos, [('le', repr(limite))])} {acumulado}")
+            linhas.append(f"{metrica}_bucket{_formatar_rotulos(rotulos, [('le', '+Inf')])} {contagem}")
+            linhas.append(f"{metrica}_sum{_formatar_rotulos(rotulos)} {soma}")
+            linhas.append(f"{metrica}_count{_formatar_rotulos(rotulos)} {contagem}")
+        return "\n".join(linhas) + "\n"
+
+    def salvar_prometheus(self, caminho):
+        """Grava `exportar_prometheus()` em um arquivo (ex.: para o textfile collector)."""
+        with open(caminho, 'w', encoding='utf-8') as arquivo:
+            arquivo.write(self.exportar_prometheus())
+        return caminho
+
+    def limpar(self):
+        """Zera todos os contadores e histogramas."""
+        with self._lock:
+            self._contadores.clear()
+            self._histogramas.clear()
+
+    def _log(self, evento, **campos):
+        if not logger.isEnabledFor(logging.INFO):
+            return
+        registro = {"ts": round(time.time(), 6), "evento": evento, "thread": threading.current_thread().name}
+        registro.update(getattr(self._contexto, "atributos", {}))
+        registro.update((chave, valor) for chave, valor in campos.items() if valor is not None)
+        logger.info(json.dumps(registro, ensure_ascii=False))
+
+
+_handler_json = None
+
+
+def ativar_log_json(stream=None):
+    """Emite as linhas JSON de spans e contadores em `stream` (padrão: stderr).
+
+    Chamar de novo não duplica as linhas: o handler do mesmo stream é reaproveitado e o de
+    outro stream é substituído.
+    """
+    global _handler_json
+    stream = stream or sys.stderr
+    if _handler_json is not None and _handler_json in logger.handlers and _handler_json.stream is stream:
+        return _handler_json
+    if _handler_json is not None:
+        logger.removeHandler(_handler_json)
+    _handler_json = logging.StreamHandler(stream)
+    _handler_json.setFormatter(logging.Formatter("%(message)s"))
+    logger.addHandler(_handler_json)
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+    return _handler_json
+
+
+metricas = Metricas()
@@ -0,0 +1,179 @@
+import json
+import re
+import threading
+
+from metrics import metricas
+
+# Constantes
+MAX_PROMPT_TOKENS = 8000
+CHARS_PER_TOKEN = 4  # Aproximação usada pelo Gemini para textos em inglês/português.
+MIN_REPEATED_LINE_CHARS = 40
+JOB_TRUNCATION_MARKER = "[...]"
+
+# Linhas de vagas copiadas de sites (LinkedIn, Indeed, ...) que não agregam nada ao prompt.
+BOILERPLATE_PATTERNS = [re.compile(padrao, re.IGNORECASE) for padrao in (
+    r"^(show|see) (more|less)$",
+    r"^(easy )?apply( now)?$",
+    r"^save( job)?$",
+    r"^report this job$",
+    r"^promoted$",
+    r"^actively recruiting$",
+    r"^\d+\+? (applicants|people clicked apply)",
+    r"^see how you compare",
+    r"equal (employment )?opportunity employer",
+    r"without regard to (race|color|religion)",
+    r"reasonable accommodation",
+    r"^(by applying|we use cookies|this site uses cookies)",
+    r"privacy (policy|notice)",
+)]
+
+
+class OrcamentoDeTokensExcedido(ValueError):
+    """O prompt não cabe no orçamento de tokens mesmo após compactação."""
+
+
+def estimar_tokens(texto):
+    """Estimativa local e rápida do número de tokens de um texto."""
+    return (len(texto) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def _eh_continuacao(linha_original, anterior):
+    """Indica se a linha é continuação de uma quebra de linha forçada (texto extraído de PDF)."""
+    if not anterior:
+        return False
+    if linha_original[:1] in (" ", "\t") or anterior.endswith(","):
+        return True
+    return linha_original[:1].islower() and not anterior.endswith(('.', ':', '!', '?'))
+
+
+def compactar_cv_base(texto):
+    """Reflui linhas quebradas e remove espaços, linhas em branco e linhas repetidas do CV_Base."""
+    linhas = []
+    anterior_em_branco = True
+    for linha_original in texto.splitlines():
+        linha = " ".join(linha_original.split())
+        if not linha:
+            anterior_em_branco = True
+            continue
+        if linhas and not anterior_em_branco and _eh_continuacao(linha_original, linhas[-1]):
+            linhas[-1] = f"{linhas[-1]} {linha}"
+        else:
+            linhas.append(linha)
+        anterior_em_branco = False
+
+    vistas = set()
+    compactadas = []
+    for linha in linhas:
+        # Linhas curtas (títulos, empresas) podem se repetir legitimamente.
+        longa = len(linha) >= MIN_REPEATED_LINE_CHARS
+        if (longa and linha in vistas) or (compactadas and compactadas[-1] == linha):
+            continue
+        vistas.add(linha)
+        compactadas.append(linha)
+    return "\n".join(compactadas)
+
+
+def compactar_dicionario(texto):
+    """Remove a indentação do modelo JSON do Dicionario."""
+    try:
+        return json.dumps(json.loads(texto), separators=(',', ':'), ensure_ascii=False)
+    except json.JSONDecodeError:
+        return " ".join(texto.split())
+
+
+def limpar_vaga(texto):
+    """Remove linhas de boilerplate, espaços e linhas repetidas da descrição da vaga."""
+    linhas = []
+    vistas = set()
+    for linha in texto.splitlines():
+        linha = " ".join(linha.split())
+        if not linha or linha in vistas:
+            continue
+        if any(padrao.search(linha) for padrao in BOILERPLATE_PATTERNS):
+            continue
+        vistas.add(linha)
+        linhas.append(linha)
+    return "\n".join(linhas)
+
+
+def _truncar_para_tokens(texto, max_tokens):
+    """Corta o texto no último fim de linha (ou palavra) que caiba em `max_tokens`."""
+    limite = max(0, max_tokens * CHARS_PER_TOKEN - len(JOB_TRUNCATION_MARKER) - 1)
+    if len(texto) <= limite:
+        return texto
+    corte = texto.rfind("\n", 0, limite)
+    if corte <= 0:
+        corte = texto.rfind(" ", 0, limite)
+    return texto[:max(corte, 0)].rstrip() + "\n" + JOB_TRUNCATION_MARKER
+
+
+def construir_prompt(template, cvbase_content, dicionario_content, job_description,
+                     max_tokens=MAX_PROMPT_TOKENS, **extras):
+    """Monta o prompt com as entradas compactadas, respeitando o orçamento de tokens.
+
+    Se necessário, apenas a descrição da vaga é truncada; se nem assim couber, levanta
+    `OrcamentoDeTokensExcedido`. `extras` preenche outros campos do template (ex.: secao).
+    Retorna (prompt, tokens_estimados).
+    """
+    cvbase_content = compactar_cv_base(cvbase_content)
+    dicionario_content = compactar_dicionario(dicionario_content)
+    job_description = limpar_vaga(job_description)
+
+    def montar(vaga):
+        return template.format(
+            cvbase_content=cvbase_content,
+            job_description=vaga,
+            dicionario_base_content=dicionario_content,
+            **extras,
+        )
+
+    prompt = montar(job_description)
+    tokens = estimar_tokens(prompt)
+    if max_tokens is not None and tokens > max_tokens:
+        disponivel = max_tokens - estimar_tokens(montar(""))
+        if disponivel <= 0:
+            raise OrcamentoDeTokensExcedido(
+                f"O prompt sem a vaga já usa ~{tokens - estimar_tokens(job_description)} tokens "
+                f"(orçamento: {max_tokens}).")
+        prompt = montar(_truncar_para_tokens(job_description, disponivel))
+        tokens = estimar_tokens(prompt)
+    return prompt, tokens
+
+
+class UsoDeTokens:
+    """Acumula os tokens de entrada/saída de todas as chamadas ao Gemini no processo."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.chamadas = 0
+        self.tokens_entrada = 0
+        self.tokens_saida = 0
+        # Exibir cada chamada só faz sentido no terminal (`cli.py generate --verbose`); em
+        # lote, no serviço e nos testes o uso fica nas métricas `tokens_total`.
+        self.exibir = False
+
+    def registrar(self, usage_metadata, tokens_estimados=None, texto_resposta=""):
+        """Registra o uso informado pelo Gemini em `usage_metadata` (e o exibe, com `exibir`).
+
+        Se a resposta não trouxer a contagem (ex.: stub ou streaming interrompido), usa a
+        estimativa local do prompt e do texto recebido.
+        """
+        entrada = getattr(usage_metadata, "prompt_token_count", None)
+        saida = getattr(usage_metadata, "candidates_token_count", None)
+        if not isinstance(entrada, int):
+            entrada = tokens_estimados or 0
+        if not isinstance(saida, int):
+            saida = estimar_tokens(texto_resposta or "")
+        with self._lock:
+            self.chamadas += 1
+            self.tokens_entrada += entrada
+            self.tokens_saida += saida
+        metricas.incrementar("tokens_total", entrada, tipo="entrada")
+        metricas.incrementar("tokens_total", saida, tipo="saida")
+        if self.exibir:
+            print(f"Tokens: entrada={entrada} saída={saida}"
+                  + (f" (estimativa local da entrada: {tokens_estimados})" if tokens_estimados else ""))
+        return entrada, saida
+
+
+uso_tokens = UsoDeTokens()
@@ -0,0 +1,128 @@
+import argparse
+import itertools
+import json
+import os
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from main import render_cv, ler_arquivo
+from resources import obter_pool
+
+# Constantes
+DEFAULT_CHUNKSIZE = 8
+# Blocos em andamento (enviados e ainda não entregues) por processo: mantém os workers
+# ocupados sem ler todos os jobs nem acumular todos os resultados em memória.
+IN_FLIGHT_CHUNKS_PER_WORKER = 2
+
+
+def _inicializar_worker():
+    """Carrega fontes e ícones uma única vez em cada processo do pool."""
+    obter_pool()
+
+
+def _renderizar_chunk(jobs):
+    """Renderiza uma sequência de (cv_content, output_path) dentro de um worker."""
+    resultados = []
+    for cv_content, output_path in jobs:
+        inicio = time.perf_counter()
+        try:
+            render_cv(cv_content, output_path)
+            erro = None
+        except Exception as e:
+            erro = f"{type(e).__name__}: {e}"
+        resultados.append({
+            "output_path": output_path,
+            "erro": erro,
+            "ms": (time.perf_counter() - inicio) * 1000,
+            "pid": os.getpid(),
+        })
+    return resultados
+
+
+def _dividir(jobs, chunksize):
+    chunk = []
+    for job in jobs:
+        chunk.append(job)
+        if len(chunk) >= chunksize:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def renderizar_em_lote(jobs, workers=None, chunksize=DEFAULT_CHUNKSIZE, ordenado=True):
+    """Distribui a renderização de vários CVs entre processos com fontes já carregadas.
+
+    `jobs` é um iterável de tuplas (cv_content, output_path). Os jobs são enviados em
+    blocos de `chunksize` para reduzir o custo de comunicação entre processos. Com
+    `ordenado=True` os resultados saem na ordem de entrada; caso contrário, na ordem em
+    que ficam prontos. Gera um dicionário por job com `output_path`, `erro` e `ms`.
+
+    No máximo `IN_FLIGHT_CHUNKS_PER_WORKER` blocos por processo ficam em andamento; um
+    novo bloco é lido de `jobs` e enviado à medida que os anteriores são entregues.
+    """
+    workers = workers or os.cpu_count() or 1
+    limite = workers * IN_FLIGHT_CHUNKS_PER_WORKER
+    chunks = _dividir(jobs, max(1, chunksize))
+    with ProcessPoolExecutor(max_workers=workers, initializer=_inicializar_worker) as executor:
+        def enviar(quantidade):
+            for chunk in itertools.islice(chunks, quantidade):
+                yield executor.submit(_renderizar_chunk, chunk)
+
+        if ordenado:
+            futuros = deque(enviar(limite))
+            while futuros:
+                resultados = futuros.popleft().result()
+                futuros.extend(enviar(1))
+                yield from resultados
+        else:
+            pendentes = set(enviar(limite))
+            while pendentes:
+                prontos, pendentes = wait(pendentes, return_when=FIRST_COMPLETED)
+                pendentes.update(enviar(len(prontos)))
+                for futuro in prontos:
+                    yield from futuro.result()
+
+
+def jobs_de_arquivos_json(caminhos, output_dir=None):
+    """Monta os jobs de renderização a partir de CVs adaptados salvos em JSON.
+
+    Arquivos ilegíveis ou com JSON inválido são avisados e pulados, sem interromper o lote.
+    """
+    for caminho in caminhos:
+        conteudo = ler_arquivo(caminho)
+        if conteudo is None:
+            continue
+        try:
+            cv_content = json.loads(conteudo)
+        except json.JSONDecodeError as e:
+            print(f"Erro ao decodificar JSON de '{caminho}': {e}")
+            continue
+        base = os.path.splitext(caminho)[0]
+        if output_dir:
+            base = os.path.join(output_dir, os.path.basename(base))
+        yield cv_content, base + ".pdf"
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Renderiza vários CVs adaptados (JSON) em paralelo.")
+    parser.add_argument("arquivos", nargs="+", help="Arquivos JSON de CVs adaptados.")
+    parser.add_argument("--saida", help="Diretório dos PDFs (padrão: ao lado de cada JSON).")
+    parser.add_argument("--workers", type=int, default=None, help="Número de processos (padrão: núcleos da CPU).")
+    parser.add_argument("--chunksize", type=int, default=DEFAULT_CHUNKSIZE, help="Jobs enviados por vez a cada processo.")
+    parser.add_argument("--fora-de-ordem", action="store_true", help="Entrega os resultados à medida que ficam prontos.")
+    args = parser.parse_args()
+
+    if args.saida:
+        os.makedirs(args.saida, exist_ok=True)
+    inicio = time.perf_counter()
+    total = falhas = 0
+    for resultado in renderizar_em_lote(jobs_de_arquivos_json(args.arquivos, args.saida), args.workers,
+                                        args.chunksize, ordenado=not args.fora_de_ordem):
+        total += 1
+        if resultado["erro"]:
+            falhas += 1
+            print(f"Erro ao renderizar {resultado['output_path']}: {resultado['erro']}")
+    duracao = time.perf_counter() - inicio
+    print(f"{total - falhas} CVs renderizados, {falhas} falhas, {total / duracao:.1f} CVs/s.")
@@ -0,0 +1,277 @@
+import base64
+import hashlib
+import io
+import json
+import os
+import threading
+from types import MappingProxyType
+
+import fontTools
+import fpdf
+from fontTools import subset as ftsubset
+from fontTools import ttLib
+from fpdf.enums import FontDescriptorFlags, TextEmphasis
+from fpdf.fonts import PDFFontDescriptor, SubsetMap, TTFFont
+from fpdf.image_datastructures import ImageCache
+from fpdf.image_parsing import preload_image
+
+from layout import MedidorDeTexto
+from sanitizacao import Sanitizador
+
+# Constantes
+FONT_FILES = (
+    ('Montserrat', '', 'Montserrat-Regular.ttf'),
+    ('Montserrat', 'B', 'Montserrat-Bold.ttf'),
+    ('Montserrat', 'I', 'Montserrat-Italic.ttf'),
+    ('Montserrat-Thin', '', 'Montserrat-Thin.ttf'),
+    ('OpenSans', '', 'OpenSans-Regular.ttf'),
+    ('OpenSans', 'B', 'OpenSans-Bold.ttf'),
+)
+ICON_FILES = ("phone_icon.png", "email_icon.png", "linkedin_icon.png", "location_icon.png")
+FONT_METRICS_CACHE = ".font_metrics.json"
+# Incrementar quando o formato das métricas salvas mudar.
+FONT_METRICS_FORMAT = 3
+# Versão do fpdf2 (fixada no requirements.txt) cujos atributos internos do TTFFont
+# `FonteCarregada.nova_instancia` reproduz. Em outra versão as fontes são registradas
+# pelo `add_font`, mais lento (parse completo por documento), porém sempre correto.
+FPDF2_TTFFONT_VERSION = "2.8.3"
+
+
+def _versao_cache():
+    """Versão do cache de métricas: invalida o arquivo se o formato ou as bibliotecas mudarem."""
+    return f"{FONT_METRICS_FORMAT}:{fpdf.__version__}:{fontTools.version}"
+
+
+def _subset_previo(dados):
+    """Descarta da fonte, uma única vez, o que o fpdf2 não usa, mantendo todo o cmap.
+
+    O fpdf2 refaz o subset de cada fonte a cada `output()`; sem as tabelas de layout
+    (GSUB/GPOS/GDEF, que ele descarta na saída), os glifos só referenciados por elas e
+    os subtables legados do cmap, esse passo fica bem mais barato. Todos os caracteres
+    com glifo na fonte original continuam com glifo.
+    """
+    ttfont = ttLib.TTFont(io.BytesIO(dados), recalcTimestamp=False, fontNumber=0)
+    options = ftsubset.Options(notdef_outline=True, recommended_glyphs=True, glyph_names=True,
+                               name_IDs=['*'], layout_features=[])
+    options.drop_tables += ["GSUB", "GPOS", "GDEF"]
+    subsetter = ftsubset.Subsetter(options)
+    subsetter.populate(unicodes=ttfont.getBestCmap().keys())
+    subsetter.subset(ttfont)
+    saida = io.BytesIO()
+    ttfont.save(saida)
+    return saida.getvalue()
+
+
+class _FPDFVazio:
+    """Substituto mínimo de FPDF usado apenas para extrair as métricas de um TTFFont."""
+    fonts = {}
+
+
+def _extrair_metricas(dados, family, style):
+    """Faz o subset prévio e o parse completo do TTF (via fpdf2); retorna tudo em formato serializável."""
+    fontkey = f"{family.lower()}{style}"
+    dados_subset = _subset_previo(dados)
+    font = TTFFont(_FPDFVazio(), io.BytesIO(dados_subset), fontkey, style)
+    try:
+        tem_notdef = "glyf" not in font.ttfont or ".notdef" in font.ttfont.getGlyphOrder()
+        desc = font.desc
+        return {
+            "sha256": hashlib.sha256(dados).hexdigest(),
+            "subset": base64.b64encode(dados_subset).decode('ascii'),
+            "tem_notdef": tem_notdef,
+            "scale": font.scale,
+            "desc": {
+                "ascent": desc.ascent,
+                "descent": desc.descent,
+                "cap_height": desc.cap_height,
+                "flags": desc.flags.value,
+                "font_b_box": desc.font_b_box,
+                "italic_angle": desc.italic_angle,
+                "stem_v": desc.stem_v,
+                "missing_width": desc.missing_width,
+            },
+            "cw": {str(codigo): largura for codigo, largura in font.cw.items()},
+            "cmap": {str(codigo): glifo for codigo, glifo in font.cmap.items()},
+            "glyph_ids": {str(codigo): gid for codigo, gid in font.glyph_ids.items()},
+            "name": font.name,
+            "up": font.up,
+            "ut": font.ut,
+            "sp": font.sp,
+            "ss": font.ss,
+        }
+    finally:
+        font.close()
+
+
+class _Larguras(dict):
+    """Larguras dos glifos (como `TTFFont.cw`); códigos ausentes valem `missing_width`.
+
+    Ao contrário do `defaultdict` do fpdf2, consultar um código ausente não insere a chave,
+    então a mesma tabela pode ser lida por vários documentos e threads ao mesmo tempo.
+    """
+
+    def __init__(self, larguras, missing_width):
+        super().__init__(larguras)
+        self.missing_width = missing_width
+
+    def __missing__(self, codigo):
+        return self.missing_width
+
+
+class FonteCarregada:
+    """Fonte TTF já reduzida (subset prévio) e com as métricas calculadas, compartilhada entre documentos."""
+
+    def __init__(self, family, style, caminho, metricas):
+        self.family = family
+        self.style = style
+        self.fontkey = f"{family.lower()}{style}"
+        self.caminho = caminho
+        self.dados = base64.b64decode(metricas["subset"])
+        self.metricas = metricas
+        self.scale = metricas["scale"]
+        # Compartilhados por todos os documentos: só leitura (ver `nova_instancia`).
+        self.cw = _Larguras(((int(codigo), largura) for codigo, largura in metricas["cw"].items()),
+                            metricas["desc"]["missing_width"])
+        self.cmap = MappingProxyType({int(codigo): glifo for codigo, glifo in metricas["cmap"].items()})
+        self.glyph_ids = MappingProxyType({int(codigo): gid for codigo, gid in metricas["glyph_ids"].items()})
+
+    def nova_instancia(self, indice):
+        """Cria o TTFFont de um documento sem refazer o parse das tabelas da fonte.
+
+        O subset (glifos usados) e o TTFont do fontTools precisam ser próprios de cada
+        documento, pois o fpdf2 os altera ao gerar o PDF; o resto é reaproveitado. As tabelas
+        `cw`, `cmap` e `glyph_ids` são compartilhadas e o fpdf2 só as lê.
+        Depende dos atributos internos do TTFFont de `FPDF2_TTFFONT_VERSION`.
+        """
+        metricas = self.metricas
+        font = TTFFont.__new__(TTFFont)
+        font.i = indice
+        font.type = "TTF"
+        font.ttffile = self.caminho
+        font.fontkey = self.fontkey
+        font.ttfont = ttLib.TTFont(io.BytesIO(self.dados), recalcTimestamp=False, fontNumber=0, lazy=True)
+        font.scale = self.scale
+        desc = dict(metricas["desc"])
+        desc["flags"] = FontDescriptorFlags(desc["flags"])
+        font.desc = PDFFontDescriptor(**desc)
+        font.cw = self.cw
+        font.cmap = self.cmap
+        font.glyph_ids = self.glyph_ids
+        font.missing_glyphs = []
+        font.name = metricas["name"]
+        font.up = metricas["up"]
+        font.ut = metricas["ut"]
+        font.sp = metricas["sp"]
+        font.ss = metricas["ss"]
+        font.emphasis = TextEmphasis.coerce(self.style)
+        font.subset = SubsetMap(font)
+        return font
+
+
+class PoolDeRecursos:
+    """Fontes e ícones carregados uma única vez por processo e reaproveitados por todo `PDF`.
+
+    As fontes reduzidas e suas métricas ficam salvas em `FONT_METRICS_CACHE`, validadas pela
+    versão do formato/bibliotecas e pelo SHA-256 de cada TTF, evitando o subset e o parse
+    completo a cada execução. As fontes só entram no documento quando usadas em `set_font`.
+    """
+
+    def __init__(self, fontes=FONT_FILES, icones=ICON_FILES, cache_metricas=FONT_METRICS_CACHE):
+        self.fontes = {}
+        self.imagens = {}
+        self._carregar_fontes(fontes, cache_metricas)
+        self._carregar_icones(icones)
+        self.sanitizador = Sanitizador(self.cobertura())
+        self.medidor = MedidorDeTexto({fontkey: fonte.cw for fontkey, fonte in self.fontes.items()})
+
+    def _carregar_fontes(self, fontes, cache_metricas):
+        salvas = self._ler_cache_metricas(cache_metricas)
+        atualizado = False
+        for family, style, arquivo in fontes:
+            with open(arquivo, 'rb') as f:
+                dados = f.read()
+            metricas = salvas.get(arquivo)
+            if metricas is None or metricas.get("sha256") != hashlib.sha256(dados).hexdigest():
+                metricas = _extrair_metricas(dados, family, style)
+                salvas[arquivo] = metricas
+                atualizado = True
+            fonte = FonteCarregada(family, style, arquivo, metricas)
+            self.fontes[fonte.fontkey] = fonte
+        if atualizado and cache_metricas:
+            self._salvar_cache_metricas(cache_metricas, salvas)
+
+    @staticmethod
+    def _ler_cache_metricas(caminho):
+        if not caminho:
+            return {}
+        try:
+            with open(caminho, 'r', encoding='utf-8') as arquivo:
+                dados = json.load(arquivo)
+        except (OSError, ValueError):
+            return {}
+        if not isinstance(dados, dict) or dados.get("versao") != _versao_cache():
+            return {}
+        fontes = dados.get("fontes")
+        return fontes if isinstance(fontes, dict) else {}
+
+    @staticmethod
+    def _salvar_cache_metricas(caminho, fontes):
+        temporario = f"{caminho}.{os.getpid()}.tmp"
+        try:
+            with open(temporario, 'w', encoding='utf-8') as arquivo:
+                json.dump({"versao": _versao_cache(), "fontes": fontes}, arquivo)
+            os.replace(temporario, caminho)
+        except OSError as e:
+            print(f"Aviso: não foi possível salvar o cache de métricas das fontes: {e}")
+
+    def cobertura(self):
+        """Code points com glifo em todas as fontes do pool.
+
+        Vem do cmap completo de cada TTF (o subset prévio não remove caracteres), então
+        letras de outros alfabetos cobertos pelas fontes, como o cirílico, não são trocadas.
+        """
+        cmaps = [fonte.cmap.keys() for fonte in self.fontes.values()]
+        return frozenset.intersection(*map(frozenset, cmaps)) if cmaps else frozenset()
+
+    def _carregar_icones(self, icones):
+        image_cache = ImageCache()
+        for icone in icones:
+            nome, _, info = preload_image(image_cache, icone)
+            self.imagens[nome] = info
+
+    def registrar_fonte(self, pdf, fontkey):
+        """Registra no documento a fonte `fontkey`, se ela fizer parte do pool."""
+        fonte = self.fontes.get(fontkey)
+        if fonte is None or fontkey in pdf.fonts:
+            return
+        if not fonte.metricas["tem_notdef"] or fpdf.__version__ != FPDF2_TTFFONT_VERSION:
+            # O fpdf2 desenha um .notdef substituto no TTFont, ou o TTFFont desta versão
+            # pode ter outros atributos; nesses casos usa o caminho normal.
+            pdf.add_font(fonte.family, fonte.style, fonte.caminho)
+            return
+        pdf.fonts[fontkey] = fonte.nova_instancia(len(pdf.fonts) + 1)
+
+    def aplicar(self, pdf):
+        """Registra os ícones já decodificados em uma instância de FPDF."""
+        imagens = pdf.image_cache.images
+        for nome, info in self.imagens.items():
+            if nome in imagens:
+                continue
+            copia = type(info)(info)
+            copia["i"] = len(imagens) + 1
+            copia["usages"] = 0
+            imagens[nome] = copia
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def obter_pool():
+    """Retorna o pool de recursos do processo, carregando-o na primeira chamada."""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = PoolDeRecursos()
+    return _pool
@@ -0,0 +1,149 @@
+import re
+import unicodedata
+
+# Constantes
+# Pontuação tipográfica trocada pelo equivalente ASCII mesmo quando a fonte tem o glifo.
+ASCII_REPLACEMENTS = {
+    '\u2018': "'",
+    '\u2019': "'",
+    '\u201a': "'",
+    '\u201c': '"',
+    '\u201d': '"',
+    '\u201e': '"',
+    '\u2013': "-",
+    '\u2014': "-",
+    '\u2026': "...",
+}
+# Caracteres de controle que o layout interpreta (quebras de linha e tabulação).
+CONTROL_CHARS = "\t\n\r"
+MISSING_GLYPH_REPLACEMENT = "?"
+
+
+def _classe_de_caracteres(codigos):
+    """Conteúdo de uma classe de expressão regular com os code points informados, em faixas."""
+    faixas = []
+    for codigo in sorted(codigos):
+        if faixas and codigo == faixas[-1][1] + 1:
+            faixas[-1][1] = codigo
+        else:
+            faixas.append([codigo, codigo])
+    return "".join(re.escape(chr(inicio)) if inicio == fim else f"{re.escape(chr(inicio))}-{re.escape(chr(fim))}"
+                   for inicio, fim in faixas)
+
+
+class _TabelaDeTraducao(dict):
+    """Tabela para `str.translate` preenchida sob demanda: cada caractere é resolvido uma vez."""
+
+    def __init__(self, resolver):
+        super().__init__()
+        self._resolver = resolver
+
+    def __missing__(self, codigo):
+        substituto = self[codigo] = self._resolver(chr(codigo))
+        return substituto
+
+
+class Sanitizador:
+    """Troca os caracteres sem glifo nas fontes por equivalentes renderizáveis.
+
+    `cobertura` é o conjunto de code points com glifo (ver `resources.PoolDeRecursos.cobertura`).
+    Para cada caractere fora dela tenta-se, em ordem: `ASCII_REPLACEMENTS`, a forma NFKC
+    (ex.: a ligadura "fi" vira "f" + "i"), a forma NFKD sem acentos e, por fim, "?"; caracteres
+    de controle e de formatação invisíveis (zero-width, BOM) são removidos. O resultado de cada caractere
+    fica na tabela do `str.translate`, então o custo de resolução é pago só na primeira vez.
+
+    Texto só com ASCII ou Latin-1 (o caso comum) é devolvido como está, como fazia a antiga
+    cadeia de `str.replace`: `str.isascii` e a codificação em Latin-1 são feitas em C, sem
+    percorrer o texto em Python. Nos demais textos a pontuação tipográfica é trocada com
+    `str.replace` e só os trechos restantes fora do Latin-1 (ou com caracteres de controle)
+    passam pela tabela. Ver `python benchmarks.py sanitizar`.
+    """
+
+    def __init__(self, cobertura):
+        self.cobertura = frozenset(cobertura) | {ord(c) for c in CONTROL_CHARS}
+        self._tabela = _TabelaDeTraducao(self._resolver)
+        for caractere, substituto in ASCII_REPLACEMENTS.items():
+            self._tabela[ord(caractere)] = substituto
+        # O caminho rápido só vale se as fontes cobrirem todo o Latin-1 imprimível.
+        self._latin1_coberto = all(codigo in self.cobertura for codigo in range(0x100)
+                                   if chr(codigo).isprintable())
+        # Nos demais textos, trechos fora do Latin-1 com glifo e visível passam pela tabela.
+        seguros = (codigo for codigo in range(0x100) if codigo in self.cobertura and (
+            chr(codigo) in CONTROL_CHARS or unicodedata.category(chr(codigo)) not in ("Cc", "Cf")))
+        self._a_trocar = re.compile(f"[^{_classe_de_caracteres(seguros)}]+")
+
+    def _coberto(self, texto):
+        return all(ord(c) in self.cobertura for c in texto)
+
+    def _resolver(self, caractere):
+        codigo = ord(caractere)
+        if codigo in self.cobertura:
+            return codigo
+        normalizado = unicodedata.normalize("NFKC", caractere)
+        normalizado = "".join(ASCII_REPLACEMENTS.get(c, c) for c in normalizado)
+        if normalizado != caractere and self._coberto(normalizado):
+            return normalizado
+        sem_acentos = "".join(c for c in unicodedata.normalize("NFKD", caractere) if not unicodedata.combining(c))
+        if sem_acentos and sem_acentos != caractere and self._coberto(sem_acentos):
+            return sem_acentos
+        if unicodedata.category(caractere) in ("Cc", "Cf"):
+            return None
+        return MISSING_GLYPH_REPLACEMENT
+
+    def _seguro(self, texto):
+        if not self._latin1_coberto:
+            return False
+        if texto.isascii():
+            return True
+        try:
+            texto.encode('latin-1')
+        except UnicodeEncodeError:
+            return False
+        return True
+
+    def _trocar(self, original):
+        # Pontuação tipográfica é o caso mais comum fora do Latin-1: trocada ainda em C.
+        texto = original
+        for caractere, substituto in ASCII_REPLACEMENTS.items():
+            if caractere in texto:
+                texto = texto.replace(caractere, substituto)
+        if self._seguro(texto):
+            return texto
+        texto = self._a_trocar.sub(lambda trecho: trecho.group().translate(self._tabela), texto)
+        return original if texto == original else texto
+
+    def __call__(self, texto):
+        """Retorna `texto` só com caracteres renderizáveis pelas fontes (o próprio objeto, se nada mudar)."""
+        return texto if self._seguro(texto) else self._trocar(texto)
+
+    def sanitizar_cv(self, cv_content):
+        """Sanitiza todos os textos de um CV (dicionários e listas aninhados), sem alterar as chaves.
+
+        Só os dicionários e listas com algum texto alterado são copiados; se nada mudar, o
+        próprio `cv_content` é retornado.
+        """
+        if isinstance(cv_content, str):
+            return self(cv_content)
+        if isinstance(cv_content, dict):
+            itens = cv_content.items()
+        elif isinstance(cv_content, list):
+            itens = enumerate(cv_content)
+        else:
+            return cv_content
+        rapido = self._latin1_coberto
+        copia = None
+        for chave, item in itens:
+            if isinstance(item, str):
+                # `isascii` é O(1): a maioria das células nem chega a chamar `self`.
+                if rapido and item.isascii():
+                    continue
+                novo = self(item)
+            elif isinstance(item, (dict, list)):
+                novo = self.sanitizar_cv(item)
+            else:
+                continue
+            if novo is not item:
+                if copia is None:
+                    copia = dict(cv_content) if isinstance(cv_content, dict) else list(cv_content)
+                copia[chave] = novo
+        return cv_content if copia is None else copia
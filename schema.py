@@ -0,0 +1,143 @@
+import json
+from functools import lru_cache
+
+# Constantes
+DICIONARIO_FILENAME = "Dicionario"
+SKILL_MAX_LENGTH = 21  # O prompt limita cada skill a 21 letras.
+
+
+def _schema_do_exemplo(valor):
+    """Infere o schema (formato `response_schema` do SDK do Gemini) a partir de um valor de exemplo."""
+    if isinstance(valor, dict):
+        return {
+            "type": "OBJECT",
+            "properties": {chave: _schema_do_exemplo(item) for chave, item in valor.items()},
+            "required": list(valor),
+            "property_ordering": list(valor),
+        }
+    if isinstance(valor, list):
+        return {"type": "ARRAY", "items": _schema_do_exemplo(valor[0]) if valor else {"type": "STRING"}}
+    if isinstance(valor, bool):
+        return {"type": "BOOLEAN"}
+    if isinstance(valor, (int, float)):
+        return {"type": "NUMBER"}
+    return {"type": "STRING"}
+
+
+def schema_do_dicionario(texto):
+    """Gera o schema formal do CV a partir do modelo de exemplo do arquivo Dicionario."""
+    schema = _schema_do_exemplo(json.loads(texto))
+    skills = schema["properties"].get("skills")
+    if skills and skills["type"] == "ARRAY":
+        skills["items"]["max_length"] = SKILL_MAX_LENGTH
+    return schema
+
+
+@lru_cache(maxsize=None)
+def carregar_schema(caminho=DICIONARIO_FILENAME):
+    """Lê o Dicionario e retorna o schema do CV (calculado uma vez por processo)."""
+    with open(caminho, 'r', encoding='utf-8') as arquivo:
+        return schema_do_dicionario(arquivo.read())
+
+
+def config_structured_output(schema):
+    """Configuração do SDK para que o modelo responda JSON obedecendo a `schema`."""
+    return {"response_mime_type": "application/json", "response_schema": schema}
+
+
+def validar_valor(valor, schema):
+    """Valida `valor` contra `schema`; retorna None se válido ou a descrição do problema."""
+    tipo = schema.get("type")
+    if tipo == "OBJECT":
+        if not isinstance(valor, dict):
+            return "deveria ser um objeto"
+        for chave, sub_schema in schema.get("properties", {}).items():
+            if chave not in valor:
+                if chave in schema.get("required", ()):
+                    return f"campo '{chave}' ausente"
+                continue
+            problema = validar_valor(valor[chave], sub_schema)
+            if problema:
+                return f"campo '{chave}' {problema}"
+        return None
+    if tipo == "ARRAY":
+        if not isinstance(valor, list):
+            return "deveria ser uma lista"
+        for indice, item in enumerate(valor):
+            problema = validar_valor(item, schema.get("items", {}))
+            if problema:
+                return f"item {indice}: {problema}"
+        return None
+    if tipo == "STRING":
+        return None if isinstance(valor, str) else "deveria ser texto"
+    if tipo == "NUMBER":
+        return None if isinstance(valor, (int, float)) and not isinstance(valor, bool) else "deveria ser número"
+    if tipo == "BOOLEAN":
+        return None if isinstance(valor, bool) else "deveria ser booleano"
+    return None
+
+
+def validadores_do_schema(schema):
+    """Um validador por seção de primeiro nível, no formato usado pelo parser incremental.
+
+    Só reprova o que `reparar_valor` não consegue corrigir localmente.
+    """
+    return {
+        secao: (lambda valor, sub_schema=sub_schema: validar_valor(reparar_valor(valor, sub_schema), sub_schema))
+        for secao, sub_schema in schema.get("properties", {}).items()
+    }
+
+
+def reparar_valor(valor, schema):
+    """Tenta corrigir desvios comuns do modelo sem nova chamada (tipos trocados, campos faltando)."""
+    tipo = schema.get("type")
+    if tipo == "OBJECT":
+        if not isinstance(valor, dict):
+            return valor
+        reparado = dict(valor)
+        for chave, sub_schema in schema.get("properties", {}).items():
+            if chave in reparado:
+                reparado[chave] = reparar_valor(reparado[chave], sub_schema)
+            elif chave in schema.get("required", ()) and sub_schema.get("type") == "STRING":
+                reparado[chave] = ""
+        return reparado
+    if tipo == "ARRAY":
+        itens = schema.get("items", {})
+        if isinstance(valor, dict):
+            # Ex.: skills como {"Python": 5} ou um único objeto em vez de lista.
+            valor = list(valor) if itens.get("type") == "STRING" else [valor]
+        elif isinstance(valor, str) and itens.get("type") == "STRING":
+            valor = [parte.strip() for parte in valor.replace("\n", ",").split(",") if parte.strip()]
+        if isinstance(valor, list):
+            return [reparar_valor(item, itens) for item in valor]
+        return valor
+    if tipo == "STRING":
+        if isinstance(valor, list) and all(isinstance(item, str) for item in valor):
+            return "\n".join(valor)
+        if isinstance(valor, (int, float)) and not isinstance(valor, bool):
+            return str(valor)
+    return valor
+
+
+def validar_e_reparar(cv_content, schema):
+    """Repara o que for possível localmente e retorna (cv_reparado, {secao: problema}) das seções inválidas."""
+    reparado = dict(cv_content)
+    falhas = {}
+    for secao, sub_schema in schema.get("properties", {}).items():
+        if secao not in reparado:
+            falhas[secao] = "seção ausente"
+            continue
+        reparado[secao] = reparar_valor(reparado[secao], sub_schema)
+        problema = validar_valor(reparado[secao], sub_schema)
+        if problema:
+            falhas[secao] = problema
+    return reparado, falhas
+
+
+def schema_da_secao(schema, secao):
+    """Schema de uma resposta contendo apenas a seção `secao` do CV."""
+    return {
+        "type": "OBJECT",
+        "properties": {secao: schema["properties"][secao]},
+        "required": [secao],
+    }
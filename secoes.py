@@ -0,0 +1,65 @@
+import re
+
+from prompt import compactar_cv_base, limpar_vaga
+
+# Títulos das seções no CV_Base que servem de entrada para cada seção do Dicionario.
+# None representa o bloco antes do primeiro título (nome e contatos).
+ENTRADAS_DAS_SECOES = {
+    "personal_information": (None,),
+    "profile": ("PROFILE", "SKILLS"),
+    "skills": ("SKILLS", "PROFESSIONAL EXPERIENCE"),
+    "languages": ("LANGUAGES",),
+    "certifications": ("CERTIFICATIONS",),
+    "professional_experience": ("PROFESSIONAL EXPERIENCE",),
+    "education": ("EDUCATION",),
+}
+# Seções reescritas para a vaga; as demais só são extraídas do CV_Base e não dependem dela.
+SECOES_ADAPTADAS = frozenset({"profile", "skills", "professional_experience"})
+
+STOPWORDS = frozenset("""
+a an and are as at be by for from has have in is it its of on or our the their this to we with will you your
+who what which that these those all any can may must should would about into over such than then them they
+o os as um uma uns umas e de da do das dos em no na nos nas para por com que se ao aos ou sua seu suas seus
+""".split())
+
+
+def dividir_cv_base(texto):
+    """Divide o CV_Base compactado em blocos por título (PROFILE, SKILLS, ...).
+
+    Retorna {titulo: conteudo}; o cabeçalho antes do primeiro título fica sob a chave None.
+    """
+    titulos = {titulo for entradas in ENTRADAS_DAS_SECOES.values() for titulo in entradas if titulo}
+    blocos = {None: []}
+    atual = None
+    for linha in compactar_cv_base(texto).splitlines():
+        if linha.strip().upper() in titulos and linha.strip().isupper():
+            atual = linha.strip().upper()
+            blocos[atual] = []
+        else:
+            blocos[atual].append(linha)
+    return {titulo: "\n".join(linhas) for titulo, linhas in blocos.items()}
+
+
+def entrada_da_secao(blocos, secao, cvbase_content):
+    """Texto do CV_Base relevante para `secao` (o CV inteiro se algum título não existir)."""
+    entradas = ENTRADAS_DAS_SECOES.get(secao)
+    if not entradas or any(titulo not in blocos for titulo in entradas):
+        return compactar_cv_base(cvbase_content)
+    return "\n".join(f"{titulo}\n{blocos[titulo]}" if titulo else blocos[titulo] for titulo in entradas)
+
+
+def termos_significativos(texto):
+    """Termos do texto em minúsculas, na ordem, sem stopwords (mantém "c++", "c#", "node.js")."""
+    for termo in re.findall(r"[^\W_][\w+#.\-]*", texto.lower()):
+        termo = termo.rstrip(".-")
+        if len(termo) > 1 and termo not in STOPWORDS:
+            yield termo
+
+
+def caracteristicas_vaga(texto):
+    """Termos significativos da vaga, sem ordem, caixa, repetições ou boilerplate.
+
+    Vagas que só diferem nesses aspectos produzem as mesmas características e, portanto,
+    reaproveitam as seções adaptadas em cache.
+    """
+    return " ".join(sorted(set(termos_significativos(limpar_vaga(texto)))))
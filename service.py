@@ -0,0 +1,164 @@
+"""Serviço HTTP (ASGI) de geração de CVs.
+
+Uso:
+    uvicorn service:app --host 0.0.0.0 --port 8000
+
+    curl -X POST localhost:8000/cv -H 'Content-Type: application/json' \
+         -d '{"job_description": "..."}' -o cv.pdf
+"""
+import asyncio
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from main import generate_cv, carregar_ambiente, estatisticas_conexoes, obter_cliente, DICIONARIO_BASE_FILENAME
+from metrics import metricas
+from resources import obter_pool
+from schema import carregar_schema
+
+# Constantes
+DEFAULT_WORKERS = int(os.environ.get("CV_SERVICE_WORKERS", 8))
+MAX_BODY_BYTES = 256 * 1024
+
+
+class _ErroHTTP(Exception):
+    def __init__(self, status, mensagem):
+        super().__init__(mensagem)
+        self.status = status
+
+
+class ServicoCV:
+    """Aplicação ASGI: POST /cv devolve o PDF gerado em memória para a vaga enviada.
+
+    Usa o cliente do Gemini compartilhado pelo processo (ou o `client` informado), com
+    conexões keep-alive reaproveitadas entre requisições, e o pool de fontes/ícones
+    aquecido durante o startup. A geração, que é
+    bloqueante, roda em um pool de `workers` threads para não travar o event loop.
+    Rotas: POST /cv (JSON {"job_description": ...} ou texto puro), GET /healthz e
+    GET /metrics (formato texto do Prometheus) e GET /conexoes (reuso de conexões).
+    """
+
+    def __init__(self, client=None, cache=None, workers=DEFAULT_WORKERS, streaming=False, por_secao=False):
+        self._client = client
+        self.cache = cache
+        self.streaming = streaming
+        self.por_secao = por_secao
+        self.executor = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="cv")
+
+    @property
+    def client(self):
+        return self._client or obter_cliente()
+
+    def aquecer(self):
+        """Carrega o .env, as fontes, os ícones e o schema antes da primeira requisição."""
+        carregar_ambiente()
+        obter_pool()
+        carregar_schema(DICIONARIO_BASE_FILENAME)
+
+    def gerar_pdf(self, job_description):
+        """Gera o CV e retorna os bytes do PDF (ou None em caso de erro)."""
+        try:
+            client = self.client
+        except Exception as e:
+            # Ex.: GOOGLE_API_KEY ausente; vira um 502 como as demais falhas de geração.
+            print(f"Erro ao criar o cliente do Gemini ({type(e).__name__}): {e}")
+            return None
+        return generate_cv(job_description, None, client, self.cache, streaming=self.streaming,
+                           por_secao=self.por_secao)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+            return
+        if scope["type"] != "http":
+            return
+        metodo, caminho = scope["method"], scope["path"]
+        try:
+            if caminho == "/cv" and metodo == "POST":
+                vaga = self._ler_vaga(await self._ler_corpo(receive), dict(scope.get("headers", [])))
+                loop = asyncio.get_running_loop()
+                with metricas.span("requisicao_http", rota="/cv"):
+                    pdf = await loop.run_in_executor(self.executor, self.gerar_pdf, vaga)
+                if pdf is None:
+                    raise _ErroHTTP(502, "Não foi possível gerar o CV.")
+                await self._responder(send, 200, pdf, b"application/pdf")
+            elif caminho == "/healthz" and metodo == "GET":
+                await self._responder(send, 200, b"ok", b"text/plain; charset=utf-8")
+            elif caminho == "/conexoes" and metodo == "GET":
+                await self._responder(send, 200, json.dumps(estatisticas_conexoes()).encode("utf-8"),
+                                      b"application/json")
+            elif caminho == "/metrics" and metodo == "GET":
+                await self._responder(send, 200, metricas.exportar_prometheus().encode("utf-8"),
+                                      b"text/plain; version=0.0.4; charset=utf-8")
+            else:
+                raise _ErroHTTP(404, "Rota não encontrada.")
+        except _ErroHTTP as e:
+            corpo = json.dumps({"erro": str(e)}, ensure_ascii=False).encode("utf-8")
+            await self._responder(send, e.status, corpo, b"application/json")
+
+    async def _lifespan(self, receive, send):
+        while True:
+            mensagem = await receive()
+            if mensagem["type"] == "lifespan.startup":
+                await asyncio.get_running_loop().run_in_executor(self.executor, self.aquecer)
+                await send({"type": "lifespan.startup.complete"})
+            elif mensagem["type"] == "lifespan.shutdown":
+                self.executor.shutdown(wait=False)
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    @staticmethod
+    async def _ler_corpo(receive):
+        partes = []
+        tamanho = 0
+        while True:
+            mensagem = await receive()
+            parte = mensagem.get("body", b"")
+            tamanho += len(parte)
+            if tamanho > MAX_BODY_BYTES:
+                raise _ErroHTTP(413, f"Corpo da requisição maior que {MAX_BODY_BYTES} bytes.")
+            partes.append(parte)
+            if not mensagem.get("more_body"):
+                return b"".join(partes)
+
+    @staticmethod
+    def _ler_vaga(corpo, headers):
+        try:
+            texto = corpo.decode("utf-8")
+        except UnicodeDecodeError:
+            raise _ErroHTTP(400, "O corpo deve estar em UTF-8.")
+        if headers.get(b"content-type", b"").startswith(b"application/json"):
+            try:
+                texto = json.loads(texto).get("job_description", "")
+            except (json.JSONDecodeError, AttributeError):
+                raise _ErroHTTP(400, 'Envie um objeto JSON {"job_description": "..."}.')
+        if not isinstance(texto, str) or not texto.strip():
+            raise _ErroHTTP(400, "Descrição da vaga vazia.")
+        return texto
+
+    @staticmethod
+    async def _responder(send, status, corpo, content_type):
+        metricas.incrementar("http_respostas_total", status=status)
+        await send({
+            "type": "http.response.start",
+            "status": status,
+            "headers": [(b"content-type", content_type), (b"content-length", str(len(corpo)).encode())],
+        })
+        await send({"type": "http.response.body", "body": corpo})
+
+
+app = ServicoCV()
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Serviço HTTP de geração de CVs.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    args = parser.parse_args()
+    try:
+        import uvicorn
+    except ImportError:
+        print("Erro: instale um servidor ASGI (ex.: pip install uvicorn) para executar o serviço.")
+        raise SystemExit(1)
+    uvicorn.run(app, host=args.host, port=args.port)
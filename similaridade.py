@@ -0,0 +1,174 @@
+import json
+import os
+import re
+import threading
+import zlib
+
+import numpy as np
+
+from prompt import limpar_vaga
+
+# Constantes
+DEFAULT_INDEX_DIR = ".indice_vagas"
+DEFAULT_THRESHOLD = 0.85
+NUM_PERMUTATIONS = 128
+LSH_BANDS = 16  # 16 bandas de 8 linhas: candidatos a partir de ~0.7 de similaridade.
+SHINGLE_SIZE = 3
+SEED = 20240601
+SIGNATURES_FILE = "assinaturas.bin"
+ENTRIES_FILE = "entradas.jsonl"
+
+
+def shingles(texto, tamanho=SHINGLE_SIZE):
+    """Conjunto de sequências de `tamanho` palavras da vaga normalizada (sem boilerplate)."""
+    palavras = re.findall(r"[^\W_][\w+#.\-]*", limpar_vaga(texto).lower())
+    if len(palavras) < tamanho:
+        return {" ".join(palavras)} if palavras else set()
+    return {" ".join(palavras[i:i + tamanho]) for i in range(len(palavras) - tamanho + 1)}
+
+
+class IndiceDeVagas:
+    """Índice local de similaridade entre vagas (MinHash + LSH), persistido em disco.
+
+    Cada vaga vira uma assinatura MinHash de `num_perm` valores; a fração de valores
+    iguais entre duas assinaturas estima a similaridade de Jaccard dos shingles das
+    vagas. As assinaturas são divididas em `bandas` para o LSH, de forma que uma busca
+    só compara a vaga com as poucas candidatas que colidem em alguma banda.
+
+    No diretório ficam `assinaturas.bin` (matriz uint32, uma linha por vaga) e
+    `entradas.jsonl` (id e dados de cada vaga, na mesma ordem), ambos só com append.
+    """
+
+    def __init__(self, diretorio=DEFAULT_INDEX_DIR, num_perm=NUM_PERMUTATIONS, bandas=LSH_BANDS, semente=SEED):
+        if num_perm % bandas:
+            raise ValueError("num_perm deve ser múltiplo de bandas.")
+        self.diretorio = diretorio
+        self.num_perm = num_perm
+        self.bandas = bandas
+        self.linhas_por_banda = num_perm // bandas
+        gerador = np.random.default_rng(semente)
+        # Hash multiply-shift: ((a * x + b) mod 2^64) >> 32, com `a` ímpar.
+        self._a = gerador.integers(1, 2 ** 63, num_perm, dtype=np.uint64) | np.uint64(1)
+        self._b = gerador.integers(0, 2 ** 63, num_perm, dtype=np.uint64)
+        self._mistura_banda = gerador.integers(1, 2 ** 63, self.linhas_por_banda, dtype=np.uint64) | np.uint64(1)
+        self._lock = threading.Lock()
+        self._assinaturas = np.empty((0, num_perm), dtype=np.uint32)
+        self._tamanho = 0
+        self._entradas = []
+        self._buckets = [{} for _ in range(bandas)]
+        os.makedirs(diretorio, exist_ok=True)
+        self._carregar()
+
+    def __len__(self):
+        return self._tamanho
+
+    def assinatura(self, texto):
+        """Assinatura MinHash (vetor uint32) da vaga, ou None se o texto não tiver shingles.
+
+        Sem shingles todas as vagas teriam a mesma assinatura e pareceriam idênticas entre si.
+        """
+        conjunto = shingles(texto)
+        if not conjunto:
+            return None
+        valores = np.fromiter((zlib.crc32(s.encode("utf-8")) for s in conjunto), dtype=np.uint64,
+                              count=len(conjunto))
+        hashes = (valores[:, None] * self._a + self._b) >> np.uint64(32)
+        return hashes.min(axis=0).astype(np.uint32)
+
+    def _chaves_bandas(self, assinaturas):
+        """Uma chave inteira por banda para cada assinatura (matriz n x bandas)."""
+        blocos = assinaturas.reshape(len(assinaturas), self.bandas, self.linhas_por_banda).astype(np.uint64)
+        return (blocos * self._mistura_banda).sum(axis=2)
+
+    def _indexar(self, inicio, fim):
+        chaves = self._chaves_bandas(self._assinaturas[inicio:fim])
+        for banda, bucket in enumerate(self._buckets):
+            for posicao, chave in enumerate(chaves[:, banda].tolist(), start=inicio):
+                bucket.setdefault(chave, []).append(posicao)
+
+    def _reservar(self, quantidade):
+        necessario = self._tamanho + quantidade
+        if necessario > len(self._assinaturas):
+            capacidade = max(necessario, 2 * len(self._assinaturas), 1024)
+            nova = np.empty((capacidade, self.num_perm), dtype=np.uint32)
+            nova[:self._tamanho] = self._assinaturas[:self._tamanho]
+            self._assinaturas = nova
+
+    def _carregar(self):
+        caminho_assinaturas = os.path.join(self.diretorio, SIGNATURES_FILE)
+        caminho_entradas = os.path.join(self.diretorio, ENTRIES_FILE)
+        if not os.path.exists(caminho_assinaturas) or not os.path.exists(caminho_entradas):
+            return
+        with open(caminho_entradas, encoding="utf-8") as arquivo:
+            entradas = []
+            for linha in arquivo:
+                try:
+                    entradas.append(json.loads(linha))
+                except json.JSONDecodeError:
+                    break  # Linha parcial de uma escrita interrompida.
+        assinaturas = np.fromfile(caminho_assinaturas, dtype=np.uint32)
+        # Após uma escrita interrompida, fica só o que está completo nos dois arquivos.
+        total = min(len(entradas), len(assinaturas) // self.num_perm)
+        self._reservar(total)
+        self._assinaturas[:total] = assinaturas[:total * self.num_perm].reshape(total, self.num_perm)
+        self._entradas = entradas[:total]
+        self._tamanho = total
+        self._indexar(0, total)
+
+    def adicionar(self, id_vaga, texto, dados=None):
+        """Insere uma vaga no índice (e no disco); retorna a posição dela, ou None se não tiver shingles."""
+        return self.adicionar_varios([(id_vaga, texto, dados)])[0]
+
+    def adicionar_varios(self, itens):
+        """Insere várias vagas (id, texto, dados) de uma vez, com uma única escrita em disco.
+
+        Retorna as posições na ordem de `itens`; vagas sem shingles não são indexadas (posição None).
+        """
+        itens = list(itens)
+        calculadas = [self.assinatura(texto) for _, texto, _ in itens]
+        indexados = [i for i, assinatura in enumerate(calculadas) if assinatura is not None]
+        posicoes = [None] * len(itens)
+        if not indexados:
+            return posicoes
+        assinaturas = np.stack([calculadas[i] for i in indexados])
+        entradas = [{"id": itens[i][0], "dados": itens[i][2]} for i in indexados]
+        with self._lock:
+            with open(os.path.join(self.diretorio, SIGNATURES_FILE), "ab") as arquivo:
+                arquivo.write(assinaturas.tobytes())
+            with open(os.path.join(self.diretorio, ENTRIES_FILE), "a", encoding="utf-8") as arquivo:
+                arquivo.writelines(json.dumps(entrada, ensure_ascii=False) + "\n" for entrada in entradas)
+            inicio = self._tamanho
+            self._reservar(len(entradas))
+            self._assinaturas[inicio:inicio + len(entradas)] = assinaturas
+            self._entradas.extend(entradas)
+            self._tamanho += len(entradas)
+            self._indexar(inicio, self._tamanho)
+        for posicao, i in enumerate(indexados, start=inicio):
+            posicoes[i] = posicao
+        return posicoes
+
+    def similares(self, texto, limiar=0.0, limite=5):
+        """Vagas candidatas pelo LSH com similaridade estimada >= `limiar`, da mais parecida à menos.
+
+        Retorna uma lista de (entrada, similaridade), onde entrada é {"id": ..., "dados": ...}.
+        """
+        assinatura = self.assinatura(texto)
+        if assinatura is None:
+            return []
+        chaves = self._chaves_bandas(assinatura[None, :])[0].tolist()
+        with self._lock:
+            candidatos = set()
+            for bucket, chave in zip(self._buckets, chaves):
+                candidatos.update(bucket.get(chave, ()))
+            if not candidatos:
+                return []
+            posicoes = np.fromiter(candidatos, dtype=np.int64, count=len(candidatos))
+            similaridades = (self._assinaturas[posicoes] == assinatura).mean(axis=1)
+            entradas = self._entradas
+        ordem = np.argsort(-similaridades)[:limite]
+        return [(entradas[posicoes[i]], float(similaridades[i])) for i in ordem if similaridades[i] >= limiar]
+
+    def buscar(self, texto, limiar=DEFAULT_THRESHOLD):
+        """A vaga mais parecida com similaridade >= `limiar`, como (entrada, similaridade), ou None."""
+        resultado = self.similares(texto, limiar, limite=1)
+        return resultado[0] if resultado else None
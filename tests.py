@@ -1,13 +1,47 @@
 import unittest
 from unittest.mock import patch, mock_open
+import asyncio
 import json
 import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 from fpdf import FPDF
 from io import StringIO
-from main import ler_arquivo, sanitize_text, limpar_string_json, PDF, generate_cv, CV_BASE_FILENAME, DICIONARIO_BASE_FILENAME, OUTPUT_CV_FILENAME
+from types import SimpleNamespace
+from main import orcamento_de_tokens, _obter_cache_padrao, _itens_da_descricao, ler_arquivo, sanitize_text, limpar_string_json, PDF, generate_cv, render_cv, render_cv_de_json, salvar_cv_json, generate_cv_variantes, CV_BASE_FILENAME, DICIONARIO_BASE_FILENAME, OUTPUT_CV_FILENAME
+from ats import PontuadorATS
+from cli import main as cli_main
+from cache import CacheDeRespostas, chave_cache
+from fila import (FilaDeTrabalhos, processar_fila, STATE_FAILED, STATE_LLM_DONE, STATE_PENDING,
+                  STATE_RENDERED)
+from resources import PoolDeRecursos, obter_pool
+from render_pool import renderizar_em_lote, jobs_de_arquivos_json
+from schema import carregar_schema, validar_valor, validar_e_reparar
+from json_stream import ParserJSONIncremental, parse_stream, ErroJSONIncremental
+from batch import carregar_vagas, generate_cv_batch, LimitadorDeTaxa, _eh_rate_limit, _nome_arquivo_seguro, main as main_lote
+from benchmarks import bench_etapas, bench_sanitizar, comparar, regressoes_sanitizacao
+from service import ServicoCV
+from gemini import criar_cliente
+from secoes import dividir_cv_base, caracteristicas_vaga
+from similaridade import IndiceDeVagas, SIGNATURES_FILE
+from metrics import Metricas, metricas, ativar_log_json, logger as logger_metricas
+from prompt import compactar_cv_base, limpar_vaga, construir_prompt, estimar_tokens, OrcamentoDeTokensExcedido, UsoDeTokens
 
 class TestCVGenerator(unittest.TestCase):
 
+    def setUp(self):
+        # Isola os testes do cache de respostas em disco do projeto.
+        diretorio = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, diretorio, True)
+        cache = patch("main._cache_padrao", CacheDeRespostas(diretorio))
+        cache.start()
+        self.addCleanup(cache.stop)
+
     @patch("builtins.open", new_callable=mock_open, read_data="conteúdo do arquivo")
     def test_ler_arquivo_sucesso(self, mock_file):
         """Testa a leitura bem-sucedida de um arquivo."""
@@ -35,6 +69,42 @@ class TestCVGenerator(unittest.TestCase):
         texto_esperado = "This has a smart quote ' and a dash - and ellipsis ..."
         self.assertEqual(sanitize_text(texto_original), texto_esperado)
 
+    def test_sanitize_text_cobertura_das_fontes(self):
+        """Testa os fallbacks para caracteres sem glifo nas fontes, mantendo os acentos cobertos."""
+        self.assertEqual(sanitize_text("Caf\u00e9 \u015a\u0142 \u0219 \ufb00 \u2460 \u01cei\u2060 \U0001F680\x07\n"),
+                         "Caf\u00e9 \u015a\u0142 \u0219 ff 1 ai ?\n")
+
+    def test_sanitize_text_mantem_alfabetos_cobertos(self):
+        """Testa que letras com glifo nas fontes originais (cirílico, vietnamita, marcador) são mantidas."""
+        texto = "\u0418\u0432\u0430\u043d Nguy\u1ec5n \u1ea1 \u2022 S\u00e3o Paulo"
+        self.assertEqual(sanitize_text(texto), texto)
+        self.assertGreater(len(obter_pool().cobertura()), 700)
+
+    def test_sanitizar_cv_documento(self):
+        """Testa a sanitização do CV inteiro, copiando só o que muda e preservando o original."""
+        sanitizador = obter_pool().sanitizador
+        cv = {"profile": "It\u2019s", "skills": ["A\u2013B", "C\U0001F680\x1f", "SQL"], "anos": 3}
+        sanitizado = sanitizador.sanitizar_cv(cv)
+        self.assertEqual(sanitizado, {"profile": "It's", "skills": ["A-B", "C?", "SQL"], "anos": 3})
+        self.assertEqual(cv["skills"][0], "A\u2013B")
+        sem_trocas = {"profile": "Jo\u00e3o", "skills": ["Python"], "idiomas": [{"nome": "\u0418\u0432\u0430\u043d"}]}
+        self.assertIs(sanitizador.sanitizar_cv(sem_trocas), sem_trocas)
+
+    def test_render_cv_sem_glifos_faltando(self):
+        """Testa que o PDF é gerado sem avisos de glifos ausentes nas fontes."""
+        cv = json.loads(json.dumps(CV_JSON_EXEMPLO))
+        cv["profile"] = "It\u2019s \ufb01ne \u2014 \u201cquoted\u201d \u0219tiin\u021b\u0103 \U0001F680"
+        with self.assertNoLogs("fpdf", level="WARNING"):
+            self.assertTrue(render_cv(cv, None).startswith(b"%PDF"))
+
+    def test_render_cv_skills_em_dicionario_sanitizadas(self):
+        """Testa que as chaves de skills no formato legado (dicionário) também são sanitizadas."""
+        cv = json.loads(json.dumps(CV_JSON_EXEMPLO))
+        cv["skills"] = {"CI\u2013CD \U0001F680": 5, "\ufb01nance": 3}
+        with self.assertNoLogs("fpdf", level="WARNING"):
+            self.assertTrue(render_cv(cv, None).startswith(b"%PDF"))
+        self.assertIsInstance(cv["skills"], dict)
+
     def test_limpar_string_json_valido(self):
         """Testa a formatação de uma string JSON válida."""
         texto_json = "algum texto { \"nome\": \"Valor\", \"idade\": 30 } mais texto"
@@ -53,7 +123,7 @@ class TestCVGenerator(unittest.TestCase):
         self.assertIsNone(limpar_string_json(texto_incompleto1))
         self.assertIsNone(limpar_string_json(texto_incompleto2))
 
-    @patch("your_script.ler_arquivo", return_value='{"personal_information": {"name": "John Doe", "title": "Software Engineer"}}')
+    @patch("main.ler_arquivo", return_value='{"personal_information": {"name": "John Doe", "title": "Software Engineer"}}')
     def test_pdf_header(self, mock_ler_arquivo):
         """Testa a geração do cabeçalho do PDF."""
         pdf = PDF(personal_info={"name": "John Doe", "title": "Software Engineer", "phone": "123-456-7890", "email": "john.doe@example.com", "linkedin": "linkedin.com/in/johndoe", "location": "New York"})
@@ -67,7 +137,7 @@ class TestCVGenerator(unittest.TestCase):
         except Exception as e:
             self.fail(f"Erro ao gerar o cabeçalho: {e}")
 
-    @patch("your_script.ler_arquivo", return_value='{"profile": "Resumo do perfil"}')
+    @patch("main.ler_arquivo", return_value='{"profile": "Resumo do perfil"}')
     def test_pdf_adicionar_secao_e_item_lista(self, mock_ler_arquivo):
         """Testa a adição de uma seção e um item de lista ao PDF."""
         pdf = PDF()
@@ -78,7 +148,21 @@ class TestCVGenerator(unittest.TestCase):
         y_apos_item = pdf._adicionar_item_lista('Um ponto da lista')
         self.assertGreater(y_apos_item, y_apos_secao)
 
-    @patch("your_script.ler_arquivo", return_value='{"professional_experience": [{"company": "Tech Inc", "location": "Silicon Valley", "title": "Senior Engineer", "duration": "2020-Present", "description": "Responsável por..."}]}')
+    def test_pdf_itens_avulsos_sanitizados(self):
+        """Testa que item de lista e experiência desenhados fora do render_cv também são sanitizados."""
+        pdf = PDF()
+        pdf.add_page()
+        with patch("layout.Coluna.paragrafo", autospec=True) as mock_paragrafo:
+            pdf._adicionar_item_lista("It\u2019s \U0001F680")
+        self.assertEqual(mock_paragrafo.call_args.args[1], "It's ?")
+        exp = {"company": "Tech\u2014Inc", "location": "SP", "title": "Dev", "duration": "2020",
+               "description": "Fez \U0001F680"}
+        with self.assertNoLogs("fpdf", level="WARNING"):
+            pdf._adicionar_experiencia(exp, 80, 40, 120)
+            pdf.output()
+        self.assertEqual(exp["company"], "Tech\u2014Inc")
+
+    @patch("main.ler_arquivo", return_value='{"professional_experience": [{"company": "Tech Inc", "location": "Silicon Valley", "title": "Senior Engineer", "duration": "2020-Present", "description": "Responsável por..."}]}')
     def test_pdf_adicionar_experiencia(self, mock_ler_arquivo):
         """Testa a adição da seção de experiência profissional."""
         pdf = PDF()
@@ -89,7 +173,7 @@ class TestCVGenerator(unittest.TestCase):
         y_apos_experiencia = pdf._adicionar_experiencia({"company": "Tech Inc", "location": "Silicon Valley", "title": "Senior Engineer", "duration": "2020-Present", "description": "Responsável por várias tarefas importantes."}, start_x, start_y, right_column_width)
         self.assertGreater(y_apos_experiencia, start_y)
 
-    @patch("your_script.ler_arquivo", return_value='{"education": [{"degree": "Bacharel em Ciência da Computação", "institution": "Universidade Exemplo", "years": "2016-2020"}]}')
+    @patch("main.ler_arquivo", return_value='{"education": [{"degree": "Bacharel em Ciência da Computação", "institution": "Universidade Exemplo", "years": "2016-2020"}]}')
     def test_pdf_adicionar_educacao(self, mock_ler_arquivo):
         """Testa a adição da seção de educação."""
         pdf = PDF()
@@ -106,7 +190,7 @@ class TestCVGenerator(unittest.TestCase):
             pdf.multi_cell(60, 6, sanitize_text(f"{edu_item.get('institution', '')} {edu_item.get('years', '')}"))
         self.assertTrue(True) # Verifica se o código executa sem erros
 
-    @patch("your_script.ler_arquivo", return_value='{"skills": {"Python": 5, "Java": 4}}')
+    @patch("main.ler_arquivo", return_value='{"skills": {"Python": 5, "Java": 4}}')
     def test_pdf_adicionar_habilidades(self, mock_ler_arquivo):
         """Testa a adição da seção de habilidades."""
         pdf = PDF()
@@ -124,7 +208,7 @@ class TestCVGenerator(unittest.TestCase):
             pdf.ln(5)
         self.assertTrue(True) # Verifica se o código executa sem erros
 
-    @patch("your_script.ler_arquivo", return_value='{"languages": [{"language": "Inglês", "proficiency": "Avançado"}]}')
+    @patch("main.ler_arquivo", return_value='{"languages": [{"language": "Inglês", "proficiency": "Avançado"}]}')
     def test_pdf_adicionar_idiomas(self, mock_ler_arquivo):
         """Testa a adição da seção de idiomas."""
         pdf = PDF()
@@ -140,7 +224,7 @@ class TestCVGenerator(unittest.TestCase):
             pdf.ln(6)
         self.assertTrue(True) # Verifica se o código executa sem erros
 
-    @patch("your_script.ler_arquivo", return_value='{"certifications": [{"name": "Certificação X", "date": "2023"}]}')
+    @patch("main.ler_arquivo", return_value='{"certifications": [{"name": "Certificação X", "date": "2023"}]}')
     def test_pdf_adicionar_certificacoes(self, mock_ler_arquivo):
         """Testa a adição da seção de certificações."""
         pdf = PDF()
@@ -152,57 +236,1117 @@ class TestCVGenerator(unittest.TestCase):
             pdf._adicionar_item_lista(f"{cert.get('name', '')} - {cert.get('date', '')}")
         self.assertTrue(True) # Verifica se o código executa sem erros
 
-    @patch("your_script.ler_arquivo")
-    @patch("your_script.genai.Client")
+    @patch("main.ler_arquivo")
+    @patch("main.obter_cliente")
     def test_generate_cv_sucesso(self, mock_genai_client, mock_ler_arquivo):
         """Testa o fluxo completo de geração do CV com resposta bem-sucedida do Gemini."""
         mock_ler_arquivo.side_effect = [
             '{"personal_information": {"name": "Test Name"}, "profile": "Test Profile", "education": [], "skills": {}, "languages": [], "certifications": [], "professional_experience": []}', # CV_BASE_FILENAME
             '{"en": {"profile": "Summary", "education": "Education", "skills": "Skills", "languages": "Languages", "certifications": "Certifications", "professional_experience": "Professional Experience"}}' # DICIONARIO_BASE_FILENAME
         ]
-        mock_chat = mock_genai_client.return_value.chats.create.return_value
-        mock_chat.send_message.return_value.text = '{"personal_information": {"name": "Test Name"}, "profile": "Adapted Profile", "education": [], "skills": {}, "languages": [], "certifications": [], "professional_experience": []}'
+        mock_models = mock_genai_client.return_value.models
+        mock_models.generate_content.return_value.text = '{"personal_information": {"name": "Test Name"}, "profile": "Adapted Profile", "education": [], "skills": {}, "languages": [], "certifications": [], "professional_experience": []}'
 
-        with patch.object(FPDF, 'output') as mock_output:
+        self.addCleanup(lambda: [os.remove(nome) for nome in ("test_cv.pdf", "test_cv.json") if os.path.exists(nome)])
+        with patch.object(FPDF, 'output', side_effect=lambda nome: open(nome, 'wb').close()) as mock_output:
             generate_cv("Job Description Here", "test_cv.pdf")
             mock_output.assert_called_once_with("test_cv.pdf")
 
         self.assertTrue(os.path.exists("test_cv.pdf"))
-        os.remove("test_cv.pdf")
 
-    @patch("your_script.ler_arquivo", return_value=None)
+    @patch("main.ler_arquivo", return_value=None)
     def test_generate_cv_arquivo_nao_encontrado(self, mock_ler_arquivo):
         """Testa o tratamento quando um dos arquivos base não é encontrado."""
         resultado = generate_cv("Job Description Here")
         self.assertIsNone(resultado)
 
-    @patch("your_script.ler_arquivo")
-    @patch("your_script.genai.Client")
+    @patch("main.ler_arquivo")
+    @patch("main.obter_cliente")
     def test_generate_cv_resposta_gemini_invalida(self, mock_genai_client, mock_ler_arquivo):
         """Testa o tratamento quando a resposta do Gemini não contém um JSON válido."""
         mock_ler_arquivo.side_effect = [
             '{"personal_information": {"name": "Test Name"}, "profile": "Test Profile", "education": [], "skills": {}, "languages": [], "certifications": [], "professional_experience": []}',
             '{"en": {"profile": "Summary", "education": "Education", "skills": "Skills", "languages": "Languages", "certifications": "Certifications", "professional_experience": "Professional Experience"}}'
         ]
-        mock_chat = mock_genai_client.return_value.chats.create.return_value
-        mock_chat.send_message.return_value.text = "Resposta inválida sem JSON"
+        mock_models = mock_genai_client.return_value.models
+        mock_models.generate_content.return_value.text = "Resposta inválida sem JSON"
 
         resultado = generate_cv("Job Description Here")
         self.assertIsNone(resultado)
 
-    @patch("your_script.ler_arquivo")
-    @patch("your_script.genai.Client")
+    @patch("main.ler_arquivo")
+    @patch("main.obter_cliente")
     def test_generate_cv_erro_decodificacao_json(self, mock_genai_client, mock_ler_arquivo):
         """Testa o tratamento de erro ao decodificar a resposta JSON do Gemini."""
         mock_ler_arquivo.side_effect = [
             '{"personal_information": {"name": "Test Name"}, "profile": "Test Profile", "education": [], "skills": {}, "languages": [], "certifications": [], "professional_experience": []}',
             '{"en": {"profile": "Summary", "education": "Education", "skills": "Skills", "languages": "Languages", "certifications": "Certifications", "professional_experience": "Professional Experience"}}'
         ]
-        mock_chat = mock_genai_client.return_value.chats.create.return_value
-        mock_chat.send_message.return_value.text = '{"chave": "valor",}' # JSON mal formado
+        mock_models = mock_genai_client.return_value.models
+        mock_models.generate_content.return_value.text = '{"chave": "valor",}' # JSON mal formado
 
         resultado = generate_cv("Job Description Here")
         self.assertIsNone(resultado)
 
+CV_JSON_EXEMPLO = {
+    "personal_information": {"name": "Test Name", "title": "Developer", "phone": "1", "email": "a@b.c", "linkedin": "in/test", "location": "City"},
+    "profile": "Adapted Profile",
+    "skills": ["Python", "SQL"],
+    "languages": [{"language": "English", "proficiency": "Fluent"}],
+    "certifications": [{"name": "Cert", "date": "2023"}],
+    "professional_experience": [{"company": "Tech Inc", "location": "Remote", "title": "Dev", "duration": "2020-2021", "description": "Did things\nMore things"}],
+    "education": [{"degree": "BSc", "institution": "Uni", "years": "2010-2014"}]
+}
+
+
+class _StubResposta:
+    def __init__(self, text):
+        self.text = text
+
+
+class StubGenaiClient:
+    """Stub local com a mesma interface usada de `genai.Client` (models.generate_content())."""
+
+    def __init__(self, respostas=None, erros=None):
+        self.respostas = respostas
+        self.erros = list(erros or [])
+        self.chamadas = 0
+        self.models = self
+
+    def generate_content(self, model=None, contents=None, config=None):
+        self.chamadas += 1
+        self.ultimo_config = config
+        self.ultimo_prompt = contents
+        if self.erros:
+            raise self.erros.pop(0)
+        if isinstance(self.respostas, list):
+            return _StubResposta(self.respostas.pop(0))
+        return _StubResposta(self.respostas or json.dumps(CV_JSON_EXEMPLO))
+
+    def generate_content_stream(self, model=None, contents=None, config=None, tamanho_pedaco=16):
+        texto = self.generate_content(model, contents, config).text
+        for i in range(0, len(texto), tamanho_pedaco):
+            self.pedacos_enviados = getattr(self, "pedacos_enviados", 0) + 1
+            yield _StubResposta(texto[i:i + tamanho_pedaco])
+
+
+class _ErroRateLimit(Exception):
+    code = 429
+
+
+class TestLote(unittest.TestCase):
+
+    def setUp(self):
+        self.diretorio = tempfile.mkdtemp()
+        self.cache = CacheDeRespostas(os.path.join(self.diretorio, "cache"))
+
+    def tearDown(self):
+        shutil.rmtree(self.diretorio, ignore_errors=True)
+
+    def test_carregar_vagas_jsonl(self):
+        """Testa a leitura de vagas a partir de um arquivo JSONL."""
+        caminho = os.path.join(self.diretorio, "vagas.jsonl")
+        with open(caminho, "w", encoding="utf-8") as arquivo:
+            arquivo.write(json.dumps({"id": "dev/1", "job_description": "Python dev"}) + "\n\n")
+            arquivo.write(json.dumps({"job_description": "SQL dev"}) + "\n")
+        self.assertEqual(carregar_vagas(caminho), [("dev/1", "Python dev"), ("vaga_3", "SQL dev")])
+
+    def test_generate_cv_batch_com_stub(self):
+        """Testa a geração em lote com um cliente stub e saídas por vaga."""
+        vagas = [(f"vaga {i}", f"Descricao {i}") for i in range(5)]
+        client = StubGenaiClient()
+        resultado = generate_cv_batch(vagas, self.diretorio, concurrency=3, client=client,
+                                      cache=self.cache)
+        self.assertEqual(client.chamadas, 5)
+        self.assertEqual(resultado["falhas"], [])
+        self.assertEqual(len(resultado["gerados"]), 5)
+        self.assertTrue(os.path.exists(resultado["gerados"]["vaga 0"]))
+        self.assertTrue(os.path.basename(resultado["gerados"]["vaga 0"]).startswith("vaga_0_"))
+        self.assertGreater(resultado["vagas_por_minuto"], 0)
+
+    def test_nome_arquivo_sem_colisao(self):
+        """Testa que ids que viram o mesmo nome de arquivo recebem nomes distintos."""
+        self.assertEqual(_nome_arquivo_seguro("dev_1"), "dev_1")
+        self.assertNotEqual(_nome_arquivo_seguro("dev/1"), _nome_arquivo_seguro("dev_1"))
+        self.assertNotEqual(_nome_arquivo_seguro("dev/1"), _nome_arquivo_seguro("dev:1"))
+        self.assertEqual(_nome_arquivo_seguro("dev/1"), _nome_arquivo_seguro("dev/1"))
+
+    def test_eh_rate_limit(self):
+        """Testa que só o código 429 ou RESOURCE_EXHAUSTED contam como rate limit."""
+        self.assertTrue(_eh_rate_limit(_ErroRateLimit("limite")))
+        self.assertTrue(_eh_rate_limit(Exception("RESOURCE_EXHAUSTED: quota")))
+        self.assertFalse(_eh_rate_limit(Exception("campo 4290 inválido")))
+
+    def test_main_origem_invalida(self):
+        """Testa que origem inexistente ou ilegível encerra pelo parser com código diferente de zero."""
+        invalido = os.path.join(self.diretorio, "vagas.jsonl")
+        with open(invalido, "w", encoding="utf-8") as arquivo:
+            arquivo.write("não é json\n")
+        for origem in (os.path.join(self.diretorio, "inexistente.jsonl"), invalido):
+            with patch('sys.stderr', new_callable=StringIO) as erro, self.assertRaises(SystemExit) as saida:
+                main_lote([origem])
+            self.assertNotEqual(saida.exception.code, 0)
+            self.assertIn("não foi possível ler as vagas", erro.getvalue())
+
+    def test_limitador_repete_em_rate_limit(self):
+        """Testa o backoff quando o stub retorna 429 antes de responder."""
+        client = StubGenaiClient(erros=[_ErroRateLimit("429 RESOURCE_EXHAUSTED")] * 2)
+        esperas = []
+        limitador = LimitadorDeTaxa(backoff_base=0.001, sleep=esperas.append)
+        resultado = generate_cv_batch([("a", "Descricao")], self.diretorio, client=client, limitador=limitador,
+                                      cache=self.cache)
+        self.assertEqual(resultado["retries"], 2)
+        self.assertEqual(client.chamadas, 3)
+        self.assertIn("a", resultado["gerados"])
+
+    def test_limitador_desiste_apos_max_retries(self):
+        """Testa que o lote registra a falha quando os retries se esgotam."""
+        client = StubGenaiClient(erros=[_ErroRateLimit("429")] * 3)
+        limitador = LimitadorDeTaxa(max_retries=1, backoff_base=0.001, sleep=lambda s: None)
+        resultado = generate_cv_batch([("a", "Descricao")], self.diretorio, client=client, limitador=limitador,
+                                      cache=self.cache)
+        self.assertEqual(resultado["falhas"], ["a"])
+
+class TestRenderCV(unittest.TestCase):
+
+    def setUp(self):
+        self.diretorio = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.diretorio, ignore_errors=True)
+
+    def test_render_cv(self):
+        """Testa a renderização direta de um CV adaptado, sem chamar o Gemini."""
+        saida = os.path.join(self.diretorio, "cv.pdf")
+        self.assertEqual(render_cv(CV_JSON_EXEMPLO, saida), saida)
+        with open(saida, "rb") as arquivo:
+            self.assertTrue(arquivo.read(5).startswith(b"%PDF"))
+
+    def test_generate_cv_salva_json_e_render_cv_de_json(self):
+        """Testa que o JSON salvo pelo generate_cv pode ser re-renderizado offline."""
+        client = StubGenaiClient()
+        saida = os.path.join(self.diretorio, "cv.pdf")
+        generate_cv("Vaga", saida, client, CacheDeRespostas(os.path.join(self.diretorio, "cache")))
+        json_path = os.path.join(self.diretorio, "cv.json")
+        with open(json_path, encoding="utf-8") as arquivo:
+            self.assertEqual(json.load(arquivo), CV_JSON_EXEMPLO)
+        os.remove(saida)
+        self.assertEqual(render_cv_de_json(json_path), saida)
+        self.assertTrue(os.path.exists(saida))
+        self.assertEqual(client.chamadas, 1)
+
+class TestPoolDeRecursos(unittest.TestCase):
+
+    def setUp(self):
+        self.diretorio = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.diretorio, ignore_errors=True)
+
+    def test_cache_metricas_versionado(self):
+        """Testa que o cache de métricas é reaproveitado e descartado quando a versão muda."""
+        caminho = os.path.join(self.diretorio, "metricas.json")
+        fontes = [('OpenSans', '', 'OpenSans-Regular.ttf')]
+        pool = PoolDeRecursos(fontes=fontes, icones=(), cache_metricas=caminho)
+        with open(caminho, encoding="utf-8") as arquivo:
+            salvo = json.load(arquivo)
+        self.assertIn("OpenSans-Regular.ttf", salvo["fontes"])
+
+        with patch("resources._extrair_metricas") as mock_extrair:
+            PoolDeRecursos(fontes=fontes, icones=(), cache_metricas=caminho)
+            mock_extrair.assert_not_called()
+
+        salvo["versao"] = "versao-antiga"
+        with open(caminho, "w", encoding="utf-8") as arquivo:
+            json.dump(salvo, arquivo)
+        novo = PoolDeRecursos(fontes=fontes, icones=(), cache_metricas=caminho)
+        self.assertEqual(novo.fontes["opensans"].cmap, pool.fontes["opensans"].cmap)
+        with open(caminho, encoding="utf-8") as arquivo:
+            self.assertNotEqual(json.load(arquivo)["versao"], "versao-antiga")
+
+    def test_fontes_registradas_sob_demanda(self):
+        """Testa que só as fontes usadas entram no documento e que os ícones vêm do pool."""
+        pdf = PDF(personal_info=CV_JSON_EXEMPLO["personal_information"])
+        self.assertEqual(pdf.fonts, {})
+        pdf.add_page()
+        self.assertIn("montserrat-thin", pdf.fonts)
+        self.assertNotIn("montserratI", pdf.fonts)
+        self.assertIn("phone_icon.png", pdf.image_cache.images)
+        self.assertTrue(pdf.output().startswith(b"%PDF"))
+
+    def test_fontes_com_cmap_completo(self):
+        """Testa que as fontes mantêm os glifos fora do Latin (cirílico, vietnamita, marcador)."""
+        from fontTools import ttLib
+        fonte = obter_pool().fontes["opensans"]
+        self.assertEqual(set(fonte.cmap), set(ttLib.TTFont("OpenSans-Regular.ttf").getBestCmap()))
+        for codigo in (0x418, 0x1EA1, 0x2022):
+            self.assertIn(codigo, fonte.cmap)
+        pdf = PDF(personal_info=CV_JSON_EXEMPLO["personal_information"])
+        pdf.add_page()
+        pdf.set_font("OpenSans", "", 10)
+        pdf.cell(text="\u0418\u0432\u0430\u043d \u1ea1 \u2022")
+        self.assertEqual(pdf.fonts["opensans"].missing_glyphs, [])
+        self.assertTrue(pdf.output().startswith(b"%PDF"))
+
+    def test_tabelas_compartilhadas_nao_mudam(self):
+        """Testa que medir um caractere sem glifo não altera as tabelas compartilhadas da fonte."""
+        fonte = obter_pool().fontes["opensans"]
+        tamanho = len(fonte.cw)
+        pdf = PDF(personal_info=CV_JSON_EXEMPLO["personal_information"])
+        pdf.add_page()
+        pdf.set_font("OpenSans", "", 10)
+        self.assertGreater(pdf.get_string_width("\u4e2d"), 0)
+        self.assertEqual(len(fonte.cw), tamanho)
+        self.assertNotIn(0x4E2D, fonte.cw)
+        with self.assertRaises(TypeError):
+            fonte.cmap[0x4E2D] = "uni4E2D"
+
+    def test_outra_versao_do_fpdf2_usa_add_font(self):
+        """Testa que, fora da versão fixada do fpdf2, as fontes são registradas pelo add_font."""
+        pdf = PDF(personal_info=CV_JSON_EXEMPLO["personal_information"])
+        with patch("resources.fpdf.__version__", "0.0.0"), \
+                patch("resources.FonteCarregada.nova_instancia") as mock_instancia:
+            pdf.add_page()
+        mock_instancia.assert_not_called()
+        self.assertIn("montserrat-thin", pdf.fonts)
+        self.assertTrue(pdf.output().startswith(b"%PDF"))
+
+class TestRenderPool(unittest.TestCase):
+
+    def test_renderizar_em_lote_ordenado(self):
+        """Testa a renderização em processos, com resultados na ordem de entrada e erros isolados."""
+        diretorio = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, diretorio, True)
+        jobs = [(CV_JSON_EXEMPLO, os.path.join(diretorio, f"cv_{i}.pdf")) for i in range(4)]
+        jobs.insert(2, (None, os.path.join(diretorio, "invalido.pdf")))
+        resultados = list(renderizar_em_lote(jobs, workers=2, chunksize=2))
+        self.assertEqual([r["output_path"] for r in resultados], [saida for _, saida in jobs])
+        self.assertEqual([r["erro"] is None for r in resultados], [True, True, False, True, True])
+        self.assertTrue(os.path.exists(os.path.join(diretorio, "cv_3.pdf")))
+
+    def test_renderizar_em_lote_janela_limitada(self):
+        """Testa que só uma janela de blocos fica em andamento, nos dois modos de entrega."""
+        diretorio = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, diretorio, True)
+        for ordenado in (True, False):
+            lidos = []
+
+            def jobs():
+                for i in range(8):
+                    lidos.append(i)
+                    yield CV_JSON_EXEMPLO, os.path.join(diretorio, f"cv_{i}.pdf")
+
+            resultados = renderizar_em_lote(jobs(), workers=1, chunksize=1, ordenado=ordenado)
+            next(resultados)
+            self.assertLessEqual(len(lidos), 3)
+            self.assertEqual(len(list(resultados)), 7)
+
+    def test_jobs_de_arquivos_json_pula_json_invalido(self):
+        """Testa que um JSON malformado é avisado e pulado sem abortar o lote."""
+        diretorio = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, diretorio, True)
+        caminhos = [os.path.join(diretorio, nome) for nome in ("a.json", "ruim.json", "b.json")]
+        for caminho in caminhos:
+            with open(caminho, 'w', encoding='utf-8') as arquivo:
+                arquivo.write("{ruim" if "ruim" in caminho else json.dumps(CV_JSON_EXEMPLO))
+        with patch('sys.stdout', new_callable=StringIO) as saida:
+            jobs = list(jobs_de_arquivos_json(caminhos))
+        self.assertEqual([pdf for _, pdf in jobs], [os.path.join(diretorio, "a.pdf"), os.path.join(diretorio, "b.pdf")])
+        self.assertIn("Erro ao decodificar JSON", saida.getvalue())
+
+class TestParserJSONIncremental(unittest.TestCase):
+
+    def test_parse_em_pedacos(self):
+        """Testa que o resultado independe do tamanho dos pedaços e ignora texto ao redor."""
+        texto = "```json\n" + json.dumps(CV_JSON_EXEMPLO, indent=2) + "\n```"
+        for tamanho in (1, 7, len(texto)):
+            pedacos = [texto[i:i + tamanho] for i in range(0, len(texto), tamanho)]
+            self.assertEqual(parse_stream(pedacos), CV_JSON_EXEMPLO)
+
+    def test_secoes_concluidas_assim_que_fecham(self):
+        """Testa que cada seção é entregue assim que termina de chegar."""
+        parser = ParserJSONIncremental()
+        self.assertEqual(parser.feed('{"profile": "Resumo", "skills": ["Py'), ["profile"])
+        self.assertEqual(parser.feed('thon"]'), ["skills"])
+        self.assertEqual(parser.feed(', "n": 1}'), ["n"])
+        self.assertEqual(parser.close(), {"profile": "Resumo", "skills": ["Python"], "n": 1})
+
+    def test_falha_rapida_em_secao_invalida(self):
+        """Testa que o streaming é interrompido na primeira seção inválida."""
+        resposta = '{"profile": {"nao": "deveria ser objeto"}, ' + '"skills": [' + '"x", ' * 200 + '"y"]}'
+        client = StubGenaiClient(respostas=resposta)
+        with self.assertRaises(ErroJSONIncremental) as contexto:
+            parse_stream(pedaco.text for pedaco in client.generate_content_stream(contents="prompt"))
+        self.assertEqual(contexto.exception.secao, "profile")
+        self.assertLess(client.pedacos_enviados, 5)
+
+    def test_json_malformado_e_incompleto(self):
+        """Testa os erros de sintaxe e de resposta truncada."""
+        for texto in ['{"a" 1}', '{"a": [1,}', '{"profile": "ok"', 'sem json']:
+            with self.assertRaises(ErroJSONIncremental):
+                parse_stream([texto])
+
+    def test_descarta_texto_consumido(self):
+        """Testa que só o token em leitura é guardado e que a posição dos erros conta todos os pedaços."""
+        parser = ParserJSONIncremental({})
+        for pedaco in ['{"profile": "Re', 'sumo", "skills": ["Py', 'thon"], ']:
+            parser.feed(pedaco)
+        self.assertEqual(parser._trechos, [])
+        parser.feed('"n": [1, ')
+        self.assertEqual(parser._trechos, ["[1, "])
+        with self.assertRaises(ErroJSONIncremental) as contexto:
+            parse_stream(['{"a": 1, ', 'x}'])
+        self.assertIn("posição 9", str(contexto.exception))
+
+    def test_generate_cv_streaming(self):
+        """Testa o generate_cv consumindo a resposta em streaming."""
+        diretorio = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, diretorio, True)
+        saida = os.path.join(diretorio, "cv.pdf")
+        cache = CacheDeRespostas(os.path.join(diretorio, "cache"))
+        self.assertEqual(generate_cv("Vaga", saida, StubGenaiClient(), cache, streaming=True), saida)
+        invalida = StubGenaiClient(respostas='{"profile": {"x": 1}, "skills": []}')
+        self.assertIsNone(generate_cv("Outra vaga", saida, invalida, cache, streaming=True))
+
+class TestSchema(unittest.TestCase):
+
+    def test_schema_do_dicionario(self):
+        """Testa o schema derivado do Dicionario."""
+        schema = carregar_schema(DICIONARIO_BASE_FILENAME)
+        self.assertEqual(schema["type"], "OBJECT")
+        self.assertEqual(schema["property_ordering"][0], "personal_information")
+        self.assertEqual(schema["properties"]["skills"]["items"]["type"], "STRING")
+        experiencia = schema["properties"]["professional_experience"]["items"]
+        self.assertIn("description", experiencia["required"])
+        self.assertIsNone(validar_valor(CV_JSON_EXEMPLO, schema))
+
+    def test_reparo_local(self):
+        """Testa o reparo de desvios comuns sem nova chamada ao modelo."""
+        schema = carregar_schema(DICIONARIO_BASE_FILENAME)
+        cv = dict(CV_JSON_EXEMPLO, skills={"Python": 5, "SQL": 4},
+                  certifications={"name": "Cert", "date": 2023},
+                  professional_experience=[{"company": "X", "description": ["a", "b"]}])
+        reparado, falhas = validar_e_reparar(cv, schema)
+        self.assertEqual(falhas, {})
+        self.assertEqual(reparado["skills"], ["Python", "SQL"])
+        self.assertEqual(reparado["certifications"], [{"name": "Cert", "date": "2023"}])
+        self.assertEqual(reparado["professional_experience"][0]["description"], "a\nb")
+        self.assertEqual(reparado["professional_experience"][0]["title"], "")
+
+    def test_generate_cv_solicita_apenas_secao_invalida(self):
+        """Testa que só a seção que não pôde ser reparada é solicitada novamente."""
+        diretorio = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, diretorio, True)
+        cv_sem_idiomas = {k: v for k, v in CV_JSON_EXEMPLO.items() if k != "languages"}
+        client = StubGenaiClient(respostas=[
+            json.dumps(cv_sem_idiomas),
+            json.dumps({"languages": CV_JSON_EXEMPLO["languages"]}),
+        ])
+        saida = os.path.join(diretorio, "cv.pdf")
+        self.assertEqual(generate_cv("Vaga", saida, client, CacheDeRespostas(diretorio)), saida)
+        self.assertEqual(client.chamadas, 2)
+        self.assertEqual(list(client.ultimo_config["response_schema"]["properties"]), ["languages"])
+        with open(os.path.join(diretorio, "cv.json"), encoding="utf-8") as arquivo:
+            self.assertEqual(json.load(arquivo)["languages"], CV_JSON_EXEMPLO["languages"])
+
+class TestPrompt(unittest.TestCase):
+
+    def test_compactar_cv_base(self):
+        """Testa o refluxo de linhas quebradas e a remoção de parágrafos repetidos."""
+        texto = ("PROFILE\nAs a developer with over six years\n of experience, I build\nscalable apps.\n\n"
+                 "Deloitte - São Paulo\nDEV\n\nDeloitte - São Paulo\nQA\nQA\n\n"
+                 "As a developer with over six years\n of experience, I build\nscalable apps.\n")
+        compactado = compactar_cv_base(texto)
+        self.assertIn("As a developer with over six years of experience, I build scalable apps.", compactado)
+        self.assertEqual(compactado.count("six years"), 1)
+        self.assertEqual(compactado.count("Deloitte - São Paulo"), 2)
+        self.assertEqual(compactado.count("QA"), 1)
+
+    def test_limpar_vaga(self):
+        """Testa a remoção de boilerplate e linhas repetidas da vaga."""
+        vaga = ("Python Developer\n  Easy Apply \nSave\n120 applicants\nWe need   Python.\n"
+                "We need Python.\nWe are an equal opportunity employer.\nShow more")
+        self.assertEqual(limpar_vaga(vaga), "Python Developer\nWe need Python.")
+
+    def test_orcamento_trunca_apenas_a_vaga(self):
+        """Testa que a vaga é truncada para caber no orçamento e que o excesso fixo gera erro."""
+        template = "{cvbase_content}|{dicionario_base_content}|{job_description}"
+        vaga = "\n".join(f"Requisito numero {i}" for i in range(200))
+        prompt, tokens = construir_prompt(template, "CV", "{}", vaga, max_tokens=100)
+        self.assertLessEqual(tokens, 100)
+        self.assertTrue(prompt.startswith("CV|{}|Requisito numero 0"))
+        self.assertTrue(prompt.endswith("[...]"))
+        with self.assertRaises(OrcamentoDeTokensExcedido):
+            construir_prompt(template, "CV " * 500, "{}", vaga, max_tokens=100)
+
+    def test_uso_de_tokens(self):
+        """Testa a contagem de tokens informada pelo modelo e o fallback para a estimativa."""
+        uso = UsoDeTokens()
+        metadados = type("Uso", (), {"prompt_token_count": 120, "candidates_token_count": 30})()
+        with patch('sys.stdout', new_callable=StringIO) as saida:
+            self.assertEqual(uso.registrar(metadados, 100), (120, 30))
+            self.assertEqual(saida.getvalue(), "")
+            uso.exibir = True
+            self.assertEqual(uso.registrar(None, 100, "abcdefgh"), (100, estimar_tokens("abcdefgh")))
+        self.assertEqual((uso.chamadas, uso.tokens_entrada, uso.tokens_saida), (2, 220, 32))
+        self.assertIn("Tokens: entrada=100", saida.getvalue())
+
+    def test_generate_cv_respeita_orcamento(self):
+        """Testa que generate_cv não chama o modelo quando o prompt não cabe no orçamento."""
+        diretorio = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, diretorio, True)
+        client = StubGenaiClient()
+        with patch('sys.stdout', new_callable=StringIO):
+            self.assertIsNone(generate_cv("Vaga", os.path.join(diretorio, "cv.pdf"), client,
+                                          CacheDeRespostas(diretorio), max_tokens=50))
+        self.assertEqual(client.chamadas, 0)
+
+class TestMetricas(unittest.TestCase):
+
+    def test_span_e_contadores(self):
+        """Testa a medição de spans, a contagem de erros por etapa e a exportação Prometheus."""
+        m = Metricas()
+        with m.span("layout", secao="skills"):
+            pass
+        with self.assertRaises(KeyError):
+            with m.span("llm"):
+                raise KeyError("x")
+        m.incrementar("cache_consultas_total", resultado="hit")
+        m.incrementar("cache_consultas_total", 2, resultado="hit")
+        self.assertEqual(m.contador("cache_consultas_total", resultado="hit"), 3)
+        self.assertEqual(m.contador("erros_total", etapa="llm", tipo="KeyError"), 1)
+
+        texto = m.exportar_prometheus()
+        self.assertIn('cv_cache_consultas_total{resultado="hit"} 3', texto)
+        self.assertIn('cv_etapa_duracao_segundos_count{etapa="layout",secao="skills"} 1', texto)
+        self.assertIn('cv_etapa_duracao_segundos_bucket{etapa="llm",le="+Inf"} 1', texto)
+        self.assertEqual({r["etapa"] for r in m.resumo()}, {"layout", "llm"})
+
+    def test_log_json(self):
+        """Testa as linhas JSON emitidas com os atributos do contexto."""
+        saida = StringIO()
+        self.addCleanup(logger_metricas.setLevel, logger_metricas.level)
+        self.addCleanup(setattr, logger_metricas, "propagate", logger_metricas.propagate)
+        handler = ativar_log_json(saida)
+        self.addCleanup(logger_metricas.removeHandler, handler)
+        m = Metricas()
+        with m.contexto(vaga="abc"):
+            m.observar("llm", 0.25, modo="completo")
+        linha = json.loads(saida.getvalue().splitlines()[-1])
+        self.assertEqual((linha["evento"], linha["etapa"], linha["ms"], linha["vaga"], linha["modo"]),
+                         ("span", "llm", 250.0, "abc", "completo"))
+
+    def test_log_json_ativado_duas_vezes(self):
+        """Testa que ativar o log JSON de novo não duplica as linhas nem deixa o handler antigo."""
+        primeira, segunda = StringIO(), StringIO()
+        self.addCleanup(logger_metricas.setLevel, logger_metricas.level)
+        self.addCleanup(setattr, logger_metricas, "propagate", logger_metricas.propagate)
+        handler = ativar_log_json(primeira)
+        self.assertIs(ativar_log_json(primeira), handler)
+        outro = ativar_log_json(segunda)
+        self.addCleanup(logger_metricas.removeHandler, outro)
+        self.assertNotIn(handler, logger_metricas.handlers)
+        Metricas().incrementar("x_total")
+        self.assertEqual(primeira.getvalue(), "")
+        self.assertEqual(len(segunda.getvalue().splitlines()), 1)
+
+    def test_generate_cv_instrumentado(self):
+        """Testa que generate_cv registra as etapas do pipeline e as consultas ao cache."""
+        diretorio = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, diretorio, True)
+        cache = CacheDeRespostas(diretorio)
+        saida = os.path.join(diretorio, "cv.pdf")
+        hits_antes = metricas.contador("cache_consultas_total", resultado="hit")
+        with patch('sys.stdout', new_callable=StringIO):
+            generate_cv("Vaga", saida, StubGenaiClient(), cache)
+            generate_cv("Vaga", saida, StubGenaiClient(), cache)
+        self.assertEqual(metricas.contador("cache_consultas_total", resultado="hit"), hits_antes + 1)
+        etapas = {r["etapa"] for r in metricas.resumo()}
+        self.assertTrue({"ler_entradas", "montar_prompt", "llm", "parse_json", "carregar_fontes",
+                         "header", "layout", "escrever_pdf", "generate_cv"} <= etapas)
+
+def _requisicao_asgi(app, metodo, caminho, corpo=b"", content_type=b"application/json"):
+    """Executa uma requisição HTTP na aplicação ASGI e retorna (status, headers, corpo)."""
+    mensagens = [{"type": "http.request", "body": corpo, "more_body": False}]
+    enviadas = []
+
+    async def receive():
+        return mensagens.pop(0)
+
+    async def send(mensagem):
+        enviadas.append(mensagem)
+
+    scope = {"type": "http", "method": metodo, "path": caminho, "headers": [(b"content-type", content_type)]}
+    asyncio.run(app(scope, receive, send))
+    return enviadas[0]["status"], dict(enviadas[0]["headers"]), enviadas[1]["body"]
+
+class TestServico(unittest.TestCase):
+
+    def setUp(self):
+        self.diretorio = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.diretorio, True)
+        self.client = StubGenaiClient()
+        self.app = ServicoCV(client=self.client, cache=CacheDeRespostas(self.diretorio), workers=2)
+        self.addCleanup(self.app.executor.shutdown)
+
+    def test_render_cv_em_memoria(self):
+        """Testa que render_cv sem caminho retorna os bytes do PDF sem gravar arquivos."""
+        pdf = render_cv(CV_JSON_EXEMPLO, None)
+        self.assertIsInstance(pdf, bytes)
+        self.assertTrue(pdf.startswith(b"%PDF"))
+
+    def test_post_cv_retorna_pdf(self):
+        """Testa o endpoint POST /cv com JSON e com texto puro, reaproveitando o mesmo cliente."""
+        with patch('sys.stdout', new_callable=StringIO):
+            status, headers, corpo = _requisicao_asgi(self.app, "POST", "/cv",
+                                                      json.dumps({"job_description": "Python dev"}).encode())
+            status_texto, _, _ = _requisicao_asgi(self.app, "POST", "/cv", b"Java dev", b"text/plain")
+        self.assertEqual((status, status_texto), (200, 200))
+        self.assertEqual(headers[b"content-type"], b"application/pdf")
+        self.assertTrue(corpo.startswith(b"%PDF"))
+        self.assertEqual(self.client.chamadas, 2)
+
+    def test_erros_http(self):
+        """Testa as respostas de erro do serviço."""
+        self.assertEqual(_requisicao_asgi(self.app, "POST", "/cv", b'{"job_description": ""}')[0], 400)
+        self.assertEqual(_requisicao_asgi(self.app, "POST", "/cv", b'[1, 2]')[0], 400)
+        self.assertEqual(_requisicao_asgi(self.app, "GET", "/inexistente")[0], 404)
+        status, _, corpo = _requisicao_asgi(self.app, "GET", "/metrics")
+        self.assertEqual(status, 200)
+        self.assertIn(b"cv_http_respostas_total", corpo)
+
+    def test_aquecer_carrega_env_antes_do_cliente(self):
+        """Testa que o serviço lê a GOOGLE_API_KEY do .env e responde 502 (e não 500) sem chave."""
+        import gemini
+        caminho_env = os.path.join(self.diretorio, ".env")
+        with open(caminho_env, "w") as f:
+            f.write("GOOGLE_API_KEY=chave-do-env\n")
+        gemini.fechar_cliente()
+        self.addCleanup(gemini.fechar_cliente)
+        app = ServicoCV(cache=CacheDeRespostas(self.diretorio), workers=1)
+        self.addCleanup(app.executor.shutdown)
+        with patch.dict(os.environ), patch("main._ambiente_carregado", False):
+            os.environ.pop("GOOGLE_API_KEY", None)
+            os.environ.pop("GEMINI_API_KEY", None)
+            with patch("dotenv.find_dotenv", return_value=os.path.join(self.diretorio, "inexistente.env")), \
+                    patch('sys.stdout', new_callable=StringIO) as saida:
+                app.aquecer()
+                status, _, _ = _requisicao_asgi(app, "POST", "/cv", b"Python dev", b"text/plain")
+            self.assertEqual(status, 502)
+            self.assertIn("Erro ao criar o cliente do Gemini", saida.getvalue())
+            with patch("main._ambiente_carregado", False), patch("dotenv.find_dotenv", return_value=caminho_env):
+                app.aquecer()
+                self.assertEqual(os.environ.get("GOOGLE_API_KEY"), "chave-do-env")
+                self.assertIsNotNone(app.client)
+
+    def test_orcamento_e_cache_lidos_do_env(self):
+        """Testa que CV_MAX_PROMPT_TOKENS e CV_CACHE_DIR definidos no .env são respeitados."""
+        caminho_env = os.path.join(self.diretorio, ".env")
+        diretorio_cache = os.path.join(self.diretorio, "cache_do_env")
+        with open(caminho_env, "w") as f:
+            f.write(f"CV_MAX_PROMPT_TOKENS=1234\nCV_CACHE_DIR={diretorio_cache}\n")
+        with patch.dict(os.environ), patch("main._ambiente_carregado", False), patch("main._cache_padrao", None), \
+                patch("dotenv.find_dotenv", return_value=caminho_env):
+            os.environ.pop("CV_MAX_PROMPT_TOKENS", None)
+            os.environ.pop("CV_CACHE_DIR", None)
+            self.assertEqual(orcamento_de_tokens(), 1234)
+            self.assertEqual(_obter_cache_padrao().diretorio, diretorio_cache)
+
+class _GeminiFalso(BaseHTTPRequestHandler):
+    """Endpoint HTTP local que imita o generateContent da API do Gemini (com keep-alive)."""
+
+    protocol_version = "HTTP/1.1"
+    atraso = 0
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        time.sleep(self.atraso)
+        corpo = json.dumps({
+            "candidates": [{"content": {"role": "model", "parts": [{"text": json.dumps(CV_JSON_EXEMPLO)}]}}],
+            "usageMetadata": {"promptTokenCount": 100, "candidatesTokenCount": 50},
+        }).encode()
+        try:
+            self.send_response(200 if ":generateContent" in self.path else 404)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(corpo)))
+            self.end_headers()
+            self.wfile.write(corpo)
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # O cliente desistiu por timeout.
+
+    def log_message(self, *args):
+        pass
+
+class TestClienteGemini(unittest.TestCase):
+
+    def setUp(self):
+        self.servidor = ThreadingHTTPServer(("127.0.0.1", 0), _GeminiFalso)
+        threading.Thread(target=self.servidor.serve_forever, daemon=True).start()
+        self.addCleanup(self.servidor.server_close)
+        self.addCleanup(self.servidor.shutdown)
+        self.base_url = f"http://127.0.0.1:{self.servidor.server_address[1]}/"
+        self.diretorio = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.diretorio, True)
+
+    def test_reuso_de_conexoes(self):
+        """Testa que várias gerações reaproveitam a mesma conexão keep-alive."""
+        client, transporte = criar_cliente(api_key="chave-teste", base_url=self.base_url, timeout_ms=5000)
+        self.addCleanup(transporte.close)
+        cache = CacheDeRespostas(self.diretorio)
+        with patch('sys.stdout', new_callable=StringIO):
+            pdfs = [generate_cv(f"Vaga {i}", None, client, cache) for i in range(3)]
+        self.assertTrue(all(pdf.startswith(b"%PDF") for pdf in pdfs))
+        estatisticas = transporte.estatisticas()
+        self.assertEqual((estatisticas["requisicoes"], estatisticas["conexoes"]), (3, 1))
+        self.assertAlmostEqual(estatisticas["taxa_reuso"], 2 / 3)
+
+    def test_timeout(self):
+        """Testa que o timeout configurado interrompe uma chamada lenta."""
+        _GeminiFalso.atraso = 0.5
+        self.addCleanup(setattr, _GeminiFalso, "atraso", 0)
+        client, transporte = criar_cliente(api_key="chave-teste", base_url=self.base_url, timeout_ms=100)
+        self.addCleanup(transporte.close)
+        inicio = time.perf_counter()
+        with patch('sys.stdout', new_callable=StringIO) as saida:
+            self.assertIsNone(generate_cv("Vaga lenta", None, client, CacheDeRespostas(self.diretorio)))
+        self.assertLess(time.perf_counter() - inicio, 0.5)
+        self.assertIn("Timeout", saida.getvalue())
+
+class TestBenchmarks(unittest.TestCase):
+
+    def test_bench_etapas_e_comparar(self):
+        """Testa que o benchmark mede cada etapa e que a comparação aponta regressões."""
+        diretorio = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, diretorio, True)
+        with patch('sys.stdout', new_callable=StringIO):
+            resultado = bench_etapas([1], repeticoes=1)
+        etapas = {r["etapa"] for r in resultado["resultados"]}
+        self.assertTrue({"ler_arquivo", "prompt", "extrair_json", "pdf_init", "header", "layout",
+                         "output", "generate_cv_stub"} <= etapas)
+
+        base, atual = os.path.join(diretorio, "base.json"), os.path.join(diretorio, "atual.json")
+        lento = json.loads(json.dumps(resultado))
+        for r in lento["resultados"]:
+            if r["etapa"] == "layout":
+                r["mediana_ms"] = r["mediana_ms"] * 2 + 1
+        for caminho, conteudo in ((base, resultado), (atual, lento)):
+            with open(caminho, 'w', encoding='utf-8') as arquivo:
+                json.dump(conteudo, arquivo)
+        with patch('sys.stdout', new_callable=StringIO):
+            regressoes = comparar(base, atual)
+        self.assertEqual([r["etapa"] for r in regressoes], ["layout"])
+
+    def test_sanitizacao_nao_mais_lenta_que_a_legada(self):
+        """Testa que sanitizar o documento não é mais lento que a cadeia legada de `str.replace`."""
+        with patch('sys.stdout', new_callable=StringIO):
+            resultados = bench_sanitizar([10], repeticoes=50)
+        self.assertEqual(regressoes_sanitizacao(resultados), [])
+
+class TestGeracaoPorSecao(unittest.TestCase):
+
+    def setUp(self):
+        self.diretorio = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.diretorio, True)
+        self.cache = CacheDeRespostas(os.path.join(self.diretorio, "cache"))
+
+    def _gerar(self, client, vaga):
+        with patch('sys.stdout', new_callable=StringIO):
+            return generate_cv(vaga, None, client, self.cache, por_secao=True)
+
+    def test_dividir_cv_base(self):
+        """Testa a divisão do CV_Base por títulos, com o refluxo das linhas quebradas."""
+        blocos = dividir_cv_base(ler_arquivo(CV_BASE_FILENAME))
+        self.assertEqual(set(blocos), {None, "PROFILE", "SKILLS", "LANGUAGES", "CERTIFICATIONS",
+                                       "PROFESSIONAL EXPERIENCE", "EDUCATION"})
+        self.assertTrue(blocos["SKILLS"].startswith("SQL, Python, Java"))
+
+    def test_caracteristicas_vaga(self):
+        """Testa que ordem, caixa, stopwords e boilerplate não mudam as características da vaga."""
+        self.assertEqual(caracteristicas_vaga("We need Python and SQL.\nEasy Apply"),
+                         caracteristicas_vaga("SQL, python: we NEED"))
+
+    def test_so_regenera_secoes_alteradas(self):
+        """Testa o cache por seção para vagas parecidas e para mudanças pontuais no CV_Base."""
+        client = StubGenaiClient()
+        self.assertTrue(self._gerar(client, "We need Python and SQL.").startswith(b"%PDF"))
+        self.assertEqual(client.chamadas, 7)
+        self.assertEqual(len(client.ultimo_config["response_schema"]["properties"]), 1)
+
+        # Vaga diferente só na redação: todas as seções vêm do cache.
+        self._gerar(client, "SQL, python: we NEED.\nEasy Apply")
+        self.assertEqual(client.chamadas, 7)
+
+        # Vaga nova: só as seções adaptadas à vaga são regeneradas.
+        self._gerar(client, "We need Java.")
+        self.assertEqual(client.chamadas, 10)
+
+        # Nova certificação no CV_Base: só a seção de certificações é regenerada.
+        cv_base = os.path.join(self.diretorio, "CV_Base")
+        with open(cv_base, 'w', encoding='utf-8') as arquivo:
+            arquivo.write(ler_arquivo(CV_BASE_FILENAME).replace("CERTIFICATIONS\n", "CERTIFICATIONS\nNova Cert 2025\n"))
+        with patch("main.CV_BASE_FILENAME", cv_base):
+            self._gerar(client, "We need Java.")
+        self.assertEqual(client.chamadas, 11)
+        self.assertIn("Nova Cert 2025", client.ultimo_prompt)
+
+class TestIndiceDeVagas(unittest.TestCase):
+
+    VAGA = ("We are hiring a Senior Data Engineer to build batch and streaming pipelines with Python, "
+            "Spark and Airflow on AWS. You will model data in Snowflake, write dbt transformations, "
+            "monitor data quality and work closely with analysts and product teams.")
+
+    def setUp(self):
+        self.diretorio = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.diretorio, True)
+
+    def test_encontra_vagas_quase_identicas(self):
+        """Testa que reposts com pequenas mudanças são encontrados e vagas diferentes não."""
+        indice = IndiceDeVagas(self.diretorio)
+        indice.adicionar("vaga-1", self.VAGA + "\nEasy Apply", {"chave": "aa"})
+        indice.adicionar("vaga-2", "Frontend developer with React, TypeScript and CSS for our design system team.")
+        entrada, similaridade = indice.buscar(self.VAGA.upper() + "\n\nApply now")
+        self.assertEqual(entrada, {"id": "vaga-1", "dados": {"chave": "aa"}})
+        self.assertGreaterEqual(similaridade, 0.85)
+        self.assertIsNone(indice.buscar("Backend engineer with Go, Kubernetes and PostgreSQL for payments."))
+
+    def test_vagas_sem_shingles_nao_sao_indexadas(self):
+        """Testa que textos sem shingles não entram no índice nem casam entre si."""
+        indice = IndiceDeVagas(self.diretorio)
+        self.assertIsNone(indice.adicionar("a", "!!!"))
+        self.assertEqual(indice.adicionar_varios([("b", "???", None), ("c", self.VAGA, None)]), [None, 0])
+        self.assertEqual(len(indice), 1)
+        self.assertIsNone(indice.buscar("???"))
+
+    def test_persistencia_e_escrita_interrompida(self):
+        """Testa que o índice é recarregado do disco, descartando uma escrita incompleta."""
+        indice = IndiceDeVagas(self.diretorio)
+        indice.adicionar_varios([("vaga-1", self.VAGA, None), ("vaga-2", "Outra vaga de QA manual.", None)])
+        with open(os.path.join(self.diretorio, SIGNATURES_FILE), "ab") as arquivo:
+            arquivo.write(b"\x00" * 10)
+        recarregado = IndiceDeVagas(self.diretorio)
+        self.assertEqual(len(recarregado), 2)
+        self.assertEqual(recarregado.buscar(self.VAGA)[0]["id"], "vaga-1")
+
+    def test_generate_cv_reaproveita_vaga_semelhante(self):
+        """Testa que uma vaga quase idêntica reaproveita o CV sem chamar o Gemini."""
+        cache = CacheDeRespostas(os.path.join(self.diretorio, "cache"))
+        indice = IndiceDeVagas(os.path.join(self.diretorio, "indice"))
+        client = StubGenaiClient()
+        with patch('sys.stdout', new_callable=StringIO):
+            self.assertIsNotNone(generate_cv(self.VAGA, None, client, cache, indice=indice))
+            pdf = generate_cv(self.VAGA.replace("analysts", "data analysts") + "\nEasy Apply", None, client,
+                              cache, indice=indice)
+            generate_cv("Backend engineer with Go, Kubernetes and PostgreSQL.", None, client, cache, indice=indice)
+        self.assertTrue(pdf.startswith(b"%PDF"))
+        self.assertEqual(client.chamadas, 2)
+        self.assertEqual(len(indice), 2)
+
+class TestLayout(unittest.TestCase):
+
+    def setUp(self):
+        self.pdf = PDF(format='A4', personal_info=CV_JSON_EXEMPLO["personal_information"])
+        self.pdf.set_auto_page_break(auto=True, margin=10)
+        self.pdf.add_page()
+        self.medidor = self.pdf._medidor()
+
+    def test_largura_igual_a_do_fpdf(self):
+        """Testa que a largura medida pelas tabelas de glifos é a mesma do fpdf2."""
+        for fonte in (('OpenSans', '', 8), ('Montserrat', 'B', 12)):
+            self.pdf.set_font(*fonte)
+            texto = "Senior Software Developer - Vancouver, BC"
+            self.assertAlmostEqual(self.medidor.largura(texto, fonte, self.pdf.k), self.pdf.get_string_width(texto))
+
+    def test_quebrar_respeita_largura(self):
+        """Testa a quebra nos espaços, nas quebras de linha e no meio de palavras longas."""
+        fonte = ('OpenSans', '', 8)
+        self.pdf.set_font(*fonte)
+        linhas = self.medidor.quebrar("palavra " * 30 + "\n" + "x" * 200, fonte, 50, self.pdf.k)
+        self.assertGreater(len(linhas), 5)
+        self.assertIn("palavra palavra", linhas[0])
+        self.assertTrue(all(self.pdf.get_string_width(linha) <= 50 + 1e-6 for linha in linhas))
+        self.assertEqual("".join(linhas).count("x"), 200)
+
+    def test_cv_longo_em_varias_paginas(self):
+        """Testa que um CV longo é distribuído em páginas, nas duas colunas, dentro da margem inferior."""
+        cv = json.loads(json.dumps(CV_JSON_EXEMPLO))
+        cv["professional_experience"] = cv["professional_experience"] * 30
+        cv["certifications"] = cv["certifications"] * 60
+        plano = self.pdf._adicionar_cv(cv)
+        self.assertGreater(len(plano.paginas), 2)
+        self.assertEqual(self.pdf.pages_count, len(plano.paginas))
+        base = self.pdf.h - self.pdf.b_margin
+        for celulas in plano.paginas:
+            self.assertTrue(all(40 <= y and y + altura <= base for _, y, _, altura, *_ in celulas))
+        colunas = {x for celulas in plano.paginas[1:] for x, *_ in celulas}
+        self.assertTrue({10, 80} <= colunas)
+
+    def test_ajustar_para_uma_pagina(self):
+        """Testa que o ajuste reduz o layout só o necessário para o CV caber em uma página."""
+        cv = json.loads(json.dumps(CV_JSON_EXEMPLO))
+        with patch('sys.stdout', new_callable=StringIO):
+            relatorio = self.pdf._ajustar_paginas(cv, 1)
+        self.assertEqual(relatorio["tentativas"], 1)
+        self.assertEqual(relatorio["itens_cortados"], 0)
+        self.assertEqual(self.pdf.ajuste.escala_fonte, 1.0)
+
+        cv["professional_experience"] = cv["professional_experience"] * 10
+        isoladas = Metricas()
+        with patch('sys.stdout', new_callable=StringIO) as saida, patch("main.metricas", isoladas):
+            relatorio = self.pdf._ajustar_paginas(cv, 1)
+        self.assertTrue(relatorio["cabe"])
+        etapas = {r["etapa"] for r in isoladas.resumo()}
+        self.assertIn("layout_tentativa", etapas)
+        self.assertNotIn("layout", etapas)
+        self.assertGreater(relatorio["tentativas"], 1)
+        self.assertIn("tentativas em", saida.getvalue())
+        self.assertLess(self.pdf.ajuste.escala_linha, 1.0)
+        self.pdf._adicionar_cv(cv)
+        self.assertEqual(self.pdf.pages_count, 1)
+
+    def test_ajuste_impossivel_e_relatado(self):
+        """Testa que um CV que não cabe nem com o ajuste máximo é relatado, com todos os cortes aplicados."""
+        cv = json.loads(json.dumps(CV_JSON_EXEMPLO))
+        cv["professional_experience"] = cv["professional_experience"] * 60
+        with patch('sys.stdout', new_callable=StringIO) as saida:
+            relatorio = self.pdf._ajustar_paginas(cv, 1)
+        self.assertFalse(relatorio["cabe"])
+        self.assertGreater(relatorio["paginas"], 1)
+        self.assertEqual(self.pdf.ajuste.max_itens, 1)
+        descricoes = [len(_itens_da_descricao(exp)) for exp in cv["professional_experience"]]
+        self.assertEqual(relatorio["itens_cortados"], sum(n - 1 for n in descricoes if n > 1))
+        self.assertGreater(relatorio["itens_cortados"], 0)
+        self.assertIn("não coube", saida.getvalue())
+
+class _StubRespostaComCandidatos:
+    def __init__(self, textos):
+        self.candidates = [SimpleNamespace(content=SimpleNamespace(parts=[SimpleNamespace(text=texto)]))
+                           for texto in textos]
+        self.text = textos[0]
+
+
+class _StubClientComCandidatos(StubGenaiClient):
+    """Stub que responde com vários candidatos, como o Gemini com `candidate_count`."""
+
+    def __init__(self, candidatos):
+        super().__init__()
+        self.candidatos = candidatos
+
+    def generate_content(self, model=None, contents=None, config=None):
+        super().generate_content(model, contents, config)
+        return _StubRespostaComCandidatos(self.candidatos)
+
+
+class TestVariantes(unittest.TestCase):
+
+    VAGA = "We need a Python developer with Kubernetes, Terraform and SQL experience."
+
+    def setUp(self):
+        self.diretorio = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.diretorio, True)
+        self.cache = CacheDeRespostas(os.path.join(self.diretorio, "cache"))
+
+    def _variante(self, skills):
+        return json.dumps(dict(CV_JSON_EXEMPLO, skills=skills))
+
+    def test_pontuador_ats(self):
+        """Testa a cobertura ponderada dos termos da vaga e os termos ausentes."""
+        pontuador = PontuadorATS("Python, Python and SQL. Kubernetes.")
+        completo = pontuador.pontuar({"skills": ["Python", "SQL", "Kubernetes"]})
+        parcial = pontuador.pontuar({"skills": ["SQL", "Kubernetes"]})
+        self.assertAlmostEqual(completo["pontuacao"], 1.0)
+        self.assertEqual(completo["faltando"], [])
+        self.assertLess(parcial["pontuacao"], 1.0)
+        self.assertEqual(parcial["faltando"][0], "python")
+
+    def test_uma_chamada_e_top_k(self):
+        """Testa que as N variantes vêm de uma chamada e só as K mais aderentes são renderizadas."""
+        client = _StubClientComCandidatos([self._variante(["Python"]), "sem json",
+                                           self._variante(["Python", "Kubernetes", "Terraform", "SQL"]),
+                                           self._variante(["Python", "SQL"])])
+        saida = os.path.join(self.diretorio, "cv.pdf")
+        with patch('sys.stdout', new_callable=StringIO):
+            ranking = generate_cv_variantes(self.VAGA, 4, 2, saida, client, self.cache)
+            self.assertEqual(client.chamadas, 1)
+            self.assertEqual(client.ultimo_config["candidate_count"], 4)
+            self.assertEqual([item["caminho"] for item in ranking],
+                             [os.path.join(self.diretorio, "cv_1.pdf"), os.path.join(self.diretorio, "cv_2.pdf")])
+            self.assertGreater(ranking[0]["pontuacao"], ranking[1]["pontuacao"])
+            with open(os.path.join(self.diretorio, "cv_1.json"), encoding='utf-8') as arquivo:
+                self.assertIn("Terraform", json.load(arquivo)["skills"])
+            self.assertTrue(os.path.exists(os.path.join(self.diretorio, "cv_2.pdf")))
+            self.assertFalse(os.path.exists(os.path.join(self.diretorio, "cv_3.pdf")))
+
+            # As variantes válidas ficam em cache: nova ordenação sem chamar o Gemini.
+            em_memoria = generate_cv_variantes(self.VAGA, 4, 3, None, client, self.cache)
+        self.assertEqual(client.chamadas, 1)
+        self.assertEqual(len(em_memoria), 3)
+        self.assertTrue(em_memoria[0]["pdf"].startswith(b"%PDF"))
+
+class TestCLI(unittest.TestCase):
+
+    def setUp(self):
+        self.diretorio = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.diretorio, True)
+
+    def test_render_nao_carrega_sdk(self):
+        """Testa que renderizar pelo CLI não importa o SDK do Gemini, o numpy nem o dotenv."""
+        cv_json = salvar_cv_json(CV_JSON_EXEMPLO, os.path.join(self.diretorio, "cv.json"))
+        codigo = ("import sys, cli; codigo = cli.main(['render', sys.argv[1]]); "
+                  "print(codigo, [m for m in ('google.genai', 'numpy', 'dotenv') if m in sys.modules])")
+        execucao = subprocess.run([sys.executable, "-c", codigo, cv_json], capture_output=True, text=True,
+                                  cwd=os.path.dirname(os.path.abspath(__file__)))
+        self.assertEqual(execucao.stdout.strip().splitlines()[-1], "0 []")
+        self.assertTrue(os.path.exists(os.path.join(self.diretorio, "cv.pdf")))
+
+    def test_subcomandos(self):
+        """Testa o repasse das opções do lote ao batch.py e o generate a partir de um arquivo."""
+        with patch("batch.main", return_value=0) as batch_main:
+            self.assertEqual(cli_main(["batch", "vagas/", "--concorrencia", "4"]), 0)
+        batch_main.assert_called_once_with(["vagas/", "--concorrencia", "4"])
+
+        vaga = os.path.join(self.diretorio, "vaga.txt")
+        with open(vaga, 'w', encoding='utf-8') as arquivo:
+            arquivo.write("We need Python.")
+        saida = os.path.join(self.diretorio, "cv.pdf")
+        with patch("main.generate_cv", return_value=saida) as generate:
+            self.assertEqual(cli_main(["generate", vaga, "--saida", saida, "--max-paginas", "1"]), 0)
+        self.assertEqual(generate.call_args.args[:2], ("We need Python.", saida))
+        self.assertEqual(generate.call_args.kwargs["max_paginas"], 1)
+
+class TestFilaDeTrabalhos(unittest.TestCase):
+
+    VAGAS = [("a", "We need Python."), ("b", "We need Java."), ("c", "We need SQL.")]
+
+    def setUp(self):
+        self.diretorio = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.diretorio, True)
+        self.cache = CacheDeRespostas(os.path.join(self.diretorio, "cache"))
+        self.fila = FilaDeTrabalhos(os.path.join(self.diretorio, "fila.db"))
+        self.addCleanup(self.fila.fechar)
+        self.saida = os.path.join(self.diretorio, "cvs")
+
+    def _processar(self, client):
+        with patch('sys.stdout', new_callable=StringIO):
+            return processar_fila(self.fila, self.saida, 1, client, cache=self.cache, max_tentativas=2,
+                                  backoff_base=0)
+
+    def test_retentativas_idempotencia_e_retomada(self):
+        """Testa as tentativas limitadas, o reenvio idempotente e a retomada sem repetir etapas concluídas."""
+        self.assertEqual(self.fila.enfileirar(self.VAGAS), 3)
+        client = StubGenaiClient(erros=[RuntimeError("503 UNAVAILABLE")] * 2)
+        resultado = self._processar(client)
+        self.assertEqual(resultado["falhas"], ["a"])
+        self.assertEqual(sorted(resultado["gerados"]), ["b", "c"])
+        self.assertEqual(client.chamadas, 4)
+        falha = self.fila.trabalho("a")
+        self.assertEqual((falha["estado"], falha["tentativas"]), (STATE_FAILED, 2))
+        self.assertIn("503 UNAVAILABLE", falha["erro"])
+        self.assertTrue(os.path.exists(os.path.join(self.saida, "b.pdf")))
+        self.assertFalse(os.path.exists(os.path.join(self.saida, "b.pdf.tmp")))
+
+        # Reenviar a mesma origem e processar de novo não refaz nada.
+        self.assertEqual(self.fila.enfileirar(self.VAGAS), 0)
+        self.assertEqual(self._processar(client)["gerados"], {})
+        self.assertEqual(client.chamadas, 4)
+
+        self.assertEqual(self.fila.reabrir_falhas(), 1)
+        self.assertEqual(list(self._processar(client)["gerados"]), ["a"])
+        self.assertEqual(self.fila.contagem(), {STATE_PENDING: 0, STATE_LLM_DONE: 0, STATE_RENDERED: 3,
+                                                STATE_FAILED: 0})
+
+    def test_retoma_da_etapa_de_render(self):
+        """Testa que uma vaga interrompida após o Gemini só é renderizada, e que vaga alterada recomeça."""
+        self.fila.enfileirar(self.VAGAS[:1])
+        self.fila.concluir_llm("a", CV_JSON_EXEMPLO)
+        client = StubGenaiClient(erros=[AssertionError("o Gemini não deveria ser chamado")])
+        self.assertEqual(self._processar(client)["gerados"], {"a": os.path.join(self.saida, "a.pdf")})
+        self.assertEqual(client.chamadas, 0)
+        with open(os.path.join(self.saida, "a.json"), encoding='utf-8') as arquivo:
+            self.assertEqual(json.load(arquivo), CV_JSON_EXEMPLO)
+
+        self.assertEqual(self.fila.enfileirar([("a", "We need Go.")]), 1)
+        self.assertEqual(self.fila.trabalho("a")["estado"], STATE_PENDING)
+
+class TestCacheDeRespostas(unittest.TestCase):
+
+    def setUp(self):
+        self.diretorio = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.diretorio, ignore_errors=True)
+
+    def test_chave_cache_muda_com_entradas(self):
+        """Testa que a chave depende de cada parte e da fronteira entre elas."""
+        self.assertEqual(chave_cache("a", "b"), chave_cache("a", "b"))
+        self.assertNotEqual(chave_cache("a", "b"), chave_cache("a", "c"))
+        self.assertNotEqual(chave_cache("ab", "c"), chave_cache("a", "bc"))
+
+    def test_get_put_e_expiracao(self):
+        """Testa a leitura, escrita e a expiração por idade."""
+        cache = CacheDeRespostas(self.diretorio, max_age_seconds=60)
+        self.assertIsNone(cache.get("ff00"))
+        cache.put("ff00", '{"a": 1}')
+        self.assertEqual(cache.get("ff00"), '{"a": 1}')
+        caminho = os.path.join(self.diretorio, "ff", "ff00.json")
+        os.utime(caminho, (0, 0))
+        self.assertIsNone(cache.get("ff00"))
+        self.assertFalse(os.path.exists(caminho))
+
+    def test_evict_por_numero_de_entradas(self):
+        """Testa que as entradas menos usadas são removidas quando o limite é atingido."""
+        cache = CacheDeRespostas(self.diretorio, max_entries=2)
+        agora = time.time()
+        for i, chave in enumerate(["aa01", "bb02"]):
+            cache.put(chave, "{}")
+            os.utime(os.path.join(self.diretorio, chave[:2], chave + ".json"), (agora - 10 + i, agora - 10 + i))
+        cache.put("cc03", "{}")
+        self.assertIsNone(cache.get("aa01"))
+        self.assertEqual(cache.get("bb02"), "{}")
+        self.assertEqual(cache.get("cc03"), "{}")
+
+    def test_put_sem_varrer_o_diretorio(self):
+        """Testa que o put só varre o diretório ao ultrapassar um limite, liberando uma folga."""
+        CacheDeRespostas(self.diretorio).put("0a00", "{}")
+        cache = CacheDeRespostas(self.diretorio, max_entries=100)
+        with patch.object(cache, "_entradas", wraps=cache._entradas) as mock_entradas:
+            for i in range(1, 100):
+                cache.put(f"{i:04x}", "{}")
+            mock_entradas.assert_not_called()
+            for i in range(100, 150):
+                cache.put(f"{i:04x}", "{}")
+            self.assertLessEqual(mock_entradas.call_count, 5)
+        self.assertLessEqual(len(cache._entradas()), 100)
+        self.assertEqual(cache._total_entradas, len(cache._entradas()))
+
+    def test_put_e_get_concorrentes(self):
+        """Testa que gravações e leituras simultâneas da mesma chave mantêm os totais e contadores certos."""
+        cache = CacheDeRespostas(self.diretorio)
+        barreira = threading.Barrier(8)
+
+        def trabalhar():
+            for i in range(50):
+                barreira.wait()
+                cache.put(f"{i:04x}", "{}")
+                cache.get(f"{i:04x}")
+
+        threads = [threading.Thread(target=trabalhar) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual((cache._total_entradas, cache._total_bytes), (50, 100))
+        self.assertEqual((cache.hits, cache.misses), (400, 0))
+
+    def test_generate_cv_usa_cache(self):
+        """Testa que a segunda geração para a mesma vaga não chama o Gemini."""
+        cache = CacheDeRespostas(self.diretorio)
+        client = StubGenaiClient()
+        saida = os.path.join(self.diretorio, "cv.pdf")
+        self.assertEqual(generate_cv("Vaga  Python\n", saida, client, cache), saida)
+        self.assertEqual(generate_cv("Vaga Python", saida, client, cache), saida)
+        self.assertEqual(client.chamadas, 1)
+        generate_cv("Vaga Python", saida, client, cache, ignorar_cache=True)
+        self.assertEqual(client.chamadas, 2)
+
 if __name__ == '__main__':
     unittest.main(argv=['first-arg-is-ignored'], exit=False)
\ No newline at end of file